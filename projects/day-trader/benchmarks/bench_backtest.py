@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Backtest Benchmark
+Replays synthetic minute bars (random walks, 390 bars per weekday) through
+scripts/backtest.py and reports throughput.
+
+Measures:
+
+  generate   : build the --years x --symbols panel in memory
+  csv load   : write one CSV per symbol, then load_bars() them (--csv only)
+  panel load : Bars.save() then Bars.load() (memory-mapped .npy)
+  signals    : sma_crossover()
+  replay     : Backtester.run(), risk checks, stops/targets and equity curve
+
+Also checks that the equity curve's last point matches the portfolio's own
+valuation.
+
+Usage:
+  python3 benchmarks/bench_backtest.py [--years 2] [--symbols 50] [--csv]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts"))
+
+from backtest import Backtester, BacktestPortfolio, Bars, FIELDS, load_bars, sma_crossover
+from trader import TradingDecisionEngine
+
+BARS_PER_DAY = 390  # 09:30-16:00
+
+
+def synthetic_bars(years: float, symbols: int, seed: int = 11) -> Bars:
+    rng = np.random.default_rng(seed)
+    days = np.arange(np.datetime64('2020-01-01'), np.datetime64('2020-01-01') + int(365 * years))
+    days = days[np.is_busday(days)]
+    minutes = np.arange(BARS_PER_DAY).astype('timedelta64[m]') + np.timedelta64(9 * 60 + 30, 'm')
+    timestamps = (days.astype('datetime64[m]')[:, None] + minutes).ravel().astype('datetime64[s]')
+
+    rows = len(timestamps)
+    start = rng.uniform(20, 500, symbols)
+    returns = rng.normal(0.0, 0.0008, (rows, symbols))
+    close = start * np.exp(np.cumsum(returns, axis=0))
+    bar_open = np.vstack([start, close[:-1]]) * (1 + rng.normal(0.0, 0.0002, (rows, symbols)))
+    wick = np.abs(rng.normal(0.0, 0.0005, (2, rows, symbols)))
+    arrays = {
+        'open': bar_open,
+        'high': np.maximum(bar_open, close) * (1 + wick[0]),
+        'low': np.minimum(bar_open, close) * (1 - wick[1]),
+        'close': close,
+        'volume': rng.integers(100, 10000, (rows, symbols)).astype(float),
+    }
+    return Bars(timestamps, [f"SYM{j:03d}" for j in range(symbols)],
+                {field: values.astype(np.float32) for field, values in arrays.items()})
+
+
+def write_csvs(bars: Bars, directory: str):
+    stamps = bars.timestamps.astype(str)
+    for j, symbol in enumerate(bars.symbols):
+        columns = [stamps] + [np.char.mod('%.4f', getattr(bars, field)[:, j]) for field in FIELDS]
+        with open(os.path.join(directory, f"{symbol}.csv"), 'w') as f:
+            f.write("timestamp," + ",".join(FIELDS) + "\n")
+            f.write("\n".join(",".join(row) for row in zip(*columns)) + "\n")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the backtester")
+    parser.add_argument("--years", type=float, default=2)
+    parser.add_argument("--symbols", type=int, default=50)
+    parser.add_argument("--fast", type=int, default=30)
+    parser.add_argument("--slow", type=int, default=120)
+    parser.add_argument("--csv", action="store_true", help="Also time writing and loading per-symbol CSVs")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    bars = synthetic_bars(args.years, args.symbols)
+    rows, count = bars.shape
+    print(f"📊 {count} symbols x {rows:,} minute bars = {rows * count / 1e6:.1f}M bars "
+          f"(generated in {time.perf_counter() - t0:.1f}s)")
+
+    with tempfile.TemporaryDirectory(prefix="bench_backtest_") as tmp:
+        if args.csv:
+            csv_dir = os.path.join(tmp, "csv")
+            os.makedirs(csv_dir)
+            write_csvs(bars, csv_dir)
+            t0 = time.perf_counter()
+            loaded = load_bars([csv_dir])
+            print(f"csv load   : {time.perf_counter() - t0:7.2f} s")
+            assert loaded.shape == bars.shape
+
+        panel_dir = os.path.join(tmp, "panel")
+        bars.save(panel_dir)
+        t0 = time.perf_counter()
+        bars = Bars.load(panel_dir)
+        print(f"panel load : {1000 * (time.perf_counter() - t0):7.2f} ms (memory-mapped)")
+
+        t0 = time.perf_counter()
+        signals = sma_crossover(bars, args.fast, args.slow)
+        print(f"signals    : {time.perf_counter() - t0:7.2f} s  ({np.count_nonzero(signals):,} crossovers)")
+
+        engine = TradingDecisionEngine(portfolio=BacktestPortfolio())
+        result = Backtester(engine, bars, signals).run()
+        summary = result.summary()
+        print(f"replay     : {summary['elapsed_s']:7.2f} s  ({rows * count / summary['elapsed_s'] / 1e6:.1f}M bars/s, "
+              f"{summary['trades']:,} trades, {summary['rejected']:,} rejected)")
+        print(f"result     : {summary['total_return_pct']:+.2f}% return, {summary['max_drawdown_pct']:.2f}% max drawdown")
+
+        expected = engine.portfolio.get_portfolio_value()
+        assert abs(result.equity[-1] - expected) < 1e-6 * expected, (result.equity[-1], expected)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Trade History Benchmark
+Compares reading recent trades by scanning trades.csv (the old
+get_recent_trades) with the indexed TradeHistory, at 1M logged trades.
+
+Writes a synthetic trades.csv of --trades rows (--symbols symbols, one trade a
+minute) into a temp directory, then measures:
+
+  full scan  : csv.DictReader over the whole file, keep the last 10 rows
+  index build: first TradeHistory use (one pass over the file)
+  recent(10) : Portfolio.get_recent_trades(10) with the index current
+  append     : --append new rows, then recent(10) (incremental catch-up)
+  symbol     : last 50 trades of one symbol
+  time range : all trades in one hour
+
+Usage:
+  python3 benchmarks/bench_trade_history.py [--trades 1000000] [--symbols 500] [--repeat 20]
+"""
+
+import argparse
+import contextlib
+import csv
+import io
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from portfolio import Portfolio
+from trade_history import TradeHistory
+
+START = datetime(2024, 1, 2, 9, 30)
+
+
+def write_trades(path: str, first: int, count: int, symbols: int, header: bool):
+    with open(path, 'a', newline='') as f:
+        writer = csv.writer(f)
+        if header:
+            writer.writerow(['timestamp', 'symbol', 'action', 'shares', 'price', 'reasoning'])
+        for i in range(first, first + count):
+            writer.writerow([
+                (START + timedelta(minutes=i)).isoformat(),
+                f"SYM{i % symbols:04d}",
+                "BUY" if i % 3 else "SELL",
+                1 + i % 20,
+                round(50 + (i % 977) * 0.37, 2),
+                "Synthetic trade, momentum signal" if i % 2 else "Synthetic trade"
+            ])
+
+
+def full_scan(path: str, limit: int = 10) -> list:
+    with open(path, 'r') as f:
+        rows = list(csv.DictReader(f))
+    return rows[-limit:]
+
+
+def timed(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return statistics.median(samples)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark trade history reads")
+    parser.add_argument("--trades", type=int, default=1000000)
+    parser.add_argument("--symbols", type=int, default=500)
+    parser.add_argument("--append", type=int, default=100, help="Rows appended before the catch-up test")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bench_trades_") as data_dir:
+        trades_file = os.path.join(data_dir, "trades.csv")
+        t0 = time.perf_counter()
+        write_trades(trades_file, 0, args.trades, args.symbols, header=True)
+        size_mb = os.path.getsize(trades_file) / 1e6
+        print(f"📄 {args.trades:,} trades, {size_mb:.1f} MB written in {time.perf_counter() - t0:.1f}s")
+
+        scan = timed(lambda: full_scan(trades_file), 3)
+        print(f"full scan   last 10 via DictReader : {1000 * scan:9.1f} ms")
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            portfolio = Portfolio(data_dir=data_dir)
+        t0 = time.perf_counter()
+        history = TradeHistory(trades_file)
+        history.refresh()
+        build = time.perf_counter() - t0
+        index_mb = sum(os.path.getsize(f) for f in (history.index_file, history.index_file + "-wal")
+                       if os.path.exists(f)) / 1e6
+        print(f"index build one pass, {index_mb:.1f} MB index   : {1000 * build:9.1f} ms (once)")
+
+        recent = timed(lambda: portfolio.get_recent_trades(10), args.repeat)
+        print(f"recent(10)  indexed                : {1000 * recent:9.3f} ms  ({scan / recent:,.0f}x faster)")
+        assert portfolio.get_recent_trades(10)[-1]['timestamp'] == full_scan(trades_file)[-1]['timestamp']
+
+        write_trades(trades_file, args.trades, args.append, args.symbols, header=False)
+        t0 = time.perf_counter()
+        latest = portfolio.get_recent_trades(10)
+        catch_up = time.perf_counter() - t0
+        assert latest[-1]['timestamp'] == (START + timedelta(minutes=args.trades + args.append - 1)).isoformat()
+        print(f"append      +{args.append} rows, recent(10)    : {1000 * catch_up:9.3f} ms")
+
+        symbol = timed(lambda: portfolio.get_trades(symbol="SYM0042", limit=50), args.repeat)
+        print(f"symbol      last 50 of SYM0042     : {1000 * symbol:9.3f} ms")
+
+        mid = START + timedelta(minutes=args.trades // 2)
+        window = (mid.isoformat(), (mid + timedelta(hours=1)).isoformat())
+        rows = len(portfolio.get_trades(start=window[0], end=window[1]))
+        span = timed(lambda: portfolio.get_trades(start=window[0], end=window[1]), args.repeat)
+        print(f"time range  one hour ({rows} trades)   : {1000 * span:9.3f} ms")
+
+        history.close()
+        portfolio.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Valuation Benchmark
+Mark-to-market of a large universe: per-symbol dict loops (the previous
+Portfolio implementation) vs the NumPy-backed Holdings.
+
+Holds --symbols positions and applies --ticks batches of quotes, each moving
+--changed of the symbols. Per tick it measures:
+
+  dict loop : update market_value/pnl per position, then sum value and P&L
+  holdings  : Holdings.mark() + Holdings.totals()
+  portfolio : Portfolio.update_prices() + get_performance() (includes journaling)
+
+Usage:
+  python3 benchmarks/bench_valuation.py [--symbols 5000] [--changed 0.5] [--ticks 50]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from holdings import Holdings
+from portfolio import Portfolio
+
+
+def dict_tick(portfolio: dict, price_updates: dict) -> float:
+    for symbol, price in price_updates.items():
+        if symbol in portfolio:
+            position = portfolio[symbol]
+            position['current_price'] = price
+            position['market_value'] = position['shares'] * price
+            position['pnl'] = (price - position['avg_price']) * position['shares']
+    total_invested = total_market_value = total_pnl = 0.0
+    for position in portfolio.values():
+        total_invested += position['shares'] * position['avg_price']
+        total_market_value += position['market_value']
+        total_pnl += position['pnl']
+    return total_market_value
+
+
+def holdings_tick(holdings: Holdings, symbols: list, prices: np.ndarray) -> float:
+    holdings.mark(symbols, prices)
+    return holdings.totals()['market_value']
+
+
+def median_ms(samples: list) -> float:
+    return 1000 * statistics.median(samples)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark portfolio valuation")
+    parser.add_argument("--symbols", type=int, default=5000)
+    parser.add_argument("--changed", type=float, default=0.5, help="Fraction of symbols quoted per tick")
+    parser.add_argument("--ticks", type=int, default=50)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(7)
+    symbols = [f"SYM{i:05d}" for i in range(args.symbols)]
+    positions = {
+        s: {'shares': float(n), 'avg_price': float(p), 'current_price': float(p),
+            'market_value': float(n * p), 'pnl': 0.0}
+        for s, n, p in zip(symbols, rng.integers(1, 100, args.symbols), rng.uniform(5, 500, args.symbols).round(2))
+    }
+    per_tick = max(1, int(args.symbols * args.changed))
+    ticks = []
+    for _ in range(args.ticks):
+        idx = rng.choice(args.symbols, per_tick, replace=False)
+        ticks.append(([symbols[i] for i in idx], rng.uniform(5, 500, per_tick).round(2)))
+
+    plain = {s: dict(p) for s, p in positions.items()}
+    holdings = Holdings(positions)
+    loop, vec = [], []
+    for names, prices in ticks:
+        updates = dict(zip(names, prices.tolist()))
+        t0 = time.perf_counter()
+        expected = dict_tick(plain, updates)
+        loop.append(time.perf_counter() - t0)
+        t0 = time.perf_counter()
+        got = holdings_tick(holdings, names, prices)
+        vec.append(time.perf_counter() - t0)
+        assert abs(got - expected) < 1e-6 * max(1.0, abs(expected))
+
+    with tempfile.TemporaryDirectory(prefix="bench_valuation_") as data_dir:
+        with contextlib.redirect_stdout(io.StringIO()):
+            portfolio = Portfolio(data_dir=data_dir)
+        with portfolio.ledger.locked():
+            portfolio._commit({'type': 'open', 'timestamp': '', 'cash': 1e9, 'portfolio': positions})
+        full = []
+        for names, prices in ticks:
+            updates = dict(zip(names, prices.tolist()))
+            t0 = time.perf_counter()
+            portfolio.update_prices(updates)
+            portfolio.get_performance()
+            full.append(time.perf_counter() - t0)
+        portfolio.close()
+
+    print(f"📊 {args.symbols:,} positions, {per_tick:,} quotes per tick, {args.ticks} ticks (median per tick)")
+    print(f"dict loop : {median_ms(loop):8.3f} ms")
+    print(f"holdings  : {median_ms(vec):8.3f} ms  ({statistics.median(loop) / statistics.median(vec):.1f}x)")
+    print(f"portfolio : {median_ms(full):8.3f} ms  (update_prices + get_performance, journaled)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
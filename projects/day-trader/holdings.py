@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Holdings
+Array-backed portfolio holdings with vectorised mark-to-market.
+
+One row per symbol, with shares, avg_price and current_price held in NumPy
+columns and a symbol -> row index. Market value, P&L and totals are computed
+from the columns in one pass instead of being stored and re-derived per
+position on every tick. The class is also a MutableMapping of symbol ->
+position dict, so code written against the old Dict[str, Dict] keeps working;
+positions read that way are computed copies (write back with
+holdings[symbol] = {...}).
+"""
+
+from collections.abc import MutableMapping
+from itertools import repeat
+from typing import Dict, Iterator, Sequence
+
+import numpy as np
+
+
+class Holdings(MutableMapping):
+    def __init__(self, positions: Dict[str, Dict] = None, capacity: int = 16):
+        self._symbols = []
+        self._index: Dict[str, int] = {}
+        self._shares = np.zeros(capacity)
+        self._avg_price = np.zeros(capacity)
+        self._current_price = np.zeros(capacity)
+        for symbol, position in (positions or {}).items():
+            self[symbol] = position
+
+    # Columns (views over the live rows)
+
+    @property
+    def symbols(self) -> Sequence[str]:
+        return self._symbols
+
+    @property
+    def shares(self) -> np.ndarray:
+        return self._shares[:len(self._symbols)]
+
+    @property
+    def avg_price(self) -> np.ndarray:
+        return self._avg_price[:len(self._symbols)]
+
+    @property
+    def current_price(self) -> np.ndarray:
+        return self._current_price[:len(self._symbols)]
+
+    @property
+    def market_value(self) -> np.ndarray:
+        return self.shares * self.current_price
+
+    @property
+    def pnl(self) -> np.ndarray:
+        return (self.current_price - self.avg_price) * self.shares
+
+    # Batch operations
+
+    def rows(self, symbols: Sequence[str]) -> np.ndarray:
+        """Row index of each symbol (-1 where not held)."""
+        return np.fromiter(map(self._index.get, symbols, repeat(-1)), dtype=np.intp, count=len(symbols))
+
+    def changed_prices(self, symbols: Sequence[str], prices: Sequence[float]) -> Dict[str, float]:
+        """The subset of a batch of quotes that are for held symbols and differ from current_price."""
+        rows = self.rows(symbols)
+        prices = np.asarray(prices, dtype=float)
+        held = rows >= 0
+        changed = np.flatnonzero(held)[self._current_price[rows[held]] != prices[held]]
+        return {symbols[i]: float(prices[i]) for i in changed}
+
+    def mark(self, symbols: Sequence[str], prices: Sequence[float]):
+        """Set current_price for a batch of quotes; symbols not held are ignored."""
+        rows = self.rows(symbols)
+        held = rows >= 0
+        self._current_price[rows[held]] = np.asarray(prices, dtype=float)[held]
+
+    def totals(self) -> Dict[str, float]:
+        """Cost basis, market value and unrealised P&L over all positions."""
+        invested = float(np.dot(self.shares, self.avg_price))
+        market_value = float(np.dot(self.shares, self.current_price))
+        return {'invested': invested, 'market_value': market_value, 'pnl': market_value - invested}
+
+    # Mapping view
+
+    def _position(self, i: int) -> Dict:
+        shares = float(self._shares[i])
+        avg_price = float(self._avg_price[i])
+        current_price = float(self._current_price[i])
+        return {
+            'shares': shares,
+            'avg_price': avg_price,
+            'current_price': current_price,
+            'market_value': shares * current_price,
+            'pnl': (current_price - avg_price) * shares
+        }
+
+    def __getitem__(self, symbol: str) -> Dict:
+        return self._position(self._index[symbol])
+
+    def __setitem__(self, symbol: str, position: Dict):
+        i = self._index.get(symbol)
+        if i is None:
+            i = len(self._symbols)
+            if i == len(self._shares):
+                grow = max(16, i)
+                self._shares = np.concatenate([self._shares, np.zeros(grow)])
+                self._avg_price = np.concatenate([self._avg_price, np.zeros(grow)])
+                self._current_price = np.concatenate([self._current_price, np.zeros(grow)])
+            self._symbols.append(symbol)
+            self._index[symbol] = i
+        self._shares[i] = position['shares']
+        self._avg_price[i] = position['avg_price']
+        self._current_price[i] = position['current_price']
+
+    def __delitem__(self, symbol: str):
+        # Move the last row into the hole so the columns stay dense.
+        i = self._index.pop(symbol)
+        last = len(self._symbols) - 1
+        if i != last:
+            moved = self._symbols[last]
+            self._symbols[i] = moved
+            self._index[moved] = i
+            for column in (self._shares, self._avg_price, self._current_price):
+                column[i] = column[last]
+        self._symbols.pop()
+
+    def __contains__(self, symbol) -> bool:
+        return symbol in self._index
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._symbols))
+
+    def __len__(self) -> int:
+        return len(self._symbols)
+
+    def to_dict(self) -> Dict[str, Dict]:
+        """Plain symbol -> position dict (as stored in snapshots and returned by get_portfolio)."""
+        return {symbol: self._position(i) for i, symbol in enumerate(self._symbols)}
+
+    def copy(self) -> Dict[str, Dict]:
+        return self.to_dict()
+
+    def __repr__(self) -> str:
+        return f"Holdings({self.to_dict()!r})"
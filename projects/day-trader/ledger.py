@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Portfolio Ledger
+Append-only journal of trades and price updates, with periodic snapshots.
+
+The journal (ledger.jsonl) is the source of truth for the portfolio: one JSON
+record per line, appended under an exclusive file lock so several processes
+(cron routine, review command, trader) can share a data directory. A snapshot
+(ledger.snapshot.json) stores the replayed state and the journal offset it
+covers, so startup only replays the tail written since.
+"""
+
+import contextlib
+import fcntl
+import json
+import os
+from typing import Dict, Iterator, List, Optional
+
+
+class LedgerCorruptError(ValueError):
+    """A complete journal record that cannot be parsed (not a torn append)."""
+
+
+class PortfolioLedger:
+    JOURNAL = "ledger.jsonl"
+    SNAPSHOT = "ledger.snapshot.json"
+
+    def __init__(self, data_dir: str, fsync: bool = True):
+        self.journal_file = os.path.join(data_dir, self.JOURNAL)
+        self.snapshot_file = os.path.join(data_dir, self.SNAPSHOT)
+        self.fsync = fsync
+        # Journal bytes already applied to the caller's in-memory state.
+        self.offset = 0
+        self._fh = open(self.journal_file, 'ab')
+
+    def is_empty(self) -> bool:
+        """True if nothing has ever been written to the journal."""
+        return os.fstat(self._fh.fileno()).st_size == 0
+
+    @contextlib.contextmanager
+    def locked(self) -> Iterator[None]:
+        """Hold the journal's exclusive lock (serialises writers across processes)."""
+        fcntl.flock(self._fh.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._fh.fileno(), fcntl.LOCK_UN)
+
+    def load_snapshot(self) -> Optional[Dict]:
+        """Load the last snapshot, or None if there is none (or it is unreadable)."""
+        try:
+            with open(self.snapshot_file, 'r') as f:
+                snapshot = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        # A snapshot ahead of the journal (journal restored from an older backup) is useless.
+        if snapshot.get('offset', 0) > os.fstat(self._fh.fileno()).st_size:
+            return None
+        return snapshot
+
+    def write_snapshot(self, state: Dict):
+        """Atomically replace the snapshot with `state` at the current offset. Call under locked()."""
+        snapshot = dict(state, offset=self.offset)
+        tmp = f"{self.snapshot_file}.{os.getpid()}.tmp"
+        with open(tmp, 'w') as f:
+            f.write(json.dumps(snapshot))  # json.dump would use the slow pure-Python encoder
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+        os.replace(tmp, self.snapshot_file)
+
+    def read_tail(self) -> List[Dict]:
+        """
+        Read the records appended after self.offset and advance past them.
+        Call under locked().
+
+        A torn last line (a crash mid-append, so no trailing newline) is cut
+        off the journal. Any other unreadable record raises LedgerCorruptError
+        and leaves the file untouched: the records after it are real trades.
+        """
+        start = self.offset
+        if os.fstat(self._fh.fileno()).st_size <= start:
+            return []
+
+        records = []
+        pos = start
+        with open(self.journal_file, 'rb') as f:
+            f.seek(start)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # Only the last line can lack its newline.
+                    print(f"⚠️ Ledger: dropping torn record at byte {pos} of {self.journal_file}")
+                    self._fh.truncate(pos)
+                    break
+                try:
+                    records.append(json.loads(line))
+                except ValueError as e:
+                    raise LedgerCorruptError(
+                        f"Unreadable journal record at byte {pos} of {self.journal_file}: {e}. "
+                        "Repair or remove that line by hand; nothing was truncated."
+                    ) from e
+                pos += len(line)
+        self.offset = pos
+        return records
+
+    def append(self, record: Dict, durable: bool = True):
+        """
+        Append one record (O(1): a single write, plus fsync when durable).
+        Call under locked(), after read_tail() has caught up.
+        """
+        line = json.dumps(record, separators=(',', ':')).encode('utf-8') + b"\n"
+        self._fh.write(line)
+        self._fh.flush()
+        if durable and self.fsync:
+            os.fsync(self._fh.fileno())
+        self.offset += len(line)
+
+    def iter_records(self, start: int, end: int) -> Iterator[Dict]:
+        """Records between two journal offsets (e.g. for exporting trades)."""
+        with open(self.journal_file, 'rb') as f:
+            f.seek(start)
+            pos = start
+            for line in f:
+                if pos >= end:
+                    break
+                pos += len(line)
+                yield json.loads(line)
+
+    def close(self):
+        self._fh.close()
@@ -2,27 +2,51 @@
 """
 Portfolio Management System for Day Trading Bot
 Manages holdings, cash, trades, and performance tracking.
+
+State is kept in an append-only ledger (see ledger.py): each trade is one
+durable journal append, and portfolio.csv / cash.json / trades.csv are
+exports refreshed at every snapshot and when the process exits. Reads
+first apply any trades other processes journalled, so instances sharing a
+data dir agree.
 """
 
+import atexit
 import csv
 import os
 import json
 from datetime import datetime
 from typing import Dict, List, Optional, Tuple
 
+from holdings import Holdings
+from ledger import PortfolioLedger
+from trade_history import TradeHistory
+
 class Portfolio:
-    def __init__(self, data_dir: str = "/root/clawd/projects/day-trader"):
+    def __init__(self, data_dir: str = "/root/clawd/projects/day-trader",
+                 snapshot_every: int = 500, fsync: bool = True):
+        """
+        Args:
+            data_dir: Directory holding the ledger and the CSV/JSON exports
+            snapshot_every: Journal records between snapshots (and CSV exports)
+            fsync: fsync each trade (and snapshot) before returning
+        """
         self.data_dir = data_dir
         self.portfolio_file = os.path.join(data_dir, "portfolio.csv")
         self.trades_file = os.path.join(data_dir, "trades.csv")
         self.cash_file = os.path.join(data_dir, "cash.json")
+        self.snapshot_every = snapshot_every
         
         # Initialize files if they don't exist
         self._init_files()
         
-        # Load current state
-        self.cash = self._load_cash()
-        self.portfolio = self._load_portfolio()
+        # Load current state: last snapshot plus the journal tail
+        self.ledger = PortfolioLedger(data_dir, fsync=fsync)
+        self._pending = 0  # journal records since the last snapshot
+        self._trades_dirty = False  # trades not yet exported to trades.csv
+        self._closed = False
+        self._history: Optional[TradeHistory] = None
+        self._load_state()
+        atexit.register(self._close_at_exit)
         
     def _init_files(self):
         """Initialize data files with headers if they don't exist."""
@@ -56,7 +80,7 @@ class Portfolio:
         with open(self.cash_file, 'w') as f:
             json.dump({'cash': cash, 'last_updated': datetime.now().isoformat()}, f)
     
-    def _load_portfolio(self) -> Dict[str, Dict]:
+    def _load_portfolio(self) -> Holdings:
         """Load portfolio from CSV file."""
         portfolio = {}
         try:
@@ -72,7 +96,7 @@ class Portfolio:
                     }
         except (FileNotFoundError, KeyError):
             pass
-        return portfolio
+        return Holdings(portfolio)
     
     def _save_portfolio(self):
         """Save portfolio to CSV file."""
@@ -90,11 +114,165 @@ class Portfolio:
                     data['pnl']
                 ])
     
-    def _log_trade(self, timestamp: str, symbol: str, action: str, shares: float, price: float, reasoning: str):
-        """Log a trade to the trades CSV file."""
+    def _load_state(self):
+        """Rebuild cash and holdings from the last snapshot plus the journal tail."""
+        with self.ledger.locked():
+            if self.ledger.is_empty():
+                # First run with the ledger: adopt the existing CSV/JSON files as the opening state.
+                self.cash = self._load_cash()
+                self.portfolio = self._load_portfolio()
+                self.ledger.append({
+                    'type': 'open',
+                    'timestamp': datetime.now().isoformat(),
+                    'cash': self.cash,
+                    'portfolio': self.portfolio.to_dict()
+                })
+                self._trades_exported = self.ledger.offset  # trades.csv already holds the history
+                self._checkpoint_locked()
+                return
+            
+            snapshot = self.ledger.load_snapshot()
+            if snapshot:
+                self.cash = snapshot['cash']
+                self.portfolio = Holdings(snapshot['portfolio'])
+                self.ledger.offset = snapshot['offset']
+                self._trades_exported = snapshot.get('trades_exported', snapshot['offset'])
+            else:
+                # No usable snapshot: replay everything, from the 'open' record.
+                self.cash = 10000.00
+                self.portfolio = Holdings()
+                self._trades_exported = None
+            
+            self._catch_up()
+            if self._trades_exported is None:
+                # Without a snapshot there is no export mark; assume trades.csv is current.
+                self._trades_exported = self.ledger.offset
+                self._trades_dirty = False
+    
+    def _catch_up(self):
+        """Apply journal records appended since our offset (by this or another process)."""
+        for record in self.ledger.read_tail():
+            self._apply(record)
+            self._pending += 1
+    
+    def _apply(self, record: Dict):
+        """Apply one journal record to the in-memory state (used live and on replay)."""
+        kind = record.get('type')
+        if kind == 'open':
+            self.cash = float(record['cash'])
+            self.portfolio = Holdings(record['portfolio'])
+        elif kind == 'trade':
+            self._apply_trade(record['symbol'], record['action'], record['shares'], record['price'])
+            self._trades_dirty = True
+        elif kind == 'prices':
+            prices = record['prices']
+            self.portfolio.mark(list(prices), list(prices.values()))
+    
+    def _apply_trade(self, symbol: str, action: str, shares: float, price: float):
+        """Update holdings and cash for a trade that has already passed validation."""
+        if action == "BUY":
+            total_cost = shares * price
+            if symbol in self.portfolio:
+                # Existing position - update average price
+                current = self.portfolio[symbol]
+                total_shares = current['shares'] + shares
+                total_cost_basis = (current['shares'] * current['avg_price']) + total_cost
+                new_avg_price = total_cost_basis / total_shares
+                
+                self.portfolio[symbol] = {
+                    'shares': total_shares,
+                    'avg_price': new_avg_price,
+                    'current_price': price,
+                    'market_value': total_shares * price,
+                    'pnl': (price - new_avg_price) * total_shares
+                }
+            else:
+                # New position
+                self.portfolio[symbol] = {
+                    'shares': shares,
+                    'avg_price': price,
+                    'current_price': price,
+                    'market_value': shares * price,
+                    'pnl': 0.0
+                }
+            self.cash -= total_cost
+        else:
+            position = self.portfolio[symbol]
+            if shares == position['shares']:
+                # Selling entire position
+                del self.portfolio[symbol]
+            else:
+                # Partial sale
+                remaining_shares = position['shares'] - shares
+                self.portfolio[symbol] = {
+                    'shares': remaining_shares,
+                    'avg_price': position['avg_price'],  # Average price stays the same
+                    'current_price': price,
+                    'market_value': remaining_shares * price,
+                    'pnl': (price - position['avg_price']) * remaining_shares
+                }
+            self.cash += shares * price
+    
+    def _commit(self, record: Dict, durable: bool = True):
+        """Journal a record, then apply it. Call under self.ledger.locked()."""
+        self.ledger.append(record, durable=durable)
+        self._apply(record)
+        self._pending += 1
+        if self._pending >= self.snapshot_every:
+            self._checkpoint_locked()
+    
+    def _export_trades(self):
+        """Append journal trades not yet in trades.csv."""
+        end = self.ledger.offset
         with open(self.trades_file, 'a', newline='') as f:
             writer = csv.writer(f)
-            writer.writerow([timestamp, symbol, action, shares, price, reasoning])
+            for record in self.ledger.iter_records(self._trades_exported, end):
+                if record.get('type') == 'trade':
+                    writer.writerow([record['timestamp'], record['symbol'], record['action'],
+                                     record['shares'], record['price'], record['reasoning']])
+        self._trades_exported = end
+    
+    def _checkpoint_locked(self):
+        # Another process may have exported further since our last snapshot.
+        snapshot = self.ledger.load_snapshot()
+        if snapshot:
+            self._trades_exported = max(self._trades_exported, snapshot.get('trades_exported', 0))
+        if self._trades_exported < self.ledger.offset:
+            self._export_trades()
+        self._save_portfolio()
+        self._save_cash(self.cash)
+        self.ledger.write_snapshot({
+            'cash': self.cash,
+            'portfolio': self.portfolio.to_dict(),
+            'trades_exported': self._trades_exported,
+            'saved_at': datetime.now().isoformat()
+        })
+        self._pending = 0
+        self._trades_dirty = False
+    
+    def checkpoint(self):
+        """Write a snapshot and refresh the CSV/JSON exports."""
+        with self.ledger.locked():
+            self._catch_up()
+            self._checkpoint_locked()
+    
+    def close(self):
+        """Checkpoint any journal records since the last snapshot and close the ledger."""
+        if self._closed:
+            return
+        if self._pending:
+            self.checkpoint()
+        self.ledger.close()
+        if self._history is not None:
+            self._history.close()
+        self._closed = True
+    
+    def _close_at_exit(self):
+        try:
+            self.close()
+        except (OSError, ValueError):
+            # Data directory gone (e.g. a removed test dir); the journal already has everything.
+            pass
     
     def buy(self, symbol: str, shares: int, price: float, reasoning: str = "") -> bool:
         """
@@ -112,51 +290,29 @@ class Portfolio:
         # Calculate total cost
         total_cost = shares * price
         
-        # Check if we have enough cash
-        if total_cost > self.cash:
-            print(f"❌ Insufficient cash. Need ${total_cost:.2f}, have ${self.cash:.2f}")
-            return False
-        
-        # Check position size limit (max 10% of initial capital)
-        if total_cost > 10000.00 * 0.10:  # 10% of $10,000 initial capital
-            print(f"❌ Position size exceeds 10% limit. Cost: ${total_cost:.2f}, Limit: ${10000.00 * 0.10:.2f}")
-            return False
-        
-        # Update portfolio
-        if symbol in self.portfolio:
-            # Existing position - update average price
-            current = self.portfolio[symbol]
-            total_shares = current['shares'] + shares
-            total_cost_basis = (current['shares'] * current['avg_price']) + total_cost
-            new_avg_price = total_cost_basis / total_shares
+        with self.ledger.locked():
+            self._catch_up()
             
-            self.portfolio[symbol] = {
-                'shares': total_shares,
-                'avg_price': new_avg_price,
-                'current_price': price,
-                'market_value': total_shares * price,
-                'pnl': (price - new_avg_price) * total_shares
-            }
-        else:
-            # New position
-            self.portfolio[symbol] = {
+            # Check if we have enough cash
+            if total_cost > self.cash:
+                print(f"❌ Insufficient cash. Need ${total_cost:.2f}, have ${self.cash:.2f}")
+                return False
+            
+            # Check position size limit (max 10% of initial capital)
+            if total_cost > 10000.00 * 0.10:  # 10% of $10,000 initial capital
+                print(f"❌ Position size exceeds 10% limit. Cost: ${total_cost:.2f}, Limit: ${10000.00 * 0.10:.2f}")
+                return False
+            
+            # Journal the trade (one durable append), then update holdings and cash
+            self._commit({
+                'type': 'trade',
+                'timestamp': datetime.now().isoformat(),
+                'symbol': symbol,
+                'action': 'BUY',
                 'shares': shares,
-                'avg_price': price,
-                'current_price': price,
-                'market_value': shares * price,
-                'pnl': 0.0
-            }
-        
-        # Update cash
-        self.cash -= total_cost
-        self._save_cash(self.cash)
-        
-        # Log trade
-        timestamp = datetime.now().isoformat()
-        self._log_trade(timestamp, symbol, "BUY", shares, price, reasoning)
-        
-        # Save portfolio
-        self._save_portfolio()
+                'price': price,
+                'reasoning': reasoning
+            })
         
         print(f"✅ Bought {shares} shares of {symbol} at ${price:.2f} each (Total: ${total_cost:.2f})")
         print(f"   Reasoning: {reasoning}")
@@ -175,48 +331,34 @@ class Portfolio:
         Returns:
             bool: True if successful, False otherwise
         """
-        # Check if we have the position
-        if symbol not in self.portfolio:
-            print(f"❌ No position in {symbol}")
-            return False
-        
-        position = self.portfolio[symbol]
-        
-        # Check if we have enough shares
-        if shares > position['shares']:
-            print(f"❌ Not enough shares. Have {position['shares']}, trying to sell {shares}")
-            return False
+        with self.ledger.locked():
+            self._catch_up()
+            
+            # Check if we have the position
+            if symbol not in self.portfolio:
+                print(f"❌ No position in {symbol}")
+                return False
+            
+            position = self.portfolio[symbol]
+            
+            # Check if we have enough shares
+            if shares > position['shares']:
+                print(f"❌ Not enough shares. Have {position['shares']}, trying to sell {shares}")
+                return False
+            
+            # Journal the trade (one durable append), then update holdings and cash
+            self._commit({
+                'type': 'trade',
+                'timestamp': datetime.now().isoformat(),
+                'symbol': symbol,
+                'action': 'SELL',
+                'shares': shares,
+                'price': price,
+                'reasoning': reasoning
+            })
         
-        # Calculate proceeds
+        # Calculate proceeds and realized P&L
         proceeds = shares * price
-        
-        # Update portfolio
-        if shares == position['shares']:
-            # Selling entire position
-            del self.portfolio[symbol]
-        else:
-            # Partial sale
-            remaining_shares = position['shares'] - shares
-            self.portfolio[symbol] = {
-                'shares': remaining_shares,
-                'avg_price': position['avg_price'],  # Average price stays the same
-                'current_price': price,
-                'market_value': remaining_shares * price,
-                'pnl': (price - position['avg_price']) * remaining_shares
-            }
-        
-        # Update cash
-        self.cash += proceeds
-        self._save_cash(self.cash)
-        
-        # Log trade
-        timestamp = datetime.now().isoformat()
-        self._log_trade(timestamp, symbol, "SELL", shares, price, reasoning)
-        
-        # Save portfolio
-        self._save_portfolio()
-        
-        # Calculate realized P&L
         realized_pnl = (price - position['avg_price']) * shares
         
         print(f"✅ Sold {shares} shares of {symbol} at ${price:.2f} each (Total: ${proceeds:.2f})")
@@ -231,29 +373,38 @@ class Portfolio:
         Args:
             price_updates: Dictionary of symbol -> current_price
         """
-        for symbol, price in price_updates.items():
-            if symbol in self.portfolio:
-                position = self.portfolio[symbol]
-                position['current_price'] = price
-                position['market_value'] = position['shares'] * price
-                position['pnl'] = (price - position['avg_price']) * position['shares']
-        
-        self._save_portfolio()
+        with self.ledger.locked():
+            self._catch_up()
+            
+            # Journal only prices that change a holding; ticks are not fsynced
+            # (losing the last few on a crash costs nothing but a stale quote).
+            changed = self.portfolio.changed_prices(list(price_updates), list(price_updates.values()))
+            if changed:
+                self._commit({
+                    'type': 'prices',
+                    'timestamp': datetime.now().isoformat(),
+                    'prices': changed
+                }, durable=False)
+    
+    def _refresh(self):
+        """Apply trades other processes journalled since our last read."""
+        with self.ledger.locked():
+            self._catch_up()
     
     def get_portfolio(self) -> Dict[str, Dict]:
-        """Get current portfolio holdings."""
+        """Get current portfolio holdings (a plain dict copy of the array-backed holdings)."""
+        self._refresh()
         return self.portfolio.copy()
     
     def get_cash(self) -> float:
         """Get current cash balance."""
+        self._refresh()
         return self.cash
     
     def get_portfolio_value(self) -> float:
         """Get total portfolio value (cash + investments)."""
-        total_value = self.cash
-        for position in self.portfolio.values():
-            total_value += position['market_value']
-        return total_value
+        self._refresh()
+        return self.cash + self.portfolio.totals()['market_value']
     
     def get_performance(self) -> Dict:
         """
@@ -262,15 +413,11 @@ class Portfolio:
         Returns:
             Dict with performance metrics
         """
-        total_invested = 0.0
-        total_market_value = 0.0
-        total_pnl = 0.0
-        
-        for position in self.portfolio.values():
-            cost_basis = position['shares'] * position['avg_price']
-            total_invested += cost_basis
-            total_market_value += position['market_value']
-            total_pnl += position['pnl']
+        self._refresh()
+        totals = self.portfolio.totals()
+        total_invested = totals['invested']
+        total_market_value = totals['market_value']
+        total_pnl = totals['pnl']
         
         total_value = self.cash + total_market_value
         initial_capital = 10000.00
@@ -288,57 +435,88 @@ class Portfolio:
             'initial_capital': initial_capital
         }
     
+    @property
+    def history(self) -> TradeHistory:
+        """Indexed view of trades.csv, brought up to date with the journal."""
+        # trades.csv is an export: append any trades still only in the journal
+        with self.ledger.locked():
+            self._catch_up()
+            if self._trades_dirty:
+                self._checkpoint_locked()
+        if self._history is None:
+            self._history = TradeHistory(self.trades_file)
+        return self._history
+    
     def get_recent_trades(self, limit: int = 10) -> List[Dict]:
-        """Get recent trades."""
-        trades = []
-        try:
-            with open(self.trades_file, 'r') as f:
-                reader = csv.DictReader(f)
-                rows = list(reader)
-                # Get last 'limit' trades
-                for row in rows[-limit:]:
-                    trades.append({
-                        'timestamp': row['timestamp'],
-                        'symbol': row['symbol'],
-                        'action': row['action'],
-                        'shares': float(row['shares']),
-                        'price': float(row['price']),
-                        'reasoning': row['reasoning']
-                    })
-        except (FileNotFoundError, KeyError):
-            pass
-        return trades
+        """Get recent trades (oldest first), without reading the whole trade log."""
+        return self.history.recent(limit)
+    
+    def get_trades(self, symbol: Optional[str] = None, start: Optional[str] = None,
+                   end: Optional[str] = None, limit: Optional[int] = None) -> List[Dict]:
+        """
+        Get trades for a symbol and/or time range, oldest first.
+        
+        Args:
+            symbol: Only this symbol
+            start: Only trades at or after this ISO timestamp
+            end: Only trades before this ISO timestamp
+            limit: Keep only the most recent `limit` matches
+            
+        Returns:
+            List of trade dicts
+        """
+        return self.history.query(symbol=symbol, start=start, end=end, limit=limit)
+
+# Singleton instance for easy import. Created on first use, so importing the
+# Portfolio class (backtests, benchmarks, tests) never touches the live data dir.
+_default_portfolio: Optional[Portfolio] = None
 
-# Singleton instance for easy import
-portfolio = Portfolio()
+def get_default_portfolio() -> Portfolio:
+    """Get the shared Portfolio on the default data dir, opening it on first use."""
+    global _default_portfolio
+    if _default_portfolio is None:
+        _default_portfolio = Portfolio()
+    return _default_portfolio
+
+def __getattr__(name: str):
+    # Keeps `from portfolio import portfolio` working without an import-time singleton.
+    if name == "portfolio":
+        return get_default_portfolio()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # Convenience functions
 def buy(symbol: str, shares: int, price: float, reasoning: str = "") -> bool:
     """Convenience function to buy shares."""
-    return portfolio.buy(symbol, shares, price, reasoning)
+    return get_default_portfolio().buy(symbol, shares, price, reasoning)
 
 def sell(symbol: str, shares: int, price: float, reasoning: str = "") -> bool:
     """Convenience function to sell shares."""
-    return portfolio.sell(symbol, shares, price, reasoning)
+    return get_default_portfolio().sell(symbol, shares, price, reasoning)
 
 def get_portfolio() -> Dict[str, Dict]:
     """Convenience function to get portfolio."""
-    return portfolio.get_portfolio()
+    return get_default_portfolio().get_portfolio()
 
 def get_performance() -> Dict:
     """Convenience function to get performance."""
-    return portfolio.get_performance()
+    return get_default_portfolio().get_performance()
 
 def update_prices(price_updates: Dict[str, float]):
     """Convenience function to update prices."""
-    portfolio.update_prices(price_updates)
+    get_default_portfolio().update_prices(price_updates)
 
 def get_recent_trades(limit: int = 10) -> List[Dict]:
     """Convenience function to get recent trades."""
-    return portfolio.get_recent_trades(limit)
+    return get_default_portfolio().get_recent_trades(limit)
+
+def get_trades(symbol: Optional[str] = None, start: Optional[str] = None,
+               end: Optional[str] = None, limit: Optional[int] = None) -> List[Dict]:
+    """Convenience function to query trade history."""
+    return get_default_portfolio().get_trades(symbol, start, end, limit)
 
 if __name__ == "__main__":
     # Test the portfolio system
+    portfolio = get_default_portfolio()
     print("🧪 Testing Portfolio System...")
     print(f"Initial cash: ${portfolio.get_cash():.2f}")
     
@@ -0,0 +1,680 @@
+#!/usr/bin/env python3
+"""
+Backtester
+Replays historical OHLCV bars through TradingDecisionEngine's risk checks
+into an in-memory portfolio. Runs offline, with no API calls and no files
+touched.
+
+Bars are loaded into a panel: one row per timestamp and one column per
+symbol, stored as NumPy arrays. A strategy turns the panel into a signal
+matrix: +1 to open a long position, -1 to close it. The run is event-driven
+over that matrix:
+
+- A signal on a bar's close fills at the next bar's open.
+- Every order goes through engine._check_risk_limits and then
+  BacktestPortfolio.buy / sell.
+- Open positions exit at the engine's stop_loss_pct / take_profit_pct levels
+  (measured from the average price) on the first bar whose low / high
+  reaches them. The fill is at the level, or at the open if the bar gapped
+  through it. If a bar reaches both levels, the stop loss is assumed hit
+  first.
+
+Only bars with a signal or a stop/target hit cost Python work; everything
+between them is one vectorised scan. This lets years of minute bars over
+many symbols replay in seconds. The result carries a per-bar equity curve
+and the trade log.
+
+Usage:
+  python3 scripts/backtest.py data/*.csv [--start 2024-01-01] [--end 2025-01-01]
+  python3 scripts/backtest.py bars.parquet --fast 30 --slow 120 --trades-out trades.csv
+  python3 scripts/backtest.py data/ --save panel/    # then: scripts/backtest.py panel/
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+# Add parent directory to path for portfolio import
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from holdings import Holdings
+from portfolio import Portfolio
+from trader import TradingDecisionEngine
+
+FIELDS = ('open', 'high', 'low', 'close', 'volume')
+TIME_COLUMNS = ('timestamp', 'datetime', 'date', 'time')
+PANEL_META = "bars.json"
+
+
+class Bars:
+    """
+    OHLCV panel: one row per timestamp and one column per symbol.
+
+    Rows are the sorted union of all symbols' timestamps. A symbol with no bar
+    at a row has NaN there. Prices are float32, which gives 7 significant
+    digits and halves the memory of a years-long minute panel.
+    """
+
+    def __init__(self, timestamps: np.ndarray, symbols: Sequence[str], arrays: Dict[str, np.ndarray],
+                 last_close: Optional[np.ndarray] = None):
+        self.timestamps = timestamps
+        self.symbols = list(symbols)
+        self.open = arrays['open']
+        self.high = arrays['high']
+        self.low = arrays['low']
+        self.close = arrays['close']
+        self.volume = arrays['volume']
+        self._last_close = last_close
+
+    @property
+    def shape(self):
+        return self.close.shape
+
+    @property
+    def last_close(self) -> np.ndarray:
+        """Close carried forward over missing bars (0 before a symbol's first bar), for valuation."""
+        if self._last_close is None:
+            valid = ~np.isnan(self.close)
+            rows = np.where(valid, np.arange(len(self.timestamps))[:, None], 0)
+            np.maximum.accumulate(rows, axis=0, out=rows)
+            last_close = self.close[rows, np.arange(len(self.symbols))]
+            last_close[np.isnan(last_close)] = 0.0
+            self._last_close = last_close
+        return self._last_close
+
+    @classmethod
+    def from_series(cls, series: Dict[str, Dict[str, np.ndarray]]) -> 'Bars':
+        """
+        Align per-symbol bars into a panel.
+
+        Args:
+            series: symbol -> {'timestamp': datetime64 array, 'close': array, ...};
+                missing open/high/low default to close and missing volume to 0
+
+        Returns:
+            Bars
+        """
+        if not series:
+            raise ValueError("No bars loaded")
+        symbols = sorted(series)
+        timestamps = np.unique(np.concatenate([series[s]['timestamp'] for s in symbols]))
+        arrays = {field: np.full((len(timestamps), len(symbols)), np.nan, dtype=np.float32) for field in FIELDS}
+        for j, symbol in enumerate(symbols):
+            columns = series[symbol]
+            rows = np.searchsorted(timestamps, columns['timestamp'])
+            for field in FIELDS:
+                default = 0.0 if field == 'volume' else columns['close']
+                arrays[field][rows, j] = columns.get(field, default)
+        return cls(timestamps, symbols, arrays)
+
+    def between(self, start: Optional[str] = None, end: Optional[str] = None) -> 'Bars':
+        """Rows with start <= timestamp < end (views, so memory-mapped panels stay mapped)."""
+        lo = 0 if start is None else np.searchsorted(self.timestamps, np.datetime64(start, 's'))
+        hi = len(self.timestamps) if end is None else np.searchsorted(self.timestamps, np.datetime64(end, 's'))
+        arrays = {field: getattr(self, field)[lo:hi] for field in FIELDS}
+        last_close = None if self._last_close is None else self._last_close[lo:hi]
+        return Bars(self.timestamps[lo:hi], self.symbols, arrays, last_close)
+
+    def save(self, path: str):
+        """Write the panel as .npy files (plus bars.json) that load() can memory-map."""
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, "timestamps.npy"), self.timestamps)
+        for field in FIELDS:
+            np.save(os.path.join(path, f"{field}.npy"), getattr(self, field))
+        np.save(os.path.join(path, "last_close.npy"), self.last_close)
+        with open(os.path.join(path, PANEL_META), 'w') as f:
+            json.dump({'symbols': self.symbols, 'rows': len(self.timestamps)}, f)
+
+    @classmethod
+    def load(cls, path: str, mmap_mode: Optional[str] = 'r') -> 'Bars':
+        """Open a panel written by save(); arrays are memory-mapped read-only by default."""
+        with open(os.path.join(path, PANEL_META), 'r') as f:
+            meta = json.load(f)
+        arrays = {field: np.load(os.path.join(path, f"{field}.npy"), mmap_mode=mmap_mode) for field in FIELDS}
+        return cls(
+            np.load(os.path.join(path, "timestamps.npy")),
+            meta['symbols'],
+            arrays,
+            np.load(os.path.join(path, "last_close.npy"), mmap_mode=mmap_mode)
+        )
+
+
+def _parse_times(values: Sequence, source: str) -> np.ndarray:
+    """ISO strings (naive or UTC) or epoch seconds/milliseconds -> datetime64[s]."""
+    try:
+        numbers = np.asarray(values, dtype=float)
+    except ValueError:
+        values = [v[:-1] if v.endswith('Z') else v for v in values]
+        try:
+            return np.array(values, dtype='datetime64[s]')
+        except ValueError:
+            raise ValueError(f"{source}: unrecognised timestamps (expected ISO 8601 or epoch seconds)")
+    if len(numbers) and numbers.max() > 1e11:
+        numbers = numbers / 1000.0  # epoch milliseconds
+    return numbers.astype('int64').astype('datetime64[s]')
+
+
+def _split_columns(columns: Dict[str, Sequence], source: str) -> Dict[str, Dict[str, np.ndarray]]:
+    """Header -> column values (one file) into symbol -> {'timestamp', 'open', ...} arrays."""
+    columns = {name.strip().lower(): values for name, values in columns.items()}
+    time_column = next((name for name in TIME_COLUMNS if name in columns), None)
+    if time_column is None or 'close' not in columns:
+        raise ValueError(f"{source}: need a timestamp column ({', '.join(TIME_COLUMNS)}) and a close column")
+
+    data = {'timestamp': _parse_times(columns[time_column], source)}
+    for field in FIELDS:
+        if field in columns:
+            data[field] = np.asarray(columns[field], dtype=float)
+
+    symbol_column = next((name for name in ('symbol', 'ticker') if name in columns), None)
+    if symbol_column is None:
+        # One symbol per file, named after the file: AAPL.csv, AAPL.parquet
+        return {os.path.splitext(os.path.basename(source))[0]: data}
+
+    names, groups = np.unique(np.asarray(columns[symbol_column], dtype=str), return_inverse=True)
+    order = np.argsort(groups, kind='stable')
+    bounds = np.searchsorted(groups[order], np.arange(len(names) + 1))
+    return {
+        str(name): {field: values[order[bounds[k]:bounds[k + 1]]] for field, values in data.items()}
+        for k, name in enumerate(names)
+    }
+
+
+def _read_csv(path: str) -> Dict[str, Dict[str, np.ndarray]]:
+    with open(path, 'r', newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        values = list(zip(*reader)) or [()] * len(header)
+    return _split_columns(dict(zip(header, values)), path)
+
+
+def _read_parquet(path: str) -> Dict[str, Dict[str, np.ndarray]]:
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Reading Parquet files needs pyarrow (pip install pyarrow)")
+    table = pq.read_table(path)
+    columns = {}
+    for name in table.column_names:
+        values = table.column(name).to_numpy()
+        if np.issubdtype(values.dtype, np.datetime64):
+            values = values.astype('datetime64[s]').astype(str)
+        columns[name] = values
+    return _split_columns(columns, path)
+
+
+def load_bars(paths: Sequence[str], start: Optional[str] = None, end: Optional[str] = None) -> Bars:
+    """
+    Load OHLCV bars from CSV / Parquet files, directories of them, or a saved panel.
+
+    Each file has a timestamp column and open/high/low/close(/volume). It either
+    holds one symbol (named after the file) or has a symbol column.
+
+    Args:
+        paths: Files or directories
+        start: Only bars at or after this ISO timestamp
+        end: Only bars before this ISO timestamp
+
+    Returns:
+        Bars
+    """
+    if len(paths) == 1 and os.path.exists(os.path.join(paths[0], PANEL_META)):
+        return Bars.load(paths[0]).between(start, end)
+
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(os.path.join(path, name) for name in os.listdir(path)
+                                if name.endswith(('.csv', '.parquet', '.pq'))))
+        else:
+            files.append(path)
+
+    series = {}
+    for path in files:
+        reader = _read_csv if path.endswith('.csv') else _read_parquet
+        for symbol, data in reader(path).items():
+            if symbol in series:
+                series[symbol] = {field: np.concatenate([series[symbol][field], data[field]])
+                                  for field in data if field in series[symbol]}
+            else:
+                series[symbol] = data
+    return Bars.from_series(series).between(start, end)
+
+
+def sma_crossover(bars: Bars, fast: int = 20, slow: int = 60) -> np.ndarray:
+    """
+    Moving-average crossover signals: +1 where the fast SMA of the close crosses
+    above the slow one, -1 where it crosses back below.
+
+    Args:
+        bars: Price panel
+        fast: Fast window (bars)
+        slow: Slow window (bars)
+
+    Returns:
+        int8 signal matrix shaped like the panel
+    """
+    rows, count = bars.shape
+    signals = np.zeros((rows, count), dtype=np.int8)
+    if rows <= slow:
+        return signals
+
+    def sma(x: np.ndarray, n: int) -> np.ndarray:
+        total = np.cumsum(x)
+        out = np.full(len(x), np.nan)
+        out[n - 1:] = (total[n - 1:] - np.concatenate(([0.0], total[:-n]))) / n
+        return out
+
+    for j in range(count):
+        close = bars.last_close[:, j].astype(float)
+        first = int(np.argmax(close > 0))
+        above = sma(close, fast) > sma(close, slow)
+        column = signals[:, j]
+        column[1:][above[1:] & ~above[:-1]] = 1
+        column[1:][~above[1:] & above[:-1]] = -1
+        column[:first + slow] = 0  # warm-up, including bars before the symbol listed
+    return signals
+
+
+class BacktestPortfolio(Portfolio):
+    """
+    Portfolio kept in memory for backtests.
+
+    Uses the same holdings math and buy/sell validation as Portfolio, but has no
+    ledger, writes no files and prints nothing. Trades are kept in self.trades.
+    """
+
+    def __init__(self, initial_capital: float = 10000.00, max_trade_pct: Optional[float] = 0.10):
+        """
+        Args:
+            initial_capital: Starting cash
+            max_trade_pct: Portfolio.buy's cap on one purchase, as a fraction of
+                initial capital (None to disable)
+        """
+        self.initial_capital = initial_capital
+        self.max_trade_value = initial_capital * max_trade_pct if max_trade_pct else None
+        self.cash = initial_capital
+        self.portfolio = Holdings()
+        self.trades: List[Dict] = []
+        self.now = None  # timestamp stamped on trades, set by the backtester
+
+    def _log(self, symbol: str, action: str, shares: float, price: float, reasoning: str, realized_pnl: float):
+        self.trades.append({
+            'timestamp': str(self.now),
+            'symbol': symbol,
+            'action': action,
+            'shares': shares,
+            'price': price,
+            'reasoning': reasoning,
+            'realized_pnl': realized_pnl
+        })
+
+    def buy(self, symbol: str, shares: int, price: float, reasoning: str = "") -> bool:
+        total_cost = shares * price
+        if total_cost > self.cash:
+            return False
+        if self.max_trade_value is not None and total_cost > self.max_trade_value:
+            return False
+        self._apply_trade(symbol, 'BUY', shares, price)
+        self._log(symbol, 'BUY', shares, price, reasoning, 0.0)
+        return True
+
+    def sell(self, symbol: str, shares: int, price: float, reasoning: str = "") -> bool:
+        if symbol not in self.portfolio:
+            return False
+        avg_price = self.portfolio[symbol]['avg_price']
+        if shares > self.portfolio[symbol]['shares']:
+            return False
+        self._apply_trade(symbol, 'SELL', shares, price)
+        self._log(symbol, 'SELL', shares, price, reasoning, (price - avg_price) * shares)
+        return True
+
+    def update_prices(self, price_updates: Dict[str, float]):
+        self.portfolio.mark(list(price_updates), list(price_updates.values()))
+
+    def get_performance(self) -> Dict:
+        performance = super().get_performance()
+        performance['initial_capital'] = self.initial_capital
+        performance['total_return'] = performance['total_value'] - self.initial_capital
+        performance['total_return_pct'] = (performance['total_return'] / self.initial_capital) * 100
+        return performance
+
+    def get_recent_trades(self, limit: int = 10) -> List[Dict]:
+        return self.trades[-limit:]
+
+    def get_trades(self, symbol: Optional[str] = None, start: Optional[str] = None,
+                   end: Optional[str] = None, limit: Optional[int] = None) -> List[Dict]:
+        trades = [t for t in self.trades
+                  if (symbol is None or t['symbol'] == symbol)
+                  and (start is None or t['timestamp'] >= start)
+                  and (end is None or t['timestamp'] < end)]
+        return trades[-limit:] if limit is not None else trades
+
+    def _refresh(self):
+        pass
+
+    def checkpoint(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class BacktestResult:
+    def __init__(self, timestamps: np.ndarray, equity: np.ndarray, trades: List[Dict],
+                 initial_capital: float, rejected: int, elapsed: float):
+        self.timestamps = timestamps
+        self.equity = equity
+        self.trades = trades
+        self.initial_capital = initial_capital
+        self.rejected = rejected
+        self.elapsed = elapsed
+
+    def summary(self) -> Dict:
+        """
+        Headline metrics of the run.
+
+        Returns:
+            Dict with final value, return, max drawdown, turnover (traded value
+            over mean equity), trade counts and win rate of closing sells
+        """
+        final_value = float(self.equity[-1]) if len(self.equity) else self.initial_capital
+        peak = np.maximum.accumulate(self.equity) if len(self.equity) else np.ones(1)
+        drawdown = float(np.max(1.0 - self.equity / peak)) if len(self.equity) else 0.0
+        traded = sum(t['shares'] * t['price'] for t in self.trades)
+        sells = [t for t in self.trades if t['action'] == 'SELL']
+        wins = sum(1 for t in sells if t['realized_pnl'] > 0)
+        return {
+            'start': str(self.timestamps[0]) if len(self.timestamps) else None,
+            'end': str(self.timestamps[-1]) if len(self.timestamps) else None,
+            'bars': len(self.timestamps),
+            'initial_capital': self.initial_capital,
+            'final_value': final_value,
+            'total_return': final_value - self.initial_capital,
+            'total_return_pct': (final_value / self.initial_capital - 1.0) * 100,
+            'max_drawdown_pct': drawdown * 100,
+            'turnover': traded / float(np.mean(self.equity)) if len(self.equity) else 0.0,
+            'trades': len(self.trades),
+            'rejected': self.rejected,
+            'win_rate_pct': (100.0 * wins / len(sells)) if sells else 0.0,
+            'elapsed_s': self.elapsed
+        }
+
+    def write_equity_csv(self, path: str, every: int = 1):
+        """Write timestamp,equity for every `every`-th bar (and always the last)."""
+        rows = np.arange(0, len(self.equity), every)
+        if len(self.equity) and rows[-1] != len(self.equity) - 1:
+            rows = np.append(rows, len(self.equity) - 1)
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['timestamp', 'equity'])
+            writer.writerows(zip(self.timestamps[rows].astype(str), np.round(self.equity[rows], 2)))
+
+    def write_trades_csv(self, path: str):
+        """Write the trade log in trades.csv's columns, plus realized_pnl."""
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['timestamp', 'symbol', 'action', 'shares', 'price', 'reasoning', 'realized_pnl'])
+            for t in self.trades:
+                writer.writerow([t['timestamp'], t['symbol'], t['action'], t['shares'],
+                                 t['price'], t['reasoning'], round(t['realized_pnl'], 2)])
+
+
+class Backtester:
+    _EQUITY_CHUNK = 8192  # rows valued at once when building the equity curve
+
+    def __init__(self, engine: TradingDecisionEngine, bars: Bars, signals: np.ndarray):
+        """
+        Args:
+            engine: Engine whose risk parameters and checks are applied; its
+                portfolio must be a BacktestPortfolio
+            bars: Price panel
+            signals: int8 matrix shaped like the panel (+1 open long, -1 close)
+        """
+        if not isinstance(engine.portfolio, BacktestPortfolio):
+            raise TypeError("Backtester needs an engine trading a BacktestPortfolio")
+        if signals.shape != bars.shape:
+            raise ValueError(f"signals shape {signals.shape} does not match bars {bars.shape}")
+        self.engine = engine
+        self.portfolio = engine.portfolio
+        self.bars = bars
+        self.signals = signals
+        self.rejected = 0
+        count = len(bars.symbols)
+        self._held = np.zeros(count, dtype=bool)
+        self._stop = np.full(count, np.nan)
+        self._target = np.full(count, np.nan)
+        # Fills, for rebuilding the equity curve: bar row, symbol column, share change, cash after
+        self._fills: List[tuple] = []
+
+    def _mark(self, row: int):
+        """Mark held positions at the previous close, so risk checks see current values."""
+        if row and self._held.any():
+            cols = np.flatnonzero(self._held)
+            self.portfolio.portfolio.mark([self.bars.symbols[c] for c in cols],
+                                          self.bars.last_close[row - 1, cols].astype(float))
+
+    def _order(self, row: int, col: int, action: str, shares: int, price: float, reasoning: str) -> bool:
+        symbol = self.bars.symbols[col]
+        if not self.engine._check_risk_limits(symbol, shares, price, action)["allowed"]:
+            self.rejected += 1
+            return False
+        self.portfolio.now = self.bars.timestamps[row]
+        if action == "BUY":
+            if not self.portfolio.buy(symbol, shares, price, reasoning):
+                self.rejected += 1
+                return False
+            avg_price = self.portfolio.portfolio[symbol]['avg_price']
+            self._held[col] = True
+            self._stop[col] = avg_price * (1 - self.engine.stop_loss_pct)
+            self._target[col] = avg_price * (1 + self.engine.take_profit_pct)
+            self._fills.append((row, col, shares, self.portfolio.cash))
+        else:
+            if not self.portfolio.sell(symbol, shares, price, reasoning):
+                self.rejected += 1
+                return False
+            if symbol not in self.portfolio.portfolio:
+                self._held[col] = False
+                self._stop[col] = self._target[col] = np.nan
+            self._fills.append((row, col, -shares, self.portfolio.cash))
+        return True
+
+    def _exit_hits(self, start: int, end: int) -> Optional[int]:
+        """Sell held positions at the first row in [start, end) that reaches a stop or target."""
+        cols = np.flatnonzero(self._held)
+        low = self.bars.low[start:end, cols]
+        high = self.bars.high[start:end, cols]
+        stop, target = self._stop[cols], self._target[cols]
+        stopped = low <= stop
+        hit = stopped | (high >= target)
+        rows = np.flatnonzero(hit.any(axis=1))
+        if not len(rows):
+            return None
+        row = start + rows[0]
+        self._mark(row)
+        bar_open = self.bars.open[row]
+        for k in np.flatnonzero(hit[rows[0]]):
+            col = cols[k]
+            open_price = float(bar_open[col])
+            if stopped[rows[0], k]:
+                price = min(open_price, stop[k]) if open_price == open_price else stop[k]
+                reasoning = f"Stop loss ({self.engine.stop_loss_pct*100:g}%)"
+            else:
+                price = max(open_price, target[k]) if open_price == open_price else target[k]
+                reasoning = f"Take profit ({self.engine.take_profit_pct*100:g}%)"
+            shares = self.portfolio.portfolio[self.bars.symbols[col]]['shares']
+            self._order(row, col, "SELL", shares, round(float(price), 4), reasoning)
+        return row
+
+    def _fill_signals(self, row: int):
+        """Execute the previous bar's signals at this bar's open: exits first, then entries."""
+        signal = self.signals[row - 1]
+        cols = np.flatnonzero(signal)
+        exits = cols[(signal[cols] < 0) & self._held[cols]]
+        entries = cols[(signal[cols] > 0) & ~self._held[cols]]
+        if not len(exits) and not len(entries):
+            return
+        self._mark(row)
+        bar_open = self.bars.open[row]
+        for col in exits:
+            price = float(bar_open[col])
+            if price == price:
+                shares = self.portfolio.portfolio[self.bars.symbols[col]]['shares']
+                self._order(row, col, "SELL", shares, round(price, 4), "Signal exit")
+        for col in entries:
+            price = float(bar_open[col])
+            if not price > 0:
+                continue
+            budget = min(self.portfolio.get_portfolio_value() * self.engine.max_position_size_pct,
+                         self.portfolio.cash)
+            if self.portfolio.max_trade_value is not None:
+                budget = min(budget, self.portfolio.max_trade_value)
+            price = round(price, 4)
+            shares = int(budget // price)
+            if shares > 0:
+                self._order(row, col, "BUY", shares, price, "Signal entry")
+
+    def _equity_curve(self) -> np.ndarray:
+        """Cash plus positions valued at each bar's close, rebuilt from the fills in chunks."""
+        rows_total, count = self.bars.shape
+        equity = np.empty(rows_total)
+        if not rows_total:
+            return equity
+        if self._fills:
+            rows, cols, deltas, cash_after = (np.array(column) for column in zip(*self._fills))
+        else:
+            rows = cols = np.zeros(0, dtype=np.intp)
+            deltas = cash_after = np.zeros(0)
+        cash = np.full(rows_total, self.portfolio.initial_capital)
+        if len(rows):
+            last_fill = np.searchsorted(rows, np.arange(rows_total), side='right') - 1
+            cash = np.where(last_fill >= 0, cash_after[np.maximum(last_fill, 0)], cash)
+        shares = np.zeros(count)
+        for start in range(0, rows_total, self._EQUITY_CHUNK):
+            end = min(rows_total, start + self._EQUITY_CHUNK)
+            a, b = np.searchsorted(rows, [start, end])
+            change = np.zeros((end - start, count))
+            np.add.at(change, (rows[a:b] - start, cols[a:b]), deltas[a:b])
+            position = shares + np.cumsum(change, axis=0)
+            equity[start:end] = cash[start:end] + np.einsum(
+                'ij,ij->i', position, self.bars.last_close[start:end].astype(float))
+            shares = position[-1]
+        return equity
+
+    def run(self) -> BacktestResult:
+        started = time.perf_counter()
+        rows_total = len(self.bars.timestamps)
+        fill_rows = np.flatnonzero(self.signals[:-1].any(axis=1)) + 1
+        scanned = 0  # rows before this have been checked for stops/targets
+        for row in fill_rows.tolist() + [rows_total]:
+            while scanned < row and self._held.any():
+                hit = self._exit_hits(scanned, row)
+                if hit is None:
+                    break
+                scanned = hit + 1
+            if row == rows_total:
+                break
+            self._fill_signals(row)
+            scanned = row
+
+        if rows_total:
+            self._mark(rows_total)
+        return BacktestResult(self.bars.timestamps, self._equity_curve(), self.portfolio.trades,
+                              self.portfolio.initial_capital, self.rejected, time.perf_counter() - started)
+
+
+def run_backtest(bars: Bars, strategy: Callable[[Bars], np.ndarray] = sma_crossover,
+                 initial_capital: float = 10000.00, max_trade_pct: Optional[float] = 0.10,
+                 signals: Optional[np.ndarray] = None, **risk) -> BacktestResult:
+    """
+    Backtest a strategy with a fresh engine and in-memory portfolio.
+
+    Args:
+        bars: Price panel
+        strategy: Function from the panel to its signal matrix
+        initial_capital: Starting cash
+        max_trade_pct: Per-purchase cap as in Portfolio.buy (None to disable)
+        signals: Precomputed strategy(bars), to reuse across runs
+        **risk: Engine risk parameters (max_position_size_pct, stop_loss_pct,
+            take_profit_pct)
+
+    Returns:
+        BacktestResult with the equity curve, trade log and summary
+    """
+    engine = TradingDecisionEngine(portfolio=BacktestPortfolio(initial_capital, max_trade_pct), **risk)
+    return Backtester(engine, bars, strategy(bars) if signals is None else signals).run()
+
+
+def main():
+    """Main function for command-line usage."""
+    parser = argparse.ArgumentParser(description="Backtest the trading engine on historical OHLCV bars")
+    parser.add_argument("data", nargs="+", help="CSV/Parquet files, directories of them, or a saved panel")
+    parser.add_argument("--start", help="First bar (ISO timestamp, inclusive)")
+    parser.add_argument("--end", help="Last bar (ISO timestamp, exclusive)")
+    parser.add_argument("--symbols", help="Comma-separated subset of symbols")
+    parser.add_argument("--fast", type=int, default=20, help="Fast SMA window in bars")
+    parser.add_argument("--slow", type=int, default=60, help="Slow SMA window in bars")
+    parser.add_argument("--capital", type=float, default=10000.00, help="Initial capital")
+    parser.add_argument("--max-position", type=float, default=0.10,
+                        help="Max position size as a fraction of portfolio value")
+    parser.add_argument("--stop-loss", type=float, default=0.05, help="Stop loss as a fraction of the average price")
+    parser.add_argument("--take-profit", type=float, default=0.10,
+                        help="Take profit as a fraction of the average price")
+    parser.add_argument("--max-trade", type=float, default=0.10,
+                        help="Per-purchase cap as a fraction of initial capital, as in Portfolio.buy (0 disables)")
+    parser.add_argument("--equity-out", help="Write the equity curve to this CSV")
+    parser.add_argument("--every", type=int, default=1, help="Write every Nth bar of the equity curve")
+    parser.add_argument("--trades-out", help="Write the trade log to this CSV")
+    parser.add_argument("--save", help="Save the loaded panel here (.npy, memory-mappable) for fast reloads")
+    parser.add_argument("--json", action="store_true", help="Print the summary as JSON")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    bars = load_bars(args.data, args.start, args.end)
+    if args.symbols:
+        wanted = [s.strip() for s in args.symbols.split(",") if s.strip()]
+        missing = [s for s in wanted if s not in bars.symbols]
+        if missing:
+            parser.error(f"no bars for: {', '.join(missing)}")
+        cols = [bars.symbols.index(s) for s in wanted]
+        bars = Bars(bars.timestamps, wanted, {field: getattr(bars, field)[:, cols] for field in FIELDS},
+                    bars.last_close[:, cols])
+    load_time = time.perf_counter() - t0
+    if args.save:
+        bars.save(args.save)
+
+    result = run_backtest(bars, lambda b: sma_crossover(b, args.fast, args.slow),
+                          initial_capital=args.capital, max_trade_pct=args.max_trade or None,
+                          max_position_size_pct=args.max_position, stop_loss_pct=args.stop_loss,
+                          take_profit_pct=args.take_profit)
+    if args.equity_out:
+        result.write_equity_csv(args.equity_out, args.every)
+    if args.trades_out:
+        result.write_trades_csv(args.trades_out)
+
+    summary = result.summary()
+    if args.json:
+        print(json.dumps(summary, indent=2))
+        return
+
+    rows, count = bars.shape
+    print(f"📊 BACKTEST: SMA {args.fast}/{args.slow} on {count} symbols, {rows:,} bars")
+    print(f"  • Risk: position {args.max_position*100:g}%, stop {args.stop_loss*100:g}%, "
+          f"target {args.take_profit*100:g}%")
+    print(f"  • Period: {summary['start']} → {summary['end']}")
+    print(f"  • Final Value: ${summary['final_value']:,.2f}")
+    print(f"  • Return: ${summary['total_return']:,.2f} ({summary['total_return_pct']:.2f}%)")
+    print(f"  • Max Drawdown: {summary['max_drawdown_pct']:.2f}%")
+    print(f"  • Trades: {summary['trades']} (rejected by risk checks: {summary['rejected']})")
+    print(f"  • Win Rate: {summary['win_rate_pct']:.1f}% of sells")
+    print(f"  • Turnover: {summary['turnover']:.1f}x")
+    print(f"  • Time: load {load_time:.2f}s, replay {summary['elapsed_s']:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -198,6 +198,8 @@ mkdir -p "$BACKUP_DIR"
 BACKUP_FILE="$BACKUP_DIR/backup_$(date +%Y%m%d_%H%M%S).tar.gz"
 
 tar -czf "$BACKUP_FILE" \
+    "$PROJECT_DIR/ledger.jsonl" \
+    "$PROJECT_DIR/ledger.snapshot.json" \
     "$PROJECT_DIR/portfolio.csv" \
     "$PROJECT_DIR/trades.csv" \
     "$PROJECT_DIR/cash.json" \
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Parameter Sweep
+Backtests a grid or random sample of TradingDecisionEngine risk parameters
+(max_position_size_pct, stop_loss_pct, take_profit_pct) in parallel and
+ranks the results by return, drawdown or turnover.
+
+The price panel and the strategy's signals are written once as .npy files.
+Every worker process memory-maps them, so all workers read the same pages
+from the OS page cache. Neither array is pickled per task. A task is just
+its parameter dict, and only its summary row is sent back.
+
+Usage:
+  python3 scripts/sweep.py data/*.csv --max-position 0.05,0.1,0.2 --stop-loss 0.02:0.1:0.02 --take-profit 0.05,0.1,0.2
+  python3 scripts/sweep.py panel/ --random 200 --stop-loss 0.01,0.1 --take-profit 0.02,0.3 --sort drawdown
+"""
+
+import argparse
+import csv
+import itertools
+import json
+import os
+import random
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from backtest import PANEL_META, Bars, load_bars, run_backtest, sma_crossover
+
+PARAMETERS = ('max_position_size_pct', 'stop_loss_pct', 'take_profit_pct')
+SORT_KEYS = {
+    # name -> (summary key, descending)
+    'return': ('total_return_pct', True),
+    'drawdown': ('max_drawdown_pct', False),
+    'turnover': ('turnover', False),
+    'ratio': ('return_to_drawdown', True),
+}
+
+# Per-worker state, set once by _init_worker
+_worker: Dict = {}
+
+
+def _init_worker(panel_dir: str, start: Optional[str], end: Optional[str], signals_file: str,
+                 initial_capital: float, max_trade_pct: Optional[float]):
+    _worker['bars'] = Bars.load(panel_dir).between(start, end)
+    _worker['signals'] = np.load(signals_file, mmap_mode='r')
+    _worker['initial_capital'] = initial_capital
+    _worker['max_trade_pct'] = max_trade_pct
+
+
+def _run(params: Dict[str, float]) -> Dict:
+    """Backtest one parameter set against the worker's mapped panel; return its summary row."""
+    result = run_backtest(_worker['bars'], signals=_worker['signals'],
+                          initial_capital=_worker['initial_capital'],
+                          max_trade_pct=_worker['max_trade_pct'], **params)
+    row = dict(params)
+    row.update(result.summary())
+    row['return_to_drawdown'] = row['total_return_pct'] / max(row['max_drawdown_pct'], 1e-9)
+    return row
+
+
+def grid(values: Dict[str, Sequence[float]]) -> List[Dict[str, float]]:
+    """Every combination of the given parameter values."""
+    names = list(values)
+    return [dict(zip(names, combo)) for combo in itertools.product(*(values[n] for n in names))]
+
+
+def sample(values: Dict[str, Sequence[float]], count: int, seed: int = 42) -> List[Dict[str, float]]:
+    """`count` parameter sets drawn uniformly between each parameter's smallest and largest value."""
+    rng = random.Random(seed)
+    return [{name: round(rng.uniform(min(v), max(v)), 4) for name, v in values.items()} for _ in range(count)]
+
+
+def rank(rows: List[Dict], by: str = 'return') -> List[Dict]:
+    key, descending = SORT_KEYS[by]
+    return sorted(rows, key=lambda row: row[key], reverse=descending)
+
+
+def run_sweep(panel_dir: str, tasks: List[Dict[str, float]], signals_file: str,
+              start: Optional[str] = None, end: Optional[str] = None,
+              initial_capital: float = 10000.00, max_trade_pct: Optional[float] = 0.10,
+              workers: Optional[int] = None) -> List[Dict]:
+    """
+    Backtest each parameter set in a process pool sharing one memory-mapped panel.
+
+    Args:
+        panel_dir: Panel written by Bars.save()
+        tasks: Parameter dicts (engine keyword arguments)
+        signals_file: .npy signal matrix for the panel (rows start..end)
+        start: Only bars at or after this ISO timestamp
+        end: Only bars before this ISO timestamp
+        initial_capital: Starting cash for every run
+        max_trade_pct: Per-purchase cap as in Portfolio.buy (None to disable)
+        workers: Worker processes (default: one per CPU)
+
+    Returns:
+        Summary rows, in task order
+    """
+    workers = workers or os.cpu_count() or 1
+    chunksize = max(1, len(tasks) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(panel_dir, start, end, signals_file, initial_capital, max_trade_pct)) as pool:
+        return list(pool.map(_run, tasks, chunksize=chunksize))
+
+
+def _values(text: str) -> List[float]:
+    """'0.05,0.1,0.2' or an inclusive range 'start:stop:step'."""
+    if ':' in text:
+        start, stop, step = (float(part) for part in text.split(':'))
+        count = int(round((stop - start) / step)) + 1
+        values = [round(start + i * step, 6) for i in range(count)]
+    else:
+        values = [float(part) for part in text.split(',') if part.strip()]
+    if not values or any(not 0 < v <= 1 for v in values):
+        raise argparse.ArgumentTypeError(f"expected fractions in (0, 1], got {text!r}")
+    return values
+
+
+def main():
+    """Main function for command-line usage."""
+    parser = argparse.ArgumentParser(description="Sweep engine risk parameters over historical bars")
+    parser.add_argument("data", nargs="+", help="CSV/Parquet files, directories of them, or a saved panel")
+    parser.add_argument("--start", help="First bar (ISO timestamp, inclusive)")
+    parser.add_argument("--end", help="Last bar (ISO timestamp, exclusive)")
+    parser.add_argument("--max-position", type=_values, default=[0.05, 0.10, 0.20],
+                        help="max_position_size_pct values (comma list or start:stop:step)")
+    parser.add_argument("--stop-loss", type=_values, default=[0.02, 0.05, 0.10], help="stop_loss_pct values")
+    parser.add_argument("--take-profit", type=_values, default=[0.05, 0.10, 0.20], help="take_profit_pct values")
+    parser.add_argument("--random", type=int, metavar="N",
+                        help="Random search: N sets drawn between each parameter's min and max, instead of the grid")
+    parser.add_argument("--seed", type=int, default=42, help="Random search seed")
+    parser.add_argument("--fast", type=int, default=20, help="Fast SMA window in bars")
+    parser.add_argument("--slow", type=int, default=60, help="Slow SMA window in bars")
+    parser.add_argument("--capital", type=float, default=10000.00, help="Initial capital")
+    parser.add_argument("--max-trade", type=float, default=0.10,
+                        help="Per-purchase cap as a fraction of initial capital, as in Portfolio.buy (0 disables)")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: one per CPU)")
+    parser.add_argument("--sort", choices=sorted(SORT_KEYS), default="return", help="Ranking")
+    parser.add_argument("--top", type=int, default=20, help="Rows to print")
+    parser.add_argument("--out", help="Write the full ranked table to this CSV")
+    parser.add_argument("--json", action="store_true", help="Print the ranked table as JSON")
+    args = parser.parse_args()
+
+    values = {
+        'max_position_size_pct': args.max_position,
+        'stop_loss_pct': args.stop_loss,
+        'take_profit_pct': args.take_profit,
+    }
+    tasks = sample(values, args.random, args.seed) if args.random else grid(values)
+
+    with tempfile.TemporaryDirectory(prefix="sweep_") as tmp:
+        t0 = time.perf_counter()
+        bars = load_bars(args.data, args.start, args.end)
+        if len(args.data) == 1 and os.path.exists(os.path.join(args.data[0], PANEL_META)):
+            panel_dir, start, end = args.data[0], args.start, args.end
+        else:
+            panel_dir, start, end = os.path.join(tmp, "panel"), None, None
+            bars.save(panel_dir)
+        signals_file = os.path.join(tmp, "signals.npy")
+        np.save(signals_file, sma_crossover(bars, args.fast, args.slow))
+        prepare_time = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        rows = run_sweep(panel_dir, tasks, signals_file, start, end, args.capital,
+                         args.max_trade or None, args.workers)
+        sweep_time = time.perf_counter() - t0
+
+    ranked = rank(rows, args.sort)
+    if args.out:
+        columns = list(PARAMETERS) + [k for k in ranked[0] if k not in PARAMETERS]
+        with open(args.out, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=columns)
+            writer.writeheader()
+            writer.writerows(ranked)
+    if args.json:
+        print(json.dumps(ranked, indent=2))
+        return
+
+    count_rows, count_symbols = bars.shape
+    print(f"📊 SWEEP: {len(tasks)} parameter sets, SMA {args.fast}/{args.slow}, "
+          f"{count_symbols} symbols x {count_rows:,} bars, ranked by {args.sort}")
+    print(f"{'#':>3} {'pos%':>6} {'stop%':>6} {'target%':>7} {'return%':>9} {'maxDD%':>7} "
+          f"{'turnover':>9} {'trades':>7} {'win%':>6}")
+    for i, row in enumerate(ranked[:args.top], 1):
+        print(f"{i:>3} {row['max_position_size_pct']*100:>6.2f} {row['stop_loss_pct']*100:>6.2f} "
+              f"{row['take_profit_pct']*100:>7.2f} {row['total_return_pct']:>9.2f} {row['max_drawdown_pct']:>7.2f} "
+              f"{row['turnover']:>8.1f}x {row['trades']:>7} {row['win_rate_pct']:>6.1f}")
+    print(f"⏱️ Prepare {prepare_time:.2f}s, sweep {sweep_time:.2f}s "
+          f"({len(tasks) / sweep_time:.1f} backtests/s on {args.workers or os.cpu_count()} workers)")
+
+
+if __name__ == "__main__":
+    main()
@@ -16,16 +16,27 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from portfolio import Portfolio
 
 class TradingDecisionEngine:
-    def __init__(self, api_key: str = None):
+    def __init__(self, api_key: str = None, portfolio: Portfolio = None,
+                 max_position_size_pct: float = 0.10, stop_loss_pct: float = 0.05,
+                 take_profit_pct: float = 0.10):
+        """
+        Args:
+            api_key: DeepSeek API key (default: $DEEPSEEK_API_KEY)
+            portfolio: Portfolio to trade (default: the live data directory);
+                backtests pass an in-memory one
+            max_position_size_pct: Max position size as a fraction of portfolio value
+            stop_loss_pct: Stop loss below the average price, as a fraction
+            take_profit_pct: Take profit above the average price, as a fraction
+        """
         self.api_key = api_key or os.getenv("DEEPSEEK_API_KEY", "")
         # Use DeepSeek direct API instead of OpenRouter
         self.api_url = "https://api.deepseek.com/chat/completions"
-        self.portfolio = Portfolio()
+        self.portfolio = portfolio if portfolio is not None else Portfolio()
         
         # Risk management parameters
-        self.max_position_size_pct = 0.10  # Max 10% per position
-        self.stop_loss_pct = 0.05  # 5% stop loss
-        self.take_profit_pct = 0.10  # 10% take profit
+        self.max_position_size_pct = max_position_size_pct  # Max 10% per position by default
+        self.stop_loss_pct = stop_loss_pct  # 5% stop loss by default
+        self.take_profit_pct = take_profit_pct  # 10% take profit by default
         
     def analyze_market(self, symbols: List[str] = None) -> Dict:
         """
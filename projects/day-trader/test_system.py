@@ -147,6 +147,312 @@ def test_portfolio():
         shutil.rmtree(test_dir, ignore_errors=True)
         print(f"Cleaned up test directory: {test_dir}")
 
+def test_ledger_replay():
+    """Test that the ledger rebuilds the same portfolio on reopen."""
+    print("\n\n🧪 Testing Ledger Replay (Deterministic)...")
+    print("=" * 60)
+
+    from portfolio import Portfolio
+
+    test_dir = tempfile.mkdtemp(prefix="test_ledger_")
+    print(f"Test directory: {test_dir}")
+
+    def state(p):
+        holdings = {symbol: (data['shares'], round(data['avg_price'], 6), round(data['current_price'], 6))
+                    for symbol, data in p.get_portfolio().items()}
+        return round(p.get_cash(), 6), holdings
+
+    failures = []
+    def check(ok, message):
+        print(f"   {'✅' if ok else '❌'} {message}")
+        if not ok:
+            failures.append(message)
+
+    opened = []
+    try:
+        # snapshot_every=2: the reopen below starts from a snapshot and replays a journal tail
+        original = Portfolio(data_dir=test_dir, snapshot_every=2, fsync=False)
+        opened.append(original)
+        original.buy("AAPL", 5, 150.00, "Test: ledger entry")
+        original.buy("MSFT", 3, 300.00, "Test: ledger entry")
+        original.sell("AAPL", 2, 155.00, "Test: ledger entry")
+        original.update_prices({"AAPL": 156.00, "MSFT": 305.00})
+        expected = state(original)
+        print(f"\n   • Expected: cash ${expected[0]:.2f}, holdings {expected[1]}")
+
+        journal = os.path.join(test_dir, "ledger.jsonl")
+        snapshot = os.path.join(test_dir, "ledger.snapshot.json")
+
+        print("\n1. REOPEN AFTER TRADES (snapshot + journal tail):")
+        reopened = Portfolio(data_dir=test_dir, fsync=False)
+        opened.append(reopened)
+        check(os.path.exists(snapshot), "Snapshot written mid-run")
+        check(state(reopened) == expected, "Reopened portfolio has the same cash and holdings")
+
+        print("\n2. TORN LAST RECORD:")
+        size = os.path.getsize(journal)
+        with open(journal, 'ab') as f:
+            f.write(b'{"type":"trade","symbol":"TSLA","act')  # crash mid-append
+        torn = Portfolio(data_dir=test_dir, fsync=False)
+        opened.append(torn)
+        check(state(torn) == expected, "Torn record ignored on replay")
+        check(os.path.getsize(journal) == size, "Torn record cut off the journal")
+
+        print("\n3. REPLAY WITHOUT SNAPSHOT (from the 'open' record):")
+        for p in opened:
+            p.close()
+        opened.clear()
+        os.remove(snapshot)
+        replayed = Portfolio(data_dir=test_dir, fsync=False)
+        opened.append(replayed)
+        check(state(replayed) == expected, "Full replay has the same cash and holdings")
+
+        print("\n4. READS SEE ANOTHER INSTANCE'S TRADES:")
+        other = Portfolio(data_dir=test_dir, fsync=False)
+        opened.append(other)
+        other.buy("GOOG", 2, 140.00, "Test: trade from another process")
+        check(round(replayed.get_cash(), 6) == round(expected[0] - 280.00, 6), "Cash reflects the other instance's buy")
+        check("GOOG" in replayed.get_portfolio(), "Holdings include the other instance's position")
+
+        print("\n5. CORRUPT RECORD MID-JOURNAL (must not truncate):")
+        for p in opened:
+            p.close()
+        opened.clear()
+        os.remove(snapshot)
+        with open(journal, 'rb') as f:
+            lines = f.readlines()
+        lines[2] = b'{"type":"trade","symbol":' + b'x' * 20 + b'\n'  # a complete but unreadable record
+        with open(journal, 'wb') as f:
+            f.writelines(lines)
+        with open(journal, 'rb') as f:
+            before = f.read()
+        from ledger import LedgerCorruptError
+        try:
+            opened.append(Portfolio(data_dir=test_dir, fsync=False))
+            check(False, "Corrupt record raises LedgerCorruptError")
+        except LedgerCorruptError as e:
+            check(True, f"Corrupt record raises LedgerCorruptError ({str(e)[:40]}...)")
+        with open(journal, 'rb') as f:
+            check(f.read() == before, "Journal left untouched, later trades kept")
+
+        if failures:
+            raise AssertionError(f"Ledger replay checks failed: {', '.join(failures)}")
+        print("\n✅ Ledger replay tests completed!")
+
+    finally:
+        for p in opened:
+            p.close()
+        shutil.rmtree(test_dir, ignore_errors=True)
+        print(f"Cleaned up test directory: {test_dir}")
+
+def test_backtester():
+    """Test backtest fills, exits and equity on a hand-built panel."""
+    print("\n\n🧪 Testing Backtester (Deterministic)...")
+    print("=" * 60)
+
+    import numpy as np
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "scripts"))
+    from backtest import Bars, run_backtest
+
+    failures = []
+    def check(ok, message):
+        print(f"   {'✅' if ok else '❌'} {message}")
+        if not ok:
+            failures.append(message)
+
+    # Two symbols, eight daily bars: (open, high, low, close) per row
+    aaa = [(100, 101, 99, 100), (100, 103, 99, 102), (104, 112, 94, 100), (100, 101, 99, 100),
+           (100, 101, 99, 100), (100, 104, 97, 103), (103, 105, 101, 104), (102, 103, 101, 102)]
+    bbb = [(50, 51, 49, 50), (50, 51, 49, 50), (50, 51, 49, 50), (50, 52, 49, 51),
+           (58, 60, 57, 59), (59, 60, 58, 59), (59, 60, 58, 59), (59, 60, 58, 59)]
+    ohlc = np.array([aaa, bbb], dtype=np.float32).transpose(2, 1, 0)  # field, row, symbol
+    arrays = dict(zip(('open', 'high', 'low', 'close'), ohlc))
+    arrays['volume'] = np.zeros_like(arrays['close'])
+    timestamps = np.arange('2025-01-01', '2025-01-09', dtype='datetime64[D]').astype('datetime64[s]')
+    bars = Bars(timestamps, ["AAA", "BBB"], arrays)
+
+    signals = np.zeros(bars.shape, dtype=np.int8)
+    signals[0, 0] = 1   # AAA entry, fills at row 1's open
+    signals[2, 1] = 1   # BBB entry, fills at row 3's open
+    signals[4, 0] = 1   # AAA re-entry, fills at row 5's open
+    signals[6, 0] = -1  # AAA exit, fills at row 7's open
+
+    result = run_backtest(bars, signals=signals, initial_capital=10000.00, max_trade_pct=None,
+                          max_position_size_pct=0.50, stop_loss_pct=0.05, take_profit_pct=0.10)
+    trades = [(t['symbol'], t['action'], t['shares'], t['price'], t['reasoning']) for t in result.trades]
+    for trade in trades:
+        print(f"   • {trade}")
+
+    print("\n1. NEXT-OPEN FILLS:")
+    check(trades[0] == ("AAA", "BUY", 50, 100.0, "Signal entry"), "Entry fills at the next bar's open, sized to 50% of equity")
+    check(trades[2] == ("BBB", "BUY", 97, 50.0, "Signal entry"), "Second entry sized from equity after the first exit")
+    check(trades[5] == ("AAA", "SELL", 52, 102.0, "Signal exit"), "Exit signal fills at the next bar's open")
+
+    print("\n2. STOP BEFORE TARGET:")
+    check(trades[1] == ("AAA", "SELL", 50, 95.0, "Stop loss (5%)"), "Bar reaching both levels exits at the stop")
+
+    print("\n3. GAP THROUGH A LEVEL:")
+    check(trades[3] == ("BBB", "SELL", 97, 58.0, "Take profit (10%)"), "Gap above the target fills at the open, not 55.00")
+    check(len(trades) == 6, "No other trades")
+
+    print("\n4. EQUITY CURVE (rebuilt from fills):")
+    expected = [10000, 10100, 9750, 9847, 10526, 10682, 10734, 10630]
+    print(f"   • Equity: {[round(float(e), 2) for e in result.equity]}")
+    check(np.allclose(result.equity, expected), "Cash plus positions at each close")
+    summary = result.summary()
+    check(round(summary['final_value'], 2) == 10630.00, "Final equity $10630.00")
+    check(round(summary['win_rate_pct'], 2) == 66.67, "Two of three closing sells won")
+
+    if failures:
+        raise AssertionError(f"Backtester checks failed: {', '.join(failures)}")
+    print("\n✅ Backtester tests completed!")
+
+def test_trade_history():
+    """Test indexed trade lookups against trades.csv."""
+    print("\n\n🧪 Testing Trade History (Deterministic)...")
+    print("=" * 60)
+
+    from trade_history import TradeHistory
+
+    test_dir = tempfile.mkdtemp(prefix="test_history_")
+    print(f"Test directory: {test_dir}")
+
+    failures = []
+    def check(ok, message):
+        print(f"   {'✅' if ok else '❌'} {message}")
+        if not ok:
+            failures.append(message)
+
+    trades_file = os.path.join(test_dir, "trades.csv")
+    rows = [
+        ("2025-01-02T10:00:00", "AAPL", "BUY", 5, 150.0, "Breakout"),
+        ("2025-01-03T10:00:00", "MSFT", "BUY", 3, 300.0, "Quoted, with a comma\nand a newline"),
+        ("2025-01-06T10:00:00", "AAPL", "SELL", 2, 155.0, "Take profit"),
+        ("2025-01-07T10:00:00", "TSLA", "BUY", 4, 200.0, "Momentum"),
+    ]
+    def write(rows, mode='w'):
+        import csv
+        with open(trades_file, mode, newline='') as f:
+            writer = csv.writer(f)
+            if mode == 'w':
+                writer.writerow(['timestamp', 'symbol', 'action', 'shares', 'price', 'reasoning'])
+            writer.writerows(rows)
+
+    history = None
+    try:
+        write(rows)
+        history = TradeHistory(trades_file)
+
+        print("\n1. RECENT TRADES:")
+        recent = history.recent(2)
+        check([t['symbol'] for t in recent] == ["AAPL", "TSLA"], "Last two trades, oldest first")
+        check(history.count() == 4, "Multi-line quoted row indexed once")
+
+        print("\n2. SYMBOL AND TIME RANGE:")
+        aapl = history.query(symbol="AAPL")
+        check([(t['action'], t['shares']) for t in aapl] == [("BUY", 5.0), ("SELL", 2.0)], "Per-symbol query")
+        window = history.query(start="2025-01-03", end="2025-01-07")
+        check([t['symbol'] for t in window] == ["MSFT", "AAPL"], "Range is start-inclusive, end-exclusive")
+        check(window[0]['reasoning'] == "Quoted, with a comma\nand a newline", "Quoted reasoning read back intact")
+
+        print("\n3. APPENDED AND REPLACED FILE:")
+        write([("2025-01-08T10:00:00", "NVDA", "BUY", 1, 500.0, "Appended")], mode='a')
+        check(history.recent(1)[0]['symbol'] == "NVDA", "Appended row picked up")
+        write(rows[:1])
+        check(history.count() == 1 and history.recent(5)[0]['symbol'] == "AAPL", "Index rebuilt after file replaced")
+
+        if failures:
+            raise AssertionError(f"Trade history checks failed: {', '.join(failures)}")
+        print("\n✅ Trade history tests completed!")
+
+    finally:
+        if history is not None:
+            history.close()
+        shutil.rmtree(test_dir, ignore_errors=True)
+        print(f"Cleaned up test directory: {test_dir}")
+
+def test_holdings():
+    """Test array-backed holdings against per-position arithmetic."""
+    print("\n\n🧪 Testing Holdings (Deterministic)...")
+    print("=" * 60)
+
+    from holdings import Holdings
+
+    failures = []
+    def check(ok, message):
+        print(f"   {'✅' if ok else '❌'} {message}")
+        if not ok:
+            failures.append(message)
+
+    holdings = Holdings({
+        "AAPL": {'shares': 5, 'avg_price': 150.0, 'current_price': 150.0},
+        "MSFT": {'shares': 3, 'avg_price': 300.0, 'current_price': 300.0},
+    }, capacity=2)
+    holdings["TSLA"] = {'shares': 4, 'avg_price': 200.0, 'current_price': 200.0}  # grows past capacity
+
+    print("\n1. BATCH MARK:")
+    changed = holdings.changed_prices(["AAPL", "MSFT", "GOOG"], [160.0, 300.0, 99.0])
+    print(f"   • Changed: {changed}")
+    check(changed == {"AAPL": 160.0}, "Only held symbols with a new price count as changed")
+    holdings.mark(["AAPL", "GOOG", "TSLA"], [160.0, 99.0, 190.0])
+    check("GOOG" not in holdings, "Quotes for symbols not held are ignored")
+    check(holdings["AAPL"]['pnl'] == 50.0 and holdings["TSLA"]['market_value'] == 760.0, "Positions marked")
+
+    print("\n2. TOTALS:")
+    totals = holdings.totals()
+    print(f"   • Totals: {totals}")
+    check(totals == {'invested': 2450.0, 'market_value': 2460.0, 'pnl': 10.0}, "Invested, market value and P&L")
+
+    print("\n3. DELETE KEEPS ROWS CONSISTENT:")
+    del holdings["AAPL"]
+    check(list(holdings) == ["TSLA", "MSFT"], "Last row moved into the hole")
+    check(holdings.to_dict()["TSLA"] == {'shares': 4.0, 'avg_price': 200.0, 'current_price': 190.0,
+                                         'market_value': 760.0, 'pnl': -40.0}, "Moved position kept its values")
+    check(holdings.totals()['pnl'] == -40.0, "Totals exclude the deleted row")
+
+    if failures:
+        raise AssertionError(f"Holdings checks failed: {', '.join(failures)}")
+    print("\n✅ Holdings tests completed!")
+
+def test_sweep_ranking():
+    """Test parameter grids and sweep result ranking."""
+    print("\n\n🧪 Testing Sweep Ranking (Deterministic)...")
+    print("=" * 60)
+
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "scripts"))
+    from sweep import grid, rank, sample
+
+    failures = []
+    def check(ok, message):
+        print(f"   {'✅' if ok else '❌'} {message}")
+        if not ok:
+            failures.append(message)
+
+    print("\n1. PARAMETER SETS:")
+    values = {'stop_loss_pct': [0.02, 0.05], 'take_profit_pct': [0.05, 0.10, 0.20]}
+    tasks = grid(values)
+    check(len(tasks) == 6 and tasks[0] == {'stop_loss_pct': 0.02, 'take_profit_pct': 0.05}, "Grid covers every combination")
+    check(sample(values, 5, seed=7) == sample(values, 5, seed=7), "Random search is repeatable for a seed")
+
+    print("\n2. RANKING:")
+    rows = [
+        {'name': 'a', 'total_return_pct': 5.0, 'max_drawdown_pct': 10.0, 'turnover': 3.0},
+        {'name': 'b', 'total_return_pct': 8.0, 'max_drawdown_pct': 20.0, 'turnover': 1.0},
+        {'name': 'c', 'total_return_pct': 3.0, 'max_drawdown_pct': 2.0, 'turnover': 2.0},
+    ]
+    for row in rows:
+        row['return_to_drawdown'] = row['total_return_pct'] / row['max_drawdown_pct']
+    order = {by: [row['name'] for row in rank(rows, by)] for by in ('return', 'drawdown', 'turnover', 'ratio')}
+    print(f"   • Orders: {order}")
+    check(order['return'] == ['b', 'a', 'c'], "Return: highest first")
+    check(order['drawdown'] == ['c', 'a', 'b'], "Drawdown: smallest first")
+    check(order['turnover'] == ['b', 'c', 'a'], "Turnover: lowest first")
+    check(order['ratio'] == ['c', 'a', 'b'], "Return/drawdown: highest first")
+
+    if failures:
+        raise AssertionError(f"Sweep ranking checks failed: {', '.join(failures)}")
+    print("\n✅ Sweep ranking tests completed!")
+
 def test_portfolio_review():
     """Test portfolio review command with guaranteed output."""
     print("\n\n🧪 Testing Portfolio Review (Deterministic)...")
@@ -484,6 +790,21 @@ def main():
         test_portfolio()
         test_results.append(("Portfolio System", "✅"))
         
+        test_ledger_replay()
+        test_results.append(("Ledger Replay", "✅"))
+        
+        test_backtester()
+        test_results.append(("Backtester", "✅"))
+        
+        test_trade_history()
+        test_results.append(("Trade History", "✅"))
+        
+        test_holdings()
+        test_results.append(("Holdings", "✅"))
+        
+        test_sweep_ranking()
+        test_results.append(("Sweep Ranking", "✅"))
+        
         test_portfolio_review()
         test_results.append(("Portfolio Review", "✅"))
         
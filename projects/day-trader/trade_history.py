@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Trade History
+Indexed, read-only access to trades.csv without reading the whole file.
+
+A sidecar SQLite index (trades.idx.sqlite) records the byte offset, length,
+timestamp and symbol of every row. The last N trades, or the trades for a
+symbol or time range, are then an index lookup plus one seek per row. The
+index catches up on rows appended since it was last used, and rebuilds
+itself if trades.csv was replaced (restored from a backup, edited by hand).
+"""
+
+import csv
+import io
+import os
+import sqlite3
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+_CHECK_BYTES = 64  # bytes before the indexed end whose CRC detects a replaced file
+
+
+class TradeHistory:
+    def __init__(self, trades_file: str, index_file: Optional[str] = None):
+        self.trades_file = trades_file
+        self.index_file = index_file or os.path.join(os.path.dirname(trades_file), "trades.idx.sqlite")
+        self._conn = sqlite3.connect(self.index_file, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("PRAGMA synchronous = NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value);
+            CREATE TABLE IF NOT EXISTS trades (
+                id INTEGER PRIMARY KEY,
+                offset INTEGER NOT NULL,
+                length INTEGER NOT NULL,
+                timestamp TEXT NOT NULL,
+                symbol TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS trades_symbol_ts ON trades (symbol, timestamp);
+            CREATE INDEX IF NOT EXISTS trades_ts ON trades (timestamp);
+        """)
+        self._fieldnames: Optional[List[str]] = None
+
+    def _meta(self, key: str, default=None):
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def _file_check(self, f, end: int) -> int:
+        start = max(0, end - _CHECK_BYTES)
+        f.seek(start)
+        return zlib.crc32(f.read(end - start))
+
+    def refresh(self) -> int:
+        """
+        Index rows appended to trades.csv since the last call.
+
+        Returns:
+            int: Number of rows added to the index
+        """
+        try:
+            size = os.path.getsize(self.trades_file)
+        except FileNotFoundError:
+            return 0
+        if size == int(self._meta('indexed_size', 0)):
+            return 0
+
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            added = self._catch_up(size)
+            self._conn.execute("COMMIT")
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        return added
+
+    def _catch_up(self, size: int) -> int:
+        indexed = int(self._meta('indexed_size', 0))  # re-read: another process may have indexed meanwhile
+        with open(self.trades_file, 'rb') as f:
+            added = 0
+            if indexed and (size < indexed or self._file_check(f, indexed) != self._meta('check')):
+                # trades.csv is not the file we indexed: start over.
+                self._conn.execute("DELETE FROM trades")
+                indexed = 0
+
+            f.seek(indexed)
+            pos = indexed
+            if pos == 0:
+                pos += len(f.readline())  # header
+            rows: List[Tuple[int, int, str, str]] = []
+            pending = b""
+            start = pos
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # partial row still being written; index it next time
+                pending += line
+                if pending.count(b'"') % 2:
+                    continue  # newline inside a quoted field
+                fields = pending.split(b",", 2)
+                if len(fields) == 3:
+                    added += 1
+                    rows.append((start, len(pending), fields[0].decode('utf-8'), fields[1].decode('utf-8')))
+                start += len(pending)
+                pending = b""
+                if len(rows) >= 10000:
+                    self._insert(rows)
+                    rows = []
+            self._insert(rows)
+            end = start
+            check = self._file_check(f, end)
+
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+            [('indexed_size', end), ('check', check)],
+        )
+        return added
+
+    def _insert(self, rows: List[Tuple[int, int, str, str]]):
+        if rows:
+            self._conn.executemany(
+                "INSERT INTO trades (offset, length, timestamp, symbol) VALUES (?, ?, ?, ?)", rows
+            )
+
+    def _read_rows(self, spans: List[Tuple[int, int]]) -> List[Dict]:
+        """Parse the CSV rows at the given (offset, length) spans, in the order given."""
+        trades = []
+        with open(self.trades_file, 'rb') as f:
+            if self._fieldnames is None:
+                self._fieldnames = next(csv.reader([f.readline().decode('utf-8')]))
+            for offset, length in spans:
+                f.seek(offset)
+                text = f.read(length).decode('utf-8')
+                for row in csv.DictReader(io.StringIO(text), fieldnames=self._fieldnames):
+                    try:
+                        trades.append({
+                            'timestamp': row['timestamp'],
+                            'symbol': row['symbol'],
+                            'action': row['action'],
+                            'shares': float(row['shares']),
+                            'price': float(row['price']),
+                            'reasoning': row['reasoning']
+                        })
+                    except (KeyError, TypeError, ValueError):
+                        pass
+        return trades
+
+    def recent(self, limit: int = 10) -> List[Dict]:
+        """Last `limit` trades, oldest first (as get_recent_trades always returned them)."""
+        self.refresh()
+        spans = self._conn.execute(
+            "SELECT offset, length FROM trades ORDER BY id DESC LIMIT ?", (limit,)
+        ).fetchall()
+        return self._read_rows(spans[::-1])
+
+    def query(self, symbol: Optional[str] = None, start: Optional[str] = None,
+              end: Optional[str] = None, limit: Optional[int] = None) -> List[Dict]:
+        """
+        Trades matching a symbol and/or time range, oldest first.
+
+        Args:
+            symbol: Only this symbol
+            start: Only trades at or after this ISO timestamp
+            end: Only trades before this ISO timestamp
+            limit: Keep only the most recent `limit` matches
+
+        Returns:
+            List of trade dicts
+        """
+        self.refresh()
+        where, params = [], []
+        if symbol is not None:
+            where.append("symbol = ?")
+            params.append(symbol)
+        if start is not None:
+            where.append("timestamp >= ?")
+            params.append(start)
+        if end is not None:
+            where.append("timestamp < ?")
+            params.append(end)
+        sql = "SELECT offset, length FROM trades"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY timestamp DESC, id DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        spans = self._conn.execute(sql, params).fetchall()
+        return self._read_rows(spans[::-1])
+
+    def count(self) -> int:
+        """Number of indexed trades."""
+        self.refresh()
+        return self._conn.execute("SELECT COUNT(*) FROM trades").fetchone()[0]
+
+    def close(self):
+        self._conn.close()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""Benchmark per-item vs bulk application of gettrackinfo results.
+
+Builds a synthetic track17 DB with N packages in a temp directory, then applies
+one full "sync" worth of gettrackinfo items twice:
+
+  per-item : one keyed SELECT + apply_update_from_trackinfo (commit per package)
+  bulk     : _apply_sync_chunk per 40-item chunk (one query, executemany, one commit)
+
+Usage:
+  python3 skills/track17/benchmarks/bench_apply.py [--packages 10000] [--events 4]
+"""
+
+from __future__ import annotations
+
+import argparse
+import pathlib
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "scripts"))
+
+import track17  # noqa: E402
+
+
+def synth_item(number: str, carrier: int, n_events: int, rev: int) -> dict:
+    events = [
+        {
+            "time_utc": f"2026-01-{1 + (i % 28):02d}T{rev % 24:02d}:00:00Z",
+            "description": f"Scan {i} rev {rev}",
+            "location": {"city": "Hub", "country": "CN"},
+            "stage": "InTransit",
+        }
+        for i in range(n_events)
+    ]
+    return {
+        "number": number,
+        "carrier": carrier,
+        "tracking_status": "Tracking",
+        "package_status": "InTransit",
+        "track_info": {
+            "latest_status": {"status": "InTransit", "sub_status": "InTransit_Other"},
+            "latest_event": events[0] if events else {},
+            "tracking": {"providers": [{"key": carrier, "events": events}]},
+        },
+    }
+
+
+def build_db(path: pathlib.Path, n: int) -> None:
+    conn = track17.connect_db(path)
+    track17.init_db(conn)
+    now = track17._utc_now_iso()
+    conn.executemany(
+        "INSERT INTO packages (created_at, updated_at, number, carrier) VALUES (?, ?, ?, ?)",
+        [(now, now, f"BENCH{i:08d}", 3011) for i in range(n)],
+    )
+    conn.commit()
+    conn.close()
+
+
+def run_per_item(conn, items) -> None:
+    for acc in items:
+        pkg = conn.execute(
+            "SELECT * FROM packages WHERE number=? AND carrier=? ORDER BY id DESC LIMIT 1",
+            (acc["number"], acc["carrier"]),
+        ).fetchone()
+        track17.apply_update_from_trackinfo(
+            conn, package_row=pkg, response_item=acc, raw_payload_sha=track17._payload_sha_for_item(acc), source="poll"
+        )
+
+
+def run_bulk(conn, items) -> None:
+    for i in range(0, len(items), 40):
+        track17._apply_sync_chunk(conn, items[i : i + 40])
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--packages", type=int, default=10000)
+    ap.add_argument("--events", type=int, default=4, help="Events per package per sync")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="track17-bench-") as tmp:
+        for rev, (name, fn) in enumerate([("per-item", run_per_item), ("bulk", run_bulk)]):
+            db = pathlib.Path(tmp) / f"{name}.sqlite3"
+            build_db(db, args.packages)
+            items = [synth_item(f"BENCH{i:08d}", 3011, args.events, rev) for i in range(args.packages)]
+            conn = track17.connect_db(db)
+            t0 = time.perf_counter()
+            fn(conn, items)
+            elapsed = time.perf_counter() - t0
+            n_events = conn.execute("SELECT COUNT(*) FROM events").fetchone()[0]
+            conn.close()
+            print(
+                f"{name:<9} {args.packages} packages, {n_events} events in {elapsed:.2f}s: "
+                f"{args.packages / elapsed:,.0f} packages/s, {(args.packages + n_events) / elapsed:,.0f} rows/s"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
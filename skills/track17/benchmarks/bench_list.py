@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""Time `track17 list` and `track17 status` as fresh processes.
+
+Builds a synthetic track17 DB with N packages (E events each) in a temp
+directory, then runs the CLI --repeat times per command, each in a new Python
+process as cron/the agent would. Reports min/p50/max wall time and an
+in-process breakdown of one `list` (open_db, query, output).
+
+Exits 1 if the p50 of `list` is above --target-ms, so it can gate changes.
+
+Usage:
+  python3 skills/track17/benchmarks/bench_list.py [--packages 10000] [--events 4] [--target-ms 100]
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import os
+import pathlib
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+SCRIPT = pathlib.Path(__file__).resolve().parents[1] / "scripts" / "track17.py"
+sys.path.insert(0, str(SCRIPT.parent))
+
+
+def build_db(data_dir: pathlib.Path, packages: int, events: int) -> None:
+    import track17
+
+    os.environ["TRACK17_DATA_DIR"] = str(data_dir)
+    p = track17.ensure_dirs()
+    conn = track17.connect_db(p["db"])
+    track17.init_db(conn)
+    now = track17._utc_now_iso()
+    conn.executemany(
+        """
+        INSERT INTO packages (created_at, updated_at, label, number, carrier, last_status, last_event_time_utc, last_event_desc)
+        VALUES (?, ?, ?, ?, 3011, 'InTransit', '2026-01-20T10:00:00Z', 'Departed from sorting center')
+        """,
+        [(now, now, f"Order {i}", f"BENCH{i:08d}") for i in range(packages)],
+    )
+    conn.executemany(
+        """
+        INSERT INTO events (package_id, time_utc, description, location, location_text, event_hash, created_at)
+        VALUES (?, ?, 'Arrived at hub', '{"city":"Leipzig","country":"DE"}', 'Leipzig', ?, ?)
+        """,
+        [(i, f"2026-01-{1 + j:02d}T10:00:00Z", f"h{i}-{j}", now) for i in range(1, packages + 1) for j in range(events)],
+    )
+    conn.commit()
+    conn.close()
+
+
+def time_cli(args: list, repeat: int, env: dict) -> list:
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        subprocess.run([sys.executable, str(SCRIPT), *args], env=env, stdout=subprocess.DEVNULL, check=True)
+        samples.append(time.perf_counter() - t0)
+    return samples
+
+
+def breakdown() -> str:
+    import track17
+
+    t0 = time.perf_counter()
+    conn = track17.open_db(track17.paths())
+    t1 = time.perf_counter()
+    cur = conn.cursor()
+    cur.row_factory = None
+    lines = [r[0] for r in cur.execute(track17.SQL_LIST_LINES_ACTIVE)]
+    t2 = time.perf_counter()
+    io.StringIO().write("\n".join(lines) + "\n")
+    t3 = time.perf_counter()
+    return f"open_db {1000 * (t1 - t0):.1f} ms, query {1000 * (t2 - t1):.1f} ms, output {1000 * (t3 - t2):.1f} ms"
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--packages", type=int, default=10000)
+    ap.add_argument("--events", type=int, default=4, help="Events per package")
+    ap.add_argument("--repeat", type=int, default=15)
+    ap.add_argument("--target-ms", type=float, default=100.0, help="Fail if `list` p50 exceeds this")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="track17-bench-") as tmp:
+        data_dir = pathlib.Path(tmp)
+        build_db(data_dir, args.packages, args.events)
+        env = dict(os.environ, TRACK17_DATA_DIR=str(data_dir))
+
+        baseline = statistics.median(time_cli(["--help"], args.repeat, env))
+        print(f"{'--help':<18} p50 {1000 * baseline:6.1f} ms (interpreter + module start-up)")
+        p50_list = 0.0
+        for cmd in (["list"], ["list", "--all"], ["status", str(args.packages // 2)]):
+            samples = time_cli(cmd, args.repeat, env)
+            p50 = statistics.median(samples)
+            if cmd == ["list"]:
+                p50_list = p50
+            print(
+                f"{' '.join(cmd):<18} p50 {1000 * p50:6.1f} ms  min {1000 * min(samples):6.1f} ms  "
+                f"max {1000 * max(samples):6.1f} ms  ({args.packages} packages)"
+            )
+        print(f"list breakdown     {breakdown()}")
+
+    ok = 1000 * p50_list <= args.target_ms
+    print(f"list p50 {1000 * p50_list:.1f} ms {'<=' if ok else '>'} target {args.target_ms:g} ms")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
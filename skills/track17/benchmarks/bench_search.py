@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""Benchmark the events full-text index (`track17 search`).
+
+Builds a synthetic track17 DB with N packages x E events in a temp directory
+(descriptions and locations drawn from a small carrier-like vocabulary), then
+measures:
+
+  build   : ensure_search_index() backfilling events_fts from scratch
+  apply   : _apply_sync_chunk throughput with the index triggers vs without
+  queries : p50/p99 latency of typical searches, repeated --repeat times
+
+Usage:
+  python3 skills/track17/benchmarks/bench_search.py [--packages 20000] [--events 50] [--repeat 20]
+"""
+
+from __future__ import annotations
+
+import argparse
+import pathlib
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "scripts"))
+
+import track17  # noqa: E402
+
+DESCRIPTIONS = [
+    "Shipment information received",
+    "Accepted at origin facility",
+    "Departed from sorting center",
+    "Arrived at hub",
+    "Held at customs",
+    "Customs clearance completed",
+    "In transit to next facility",
+    "Out for delivery",
+    "Delivery attempted, recipient not available",
+    "Delivered, left at front door",
+]
+CITIES = ["Shenzhen", "Guangzhou", "Frankfurt", "Leipzig", "Toronto", "Mississauga", "Chicago", "Louisville"]
+
+QUERIES = [
+    ("customs", {}),
+    ("customs frankfurt", {}),
+    ("deliv*", {}),
+    ("hub", {"since": "2026-01-20T00:00:00Z"}),
+    ("customs", {"by_package": True}),
+    ("toronto", {"sort": "time"}),
+]
+
+
+def build_db(path: pathlib.Path, packages: int, events: int, seed: int = 1) -> int:
+    rng = random.Random(seed)
+    conn = track17.connect_db(path)
+    track17.init_db(conn)
+    now = track17._utc_now_iso()
+    conn.executemany(
+        "INSERT INTO packages (created_at, updated_at, label, number, carrier) VALUES (?, ?, ?, ?, ?)",
+        [(now, now, f"Order {i}", f"BENCH{i:08d}", 3011) for i in range(packages)],
+    )
+    rows = []
+    total = 0
+    for pkg_id in range(1, packages + 1):
+        for j in range(events):
+            city = rng.choice(CITIES)
+            loc = f'{{"city":"{city}","country":"XX"}}' if j % 2 else city
+            t = f"2026-01-{1 + j % 28:02d}T{rng.randrange(24):02d}:00:00Z"
+            rows.append((pkg_id, t, rng.choice(DESCRIPTIONS), loc, f"h{pkg_id}-{j}", now))
+        if len(rows) >= 50000:
+            conn.executemany(
+                "INSERT INTO events (package_id, time_utc, description, location, event_hash, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            total += len(rows)
+            rows = []
+    if rows:
+        conn.executemany(
+            "INSERT INTO events (package_id, time_utc, description, location, event_hash, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+        total += len(rows)
+    conn.commit()
+    conn.close()
+    return total
+
+
+def synth_items(packages: int, n: int, rev: int) -> list:
+    items = []
+    for i in range(min(n, packages)):
+        events = [{"time_utc": f"2026-02-01T{rev:02d}:{k:02d}:00Z", "description": f"Scan {k} rev {rev}", "location": "Hub"} for k in range(4)]
+        items.append(
+            {
+                "number": f"BENCH{i:08d}",
+                "carrier": 3011,
+                "tracking_status": "Tracking",
+                "track_info": {"latest_event": events[0], "tracking": {"providers": [{"key": 3011, "events": events}]}},
+            }
+        )
+    return items
+
+
+def time_apply(conn, items) -> float:
+    t0 = time.perf_counter()
+    for i in range(0, len(items), 40):
+        track17._apply_sync_chunk(conn, items[i : i + 40])
+    return time.perf_counter() - t0
+
+
+def pct(samples: list, q: float) -> float:
+    s = sorted(samples)
+    return s[min(len(s) - 1, int(q * len(s)))]
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--packages", type=int, default=20000)
+    ap.add_argument("--events", type=int, default=50, help="Events per package")
+    ap.add_argument("--apply", type=int, default=2000, help="Packages updated in the apply comparison")
+    ap.add_argument("--repeat", type=int, default=20, help="Runs per query")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="track17-bench-") as tmp:
+        plain = pathlib.Path(tmp) / "plain.sqlite3"
+        t0 = time.perf_counter()
+        n_events = build_db(plain, args.packages, args.events)
+        print(f"synthetic DB: {args.packages} packages, {n_events:,} events in {time.perf_counter() - t0:.1f}s")
+
+        indexed = pathlib.Path(tmp) / "indexed.sqlite3"
+        shutil.copy(plain, indexed)
+        conn = track17.connect_db(indexed)
+        built = track17.ensure_search_index(conn)
+        assert built is not None
+        print(f"build     events_fts backfill: {built:.2f}s ({n_events / built:,.0f} events/s)")
+
+        base = track17.connect_db(plain)
+        for name, c in (("no index", base), ("indexed", conn)):
+            elapsed = time_apply(c, synth_items(args.packages, args.apply, rev=1))
+            print(f"apply     {name:<9} {args.apply} packages (+4 events each): {args.apply / elapsed:,.0f} packages/s")
+        base.close()
+
+        for text, opts in QUERIES:
+            q = track17.fts_query(text)
+            samples = []
+            for _ in range(args.repeat):
+                t0 = time.perf_counter()
+                rows = track17.search_events(conn, q, **opts)
+                samples.append(time.perf_counter() - t0)
+            label = text + "".join(f" {k}={v}" for k, v in opts.items())
+            print(
+                f"query     {label:<42} {len(rows):>3} row(s)  "
+                f"p50 {1000 * pct(samples, 0.5):7.2f} ms  p99 {1000 * pct(samples, 0.99):7.2f} ms"
+            )
+        conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""Webhook ingest throughput vs. shard count (TRACK17_SHARDS).
+
+Generates --payloads synthetic TRACKING_UPDATED payloads for distinct tracking
+numbers. For each shard count it loads them once into a fresh data dir (first
+sight of a number: the router probes every shard before creating it), then
+starts --writers processes that concurrently ingest a second update for every
+package through ShardRouter.ingest. With one shard every writer queues on the
+same SQLite write lock; with more, writers mostly land on different files.
+
+Reports payloads/s and the p50/p99 latency of a single ingest (lock waits
+show up in p99). With the default synchronous=NORMAL a commit is CPU work, so
+throughput scales with shards only as far as there are cores to run the
+writers. With --synchronous FULL every commit holds the write lock across an
+fsync, and shards overlap those waits even on one core.
+
+Usage:
+  python3 skills/track17/benchmarks/bench_shards.py [--payloads 8000] [--writers 4] [--shards 1,2,4,8] [--synchronous FULL]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing as mp
+import os
+import pathlib
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "scripts"))
+
+import track17  # noqa: E402
+
+
+def payload(i: int, rev: int) -> bytes:
+    events = [
+        {"time_utc": f"2026-02-0{rev}T{k:02d}:00:00Z", "description": f"Scan {k} rev {rev}", "location": "Leipzig"}
+        for k in range(3)
+    ]
+    return json.dumps(
+        {
+            "event": "TRACKING_UPDATED",
+            "data": {
+                "number": f"BENCH{i:08d}",
+                "carrier": 3011,
+                "tag": f"tenant{i % 16}",
+                "track_info": {
+                    "latest_status": {"status": "InTransit"},
+                    "latest_event": events[-1],
+                    "tracking": {"providers": [{"key": 3011, "events": events}]},
+                },
+            },
+        }
+    ).encode("utf-8")
+
+
+def writer(shards: int, bodies: list, synchronous: str, start, out) -> None:
+    router = track17.ShardRouter(track17.paths(), count=shards)
+    for s in router.shards:
+        router.conn(s).execute(f"PRAGMA synchronous = {synchronous}")
+    lat = []
+    start.wait()
+    for body in bodies:
+        t0 = time.perf_counter()
+        router.ingest(raw_body=body, headers={}, source="webhook", secret=None)
+        lat.append(time.perf_counter() - t0)
+    router.close()
+    out.put(lat)
+
+
+def run(shards: int, first: list, bodies: list, writers: int, synchronous: str) -> tuple:
+    with tempfile.TemporaryDirectory(prefix="track17-bench-") as tmp:
+        os.environ["TRACK17_DATA_DIR"] = tmp
+        router = track17.ShardRouter(track17.ensure_dirs(), count=shards)
+        t0 = time.perf_counter()
+        for body in first:
+            router.ingest(raw_body=body, headers={}, source="webhook", secret=None)
+        load = len(first) / (time.perf_counter() - t0)
+        router.close()
+
+        ctx = mp.get_context("fork")
+        start, out = ctx.Event(), ctx.Queue()
+        procs = [ctx.Process(target=writer, args=(shards, bodies[w::writers], synchronous, start, out)) for w in range(writers)]
+        for p in procs:
+            p.start()
+        time.sleep(0.2)
+        t0 = time.perf_counter()
+        start.set()
+        lat = [x for _ in procs for x in out.get()]
+        for p in procs:
+            p.join()
+        elapsed = time.perf_counter() - t0
+    lat.sort()
+    return load, elapsed, lat[len(lat) // 2], lat[min(len(lat) - 1, int(0.99 * len(lat)))]
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--payloads", type=int, default=8000)
+    ap.add_argument("--writers", type=int, default=4, help="Concurrent ingest processes")
+    ap.add_argument("--shards", default="1,2,4,8", help="Comma-separated shard counts to compare")
+    ap.add_argument("--synchronous", choices=["NORMAL", "FULL"], default="NORMAL", help="Writers' PRAGMA synchronous")
+    args = ap.parse_args()
+
+    first = [payload(i, 1) for i in range(args.payloads)]
+    bodies = [payload(i, 2) for i in range(args.payloads)]
+    print(
+        f"{args.payloads} packages, {args.writers} writer process(es), synchronous={args.synchronous}, "
+        f"{os.cpu_count()} CPU(s)"
+    )
+    base = None
+    for n in (int(x) for x in args.shards.split(",")):
+        load, elapsed, p50, p99 = run(n, first, bodies, args.writers, args.synchronous)
+        rate = args.payloads / elapsed
+        base = base or rate
+        print(
+            f"shards {n:<3} new numbers {load:7,.0f}/s (1 writer) | updates {rate:8,.0f} payloads/s (x{rate / base:.2f})  "
+            f"ingest p50 {1000 * p50:6.2f} ms  p99 {1000 * p99:7.2f} ms"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""Replayable end-to-end benchmark of the track17 ingest and sync paths.
+
+For each --sizes N it starts from an empty data dir, points track17 at the
+local fake API (fake17track.FakeApi) and runs these phases:
+
+  import   : import_packages() of N numbers, registering them with the fake API
+  sync     : `track17 sync --parallel P` of all N packages, one new event per
+             provider each (latency = one gettrackinfo chunk of 40 applied)
+  ingest   : ingest_payload() of --ops TRACKING_UPDATED payloads spread over
+             the N packages, with a PayloadSeenCache as the worker uses
+  apply    : apply_update_from_trackinfo() of --ops gettrackinfo items
+  webhook  : --ops POSTs from --clients threads to a WebhookServer spooling
+             into a SpoolQueue (receive + spool only, no ingest)
+
+Each phase reports ops, seconds, ops/s, p50/p99/max latency (ms) and the size of
+the main DB (+ WAL) afterwards. Payloads are deterministic (same sizes and
+options produce the same data), so runs are comparable over time.
+
+Results go to stdout or --output as JSON. With --compare OLD.json, throughput
+is compared phase by phase and the exit status is 1 if any phase is slower
+than OLD by more than --tolerance (default 20%).
+
+Usage:
+  python3 skills/track17/benchmarks/bench_suite.py [--sizes 1000,10000,100000] [--providers 2] [--events 8]
+      [--ops 2000] [--parallel 4] [--clients 8] [--output results.json] [--compare baseline.json]
+"""
+
+from __future__ import annotations
+
+import argparse
+import concurrent.futures
+import contextlib
+import datetime as _dt
+import http.client
+import io
+import json
+import os
+import pathlib
+import platform
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+HERE = pathlib.Path(__file__).resolve().parent
+sys.path.insert(0, str(HERE.parents[0] / "scripts"))
+sys.path.insert(0, str(HERE))
+
+import fake17track  # noqa: E402
+import track17  # noqa: E402
+
+PHASES = ("import", "sync", "ingest", "apply", "webhook")
+
+
+def pct(samples: list, q: float) -> float:
+    s = sorted(samples)
+    return s[min(len(s) - 1, int(q * len(s)))] if s else 0.0
+
+
+def db_bytes(p: dict) -> int:
+    return sum(f.stat().st_size for f in (p["db"], p["db"].with_name(p["db"].name + "-wal")) if f.exists())
+
+
+def result(ops: int, seconds: float, latencies: list, p: dict) -> dict:
+    return {
+        "ops": ops,
+        "seconds": round(seconds, 4),
+        "ops_per_s": round(ops / seconds, 1) if seconds > 0 else 0.0,
+        "p50_ms": round(1000 * pct(latencies, 0.5), 3),
+        "p99_ms": round(1000 * pct(latencies, 0.99), 3),
+        "max_ms": round(1000 * max(latencies, default=0.0), 3),
+        "db_bytes": db_bytes(p),
+    }
+
+
+def sample(size: int, ops: int) -> list:
+    """`ops` package indexes spread evenly over 0..size-1."""
+
+    n = min(ops, size)
+    return [i * size // n for i in range(n)]
+
+
+def phase_import(p: dict, size: int, batch: int) -> dict:
+    records = ((i + 1, {"number": fake17track.number_for(i), "carrier": 3011, "label": f"Order {i}"}) for i in range(size))
+    conn = track17.open_db(p)
+    lat = []
+    real = track17._register_items
+
+    def timed(*a, **kw):
+        t0 = time.perf_counter()
+        try:
+            return real(*a, **kw)
+        finally:
+            lat.append(time.perf_counter() - t0)
+
+    track17._register_items = timed
+    try:
+        t0 = time.perf_counter()
+        stats = track17.import_packages(conn, records, register=True, batch_size=batch)
+        elapsed = time.perf_counter() - t0
+    finally:
+        track17._register_items = real
+        conn.close()
+    if stats["registered"] != size:
+        raise SystemExit(f"import registered {stats['registered']} of {size}: {stats}")
+    return result(size, elapsed, lat, p)
+
+
+def phase_sync(p: dict, size: int, parallel: int) -> dict:
+    lat = []
+    real = track17._apply_sync_chunk
+
+    def timed(conn, accepted):
+        t0 = time.perf_counter()
+        try:
+            return real(conn, accepted)
+        finally:
+            lat.append(time.perf_counter() - t0)
+
+    track17._apply_sync_chunk = timed
+    try:
+        t0 = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            rc = track17.main(["sync", "--parallel", str(parallel)])
+        elapsed = time.perf_counter() - t0
+    finally:
+        track17._apply_sync_chunk = real
+    if rc != 0:
+        raise SystemExit(f"sync exited {rc}")
+    return result(size, elapsed, lat, p)
+
+
+def phase_ingest(p: dict, idx: list, opts: dict) -> dict:
+    bodies = [fake17track.webhook_payload(fake17track.number_for(i), **opts) for i in idx]
+    conn = track17.open_db(p)
+    seen = track17.PayloadSeenCache(conn)
+    lat = []
+    t0 = time.perf_counter()
+    for body in bodies:
+        t1 = time.perf_counter()
+        track17.ingest_payload(conn, raw_body=body, headers={}, source="webhook", secret=None, seen=seen)
+        lat.append(time.perf_counter() - t1)
+    elapsed = time.perf_counter() - t0
+    conn.close()
+    return result(len(bodies), elapsed, lat, p)
+
+
+def phase_apply(p: dict, idx: list, opts: dict) -> dict:
+    items = [fake17track.tracking_item(fake17track.number_for(i), **opts) for i in idx]
+    conn = track17.open_db(p)
+    rows = [track17.find_package(conn, it["number"]) for it in items]
+    lat = []
+    t0 = time.perf_counter()
+    for row, item in zip(rows, items):
+        t1 = time.perf_counter()
+        track17.apply_update_from_trackinfo(conn, package_row=row, response_item=item, raw_payload_sha=None, source="bench")
+        lat.append(time.perf_counter() - t1)
+    elapsed = time.perf_counter() - t0
+    conn.close()
+    return result(len(items), elapsed, lat, p)
+
+
+def phase_webhook(p: dict, idx: list, opts: dict, clients: int) -> dict:
+    bodies = [fake17track.webhook_payload(fake17track.number_for(i), **opts) for i in idx]
+    queue = track17.SpoolQueue(p["base"] / "bench-spool.sqlite3", max_items=len(bodies) + 1)
+    server = track17.WebhookServer(("127.0.0.1", 0), track17._WebhookHandler, inbox_dir=p["inbox"], queue=queue)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address[:2]
+
+    def post(body: bytes) -> float:
+        t0 = time.perf_counter()
+        conn = http.client.HTTPConnection(host, port, timeout=30)
+        conn.request("POST", "/", body=body, headers={"Content-Type": "application/json"})
+        resp = conn.getresponse()
+        resp.read()
+        conn.close()
+        if resp.status != 200:
+            raise RuntimeError(f"webhook answered {resp.status}")
+        return time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=clients) as pool:
+        lat = list(pool.map(post, bodies))
+    elapsed = time.perf_counter() - t0
+    server.shutdown()
+    server.server_close()
+    out = result(len(bodies), elapsed, lat, p)
+    out["spooled"] = queue.depth()
+    queue.close()
+    return out
+
+
+def run_size(size: int, args: argparse.Namespace, api: fake17track.FakeApi) -> dict:
+    with tempfile.TemporaryDirectory(prefix="track17-bench-") as tmp:
+        os.environ["TRACK17_DATA_DIR"] = tmp
+        # The budget DB lives in the data dir: start a fresh one per size.
+        track17._BUDGET = track17.ApiBudget()
+        p = track17.ensure_dirs()
+        track17.open_db(p).close()
+        idx = sample(size, args.ops)
+        opts = {"providers": args.providers, "events": args.events}
+        out = {}
+
+        api.revision = 0
+        out["import"] = phase_import(p, size, 40)
+        print(f"  import  {size} packages", file=sys.stderr)
+        api.revision = 1
+        out["sync"] = phase_sync(p, size, args.parallel)
+        print(f"  sync    {size} packages", file=sys.stderr)
+        out["ingest"] = phase_ingest(p, idx, dict(opts, revision=2))
+        out["apply"] = phase_apply(p, idx, dict(opts, revision=3))
+        out["webhook"] = phase_webhook(p, idx, dict(opts, revision=4), args.clients)
+        with contextlib.closing(track17.open_db(p)) as conn:
+            counts = {t: conn.execute(f"SELECT COUNT(*) FROM {t}").fetchone()[0] for t in ("packages", "events", "payloads", "changes")}
+        out["rows"] = counts
+        out["db_bytes_per_package"] = round(db_bytes(p) / size, 1)
+        track17._BUDGET = track17.ApiBudget()
+    return out
+
+
+def compare(old: dict, new: dict, tolerance: float) -> int:
+    worst = 0
+    for size, phases in new["results"].items():
+        before = old.get("results", {}).get(size)
+        if not before:
+            continue
+        for name in PHASES:
+            a, b = before.get(name, {}).get("ops_per_s"), phases.get(name, {}).get("ops_per_s")
+            if not a or b is None:
+                continue
+            change = b / a - 1
+            flag = "REGRESSION" if change < -tolerance else ""
+            worst = 1 if flag else worst
+            print(f"{size:>7} {name:<8} {a:>10,.0f} -> {b:>10,.0f} ops/s  {100 * change:+6.1f}%  {flag}", file=sys.stderr)
+    return worst
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--sizes", default="1000,10000,100000", help="Comma-separated package counts")
+    ap.add_argument("--providers", type=int, default=2, help="Providers per package")
+    ap.add_argument("--events", type=int, default=8, help="Events per provider at registration")
+    ap.add_argument("--ops", type=int, default=2000, help="Payloads per ingest/apply/webhook phase")
+    ap.add_argument("--parallel", type=int, default=4, help="sync --parallel")
+    ap.add_argument("--clients", type=int, default=8, help="Concurrent webhook senders")
+    ap.add_argument("--latency-ms", type=float, default=0.0, help="Fake API response delay")
+    ap.add_argument("-o", "--output", help="Write results JSON here (default: stdout)")
+    ap.add_argument("--compare", metavar="OLD_JSON", help="Compare ops/s against an earlier run")
+    ap.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown for --compare (fraction)")
+    args = ap.parse_args()
+
+    os.environ["TRACK17_TOKEN"] = "bench"
+    os.environ["TRACK17_RATE_LIMIT"] = "0"
+    os.environ.pop("TRACK17_SHARDS", None)
+    os.environ.pop("TRACK17_SHARD", None)
+    api = fake17track.FakeApi(providers=args.providers, events=args.events, latency=args.latency_ms / 1000).start()
+    track17.API_BASE = api.url
+
+    sizes = [int(x) for x in args.sizes.split(",") if x.strip()]
+    report = {
+        "meta": {
+            "created_at": _dt.datetime.now(tz=_dt.timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "schema_version": track17.SCHEMA_VERSION,
+            "args": {k: v for k, v in vars(args).items() if k not in ("output", "compare")},
+        },
+        "results": {},
+    }
+    try:
+        for size in sizes:
+            print(f"size {size} ...", file=sys.stderr)
+            report["results"][str(size)] = run_size(size, args, api)
+    finally:
+        api.stop()
+    report["meta"]["fake_api_calls"] = dict(api.calls)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        pathlib.Path(args.output).write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+
+    if args.compare:
+        old = json.loads(pathlib.Path(args.compare).read_text(encoding="utf-8"))
+        return compare(old, report, args.tolerance)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
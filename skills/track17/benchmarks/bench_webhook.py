@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""Load-test the threaded and asyncio webhook receivers on localhost.
+
+Starts each receiver in-process on an ephemeral port (spooling into a temp
+SQLite queue), fires --requests POSTs from --concurrency client connections
+(one request per connection, like most webhook providers) and reports
+requests/second plus the receiver-side counters.
+
+Usage:
+  python3 skills/track17/benchmarks/bench_webhook.py [--requests 5000] [--concurrency 50]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import pathlib
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "scripts"))
+
+import track17  # noqa: E402
+
+
+def make_body(i: int) -> bytes:
+    return json.dumps(
+        {
+            "event": "TRACKING_UPDATED",
+            "data": {"number": f"BENCH{i:08d}", "carrier": 3011, "track_info": {"latest_status": {"status": "InTransit"}}},
+        }
+    ).encode("utf-8")
+
+
+async def fire(port: int, n: int, concurrency: int) -> tuple:
+    bodies = [make_body(i) for i in range(n)]
+    codes: dict = {}
+    next_i = 0
+
+    async def one(body: bytes) -> None:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(
+            b"POST / HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\nConnection: close\r\n"
+            + f"Content-Length: {len(body)}\r\n\r\n".encode()
+            + body
+        )
+        await writer.drain()
+        status = (await reader.readline()).split()[1].decode()
+        await reader.read()
+        writer.close()
+        codes[status] = codes.get(status, 0) + 1
+
+    async def client() -> None:
+        nonlocal next_i
+        while next_i < n:
+            i = next_i
+            next_i += 1
+            await one(bodies[i])
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return time.perf_counter() - t0, codes
+
+
+def bench_threaded(tmp: pathlib.Path, args) -> None:
+    queue = track17.SpoolQueue(tmp / "threaded.sqlite3", max_items=10**9)
+    httpd = track17.WebhookServer(
+        ("127.0.0.1", 0), track17._WebhookHandler, inbox_dir=tmp, max_files=10**9, queue=queue
+    )
+    t = threading.Thread(target=httpd.serve_forever, daemon=True)
+    t.start()
+    elapsed, codes = asyncio.run(fire(httpd.server_address[1], args.requests, args.concurrency))
+    httpd.shutdown()
+    httpd.server_close()
+    print(f"threaded  {args.requests / elapsed:8,.0f} req/s  ({elapsed:.2f}s, status {codes}, spooled {queue.depth()})")
+    queue.close()
+
+
+def bench_async(tmp: pathlib.Path, args) -> None:
+    queue = track17.SpoolQueue(tmp / "async.sqlite3", max_items=10**9)
+    srv = track17.AsyncWebhookServer(inbox_dir=tmp, queue=queue, max_files=10**9, max_pending=args.max_pending)
+
+    async def run() -> tuple:
+        started = asyncio.Event()
+        port_box: list = []
+
+        def ready(server) -> None:
+            port_box.append(server.sockets[0].getsockname()[1])
+            started.set()
+
+        task = asyncio.create_task(srv.serve("127.0.0.1", 0, ready=ready))
+        await started.wait()
+        result = await fire(port_box[0], args.requests, args.concurrency)
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        return result
+
+    elapsed, codes = asyncio.run(run())
+    st = srv.snapshot()
+    print(
+        f"asyncio   {args.requests / elapsed:8,.0f} req/s  ({elapsed:.2f}s, status {codes}, spooled {queue.depth()}, "
+        f"max depth {st['max_depth']}, dropped {st['dropped']}, "
+        f"enqueue latency avg {st['enqueue_latency_avg'] * 1000:.1f}ms / max {st['enqueue_latency_max'] * 1000:.1f}ms)"
+    )
+    queue.close()
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--requests", type=int, default=5000)
+    ap.add_argument("--concurrency", type=int, default=50)
+    ap.add_argument("--max-pending", type=int, default=1000, help="asyncio receiver queue bound")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="track17-bench-") as tmp:
+        bench_threaded(pathlib.Path(tmp), args)
+        bench_async(pathlib.Path(tmp), args)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""Synthetic 17TRACK data and a local fake of the v2.2 API, for benchmarks.
+
+Payloads are replayable: a package's events depend only on its number and
+event index, so the same (number, revision) always produces the same JSON, and
+each revision adds one newer event per provider. That gives sync and ingest
+realistic work: mostly known events plus a few new ones.
+
+As a module:
+  tracking_item(number, ...)     gettrackinfo `accepted` item / webhook `data`
+  webhook_payload(number, ...)   TRACKING_UPDATED body (bytes)
+  FakeApi(...).start()           threaded HTTP server for register / gettrackinfo
+                                 / getquota (and stoptrack, retrack, ... accepting all)
+
+As a script:
+  python3 skills/track17/benchmarks/fake17track.py serve [--port 8790] [--providers 2] [--events 8] [--latency-ms 0]
+  python3 skills/track17/benchmarks/fake17track.py payloads --count 1000 [--revision 1] -o payloads.ndjson
+
+Point track17 at the fake with TRACK17_API_BASE=http://127.0.0.1:8790/track/v2.2
+(any TRACK17_TOKEN works). Numbers starting with BAD are rejected by register.
+"""
+
+from __future__ import annotations
+
+import argparse
+import collections
+import datetime as _dt
+import http.server
+import json
+import random
+import sys
+import threading
+import time
+import zlib
+from typing import Any, Dict, List, Optional
+
+# (stage, description) in delivery order.
+_STAGES = [
+    ("InfoReceived", "Shipment information received"),
+    ("PickedUp", "Accepted at origin facility"),
+    ("Departure", "Departed from sorting center"),
+    ("InTransit", "In transit to next facility"),
+    ("Arrival", "Arrived at hub"),
+    ("Customs", "Held at customs"),
+    ("Customs", "Customs clearance completed"),
+    ("InTransit", "Departed from transit hub"),
+    ("Arrival", "Arrived at destination facility"),
+    ("OutForDelivery", "Out for delivery"),
+]
+_DELIVERED = ("Delivered", "Delivered, left at front door")
+_CITIES = [
+    ("Shenzhen", "CN"),
+    ("Guangzhou", "CN"),
+    ("Hong Kong", "HK"),
+    ("Frankfurt", "DE"),
+    ("Leipzig", "DE"),
+    ("Liege", "BE"),
+    ("Toronto", "CA"),
+    ("Mississauga", "CA"),
+    ("Chicago", "US"),
+    ("Louisville", "US"),
+]
+_PROVIDERS = [(3011, "China Post"), (100003, "Cainiao"), (21051, "USPS"), (7041, "DHL Paket"), (3041, "Canada Post")]
+_EPOCH = _dt.datetime(2026, 1, 1, tzinfo=_dt.timezone.utc)
+
+
+def number_for(i: int) -> str:
+    """Deterministic, realistic-looking tracking number for package i."""
+
+    return f"LG{i:09d}CN"
+
+
+def _event(number: str, provider: int, k: int, total: int) -> Dict[str, Any]:
+    rng = random.Random(f"{number}/{provider}/{k}")
+    start = _EPOCH + _dt.timedelta(hours=zlib.crc32(number.encode()) % (24 * 30))
+    t = start + _dt.timedelta(hours=7 * k + rng.randrange(6), minutes=rng.randrange(60))
+    stage, desc = _DELIVERED if k >= 12 and k == total - 1 else _STAGES[k % len(_STAGES)]
+    city, country = rng.choice(_CITIES)
+    tz = _dt.timezone(_dt.timedelta(hours=8 if country in ("CN", "HK") else 1))
+    return {
+        "time_iso": t.astimezone(tz).isoformat(),
+        "time_utc": t.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "description": desc,
+        "location": f"{city}, {country}",
+        "stage": stage,
+        "sub_status": f"{stage}_Other",
+        "address": {"country": country, "state": None, "city": city, "street": None, "postal_code": None},
+    }
+
+
+def tracking_item(
+    number: str, carrier: int = 3011, *, providers: int = 1, events: int = 8, revision: int = 0, tag: str = ""
+) -> Dict[str, Any]:
+    """A gettrackinfo `accepted` item (also the `data` of a webhook): `events + revision` events per provider."""
+
+    total = events + revision
+    provs = []
+    newest: Optional[Dict[str, Any]] = None
+    for p in range(max(1, providers)):
+        key, name = _PROVIDERS[p % len(_PROVIDERS)] if p else (carrier, _PROVIDERS[0][1])
+        evs = [_event(number, key, k, total) for k in range(total)]
+        evs.reverse()  # newest first, as 17TRACK sends them
+        if evs and (newest is None or evs[0]["time_utc"] > newest["time_utc"]):
+            newest = evs[0]
+        provs.append(
+            {
+                "key": key,
+                "provider": {"key": key, "name": name, "alias": name, "tel": None, "homepage": None},
+                "service_type": "Standard",
+                "latest_sync_status": "Success",
+                "events_hash": zlib.crc32(json.dumps(evs).encode()),
+                "events": evs,
+            }
+        )
+    stage = newest["stage"] if newest else "NotFound"
+    return {
+        "number": number,
+        "carrier": carrier,
+        "param": None,
+        "tag": tag,
+        "track_info": {
+            "shipping_info": {"shipper_address": {"country": "CN"}, "recipient_address": {"country": "DE"}},
+            "latest_status": {"status": stage, "sub_status": f"{stage}_Other", "sub_status_descr": None},
+            "latest_event": newest,
+            "time_metrics": {"days_after_order": total // 3, "days_of_transit": total // 3},
+            "milestone": [],
+            "misc_info": {"risk_factor": 0, "service_type": "Standard", "weight_kg": "0.25", "pieces": "1"},
+            "tracking": {"providers_hash": len(provs), "providers": provs},
+        },
+    }
+
+
+def webhook_payload(number: str, carrier: int = 3011, **kwargs: Any) -> bytes:
+    """TRACKING_UPDATED webhook body for `number` (see tracking_item for kwargs)."""
+
+    body = {"event": "TRACKING_UPDATED", "data": tracking_item(number, carrier, **kwargs)}
+    return json.dumps(body, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class _FakeHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+    # Headers and body are separate writes; without this, Nagle + delayed ACK adds ~40 ms per call.
+    disable_nagle_algorithm = True
+
+    def do_POST(self) -> None:  # noqa: N802
+        api: "FakeApi" = self.server.api  # type: ignore[attr-defined]
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        endpoint = self.path.rstrip("/").rsplit("/", 1)[-1]
+        items = json.loads(body) if body else None
+        if api.latency:
+            time.sleep(api.latency)
+        data = api.respond(endpoint, items)
+        out = json.dumps(data, separators=(",", ":")).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(out)))
+        self.end_headers()
+        self.wfile.write(out)
+
+    def log_message(self, fmt: str, *args: Any) -> None:
+        pass
+
+
+class FakeApi:
+    """Threaded fake of the 17TRACK v2.2 endpoints track17 uses.
+
+    gettrackinfo answers every number with tracking_item(..., revision=self.revision);
+    bump `revision` to make the next sync see one new event per provider.
+    """
+
+    def __init__(
+        self, *, host: str = "127.0.0.1", port: int = 0, providers: int = 1, events: int = 8, latency: float = 0.0
+    ):
+        self.providers = providers
+        self.events = events
+        self.latency = latency
+        self.revision = 0
+        self.calls: "collections.Counter[str]" = collections.Counter()
+        self._lock = threading.Lock()
+        self._httpd = http.server.ThreadingHTTPServer((host, port), _FakeHandler)
+        self._httpd.daemon_threads = True
+        self._httpd.api = self  # type: ignore[attr-defined]
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/track/v2.2"
+
+    def start(self) -> "FakeApi":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def respond(self, endpoint: str, items: Optional[List[Dict[str, Any]]]) -> Dict[str, Any]:
+        with self._lock:
+            self.calls[endpoint] += 1
+        if endpoint == "getquota":
+            return {"code": 0, "data": {"quota_total": 10**9, "quota_used": 0, "quota_remain": 10**9}}
+        accepted: List[Dict[str, Any]] = []
+        rejected: List[Dict[str, Any]] = []
+        for it in items or []:
+            number = str(it.get("number") or "")
+            carrier = int(it.get("carrier") or 3011)
+            if endpoint == "register" and number.startswith("BAD"):
+                rejected.append({"number": number, "error": {"code": -18010012, "message": "Invalid number."}})
+            elif endpoint == "gettrackinfo":
+                accepted.append(
+                    tracking_item(
+                        number, carrier, providers=self.providers, events=self.events, revision=self.revision
+                    )
+                )
+            else:
+                accepted.append({"number": number, "carrier": carrier, "origin": 1})
+        return {"code": 0, "data": {"accepted": accepted, "rejected": rejected}}
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    s = sub.add_parser("serve", help="Run the fake API until Ctrl+C")
+    s.add_argument("--port", type=int, default=8790)
+    s.add_argument("--providers", type=int, default=1)
+    s.add_argument("--events", type=int, default=8)
+    s.add_argument("--latency-ms", type=float, default=0.0, help="Added to every response")
+
+    s = sub.add_parser("payloads", help="Write TRACKING_UPDATED payloads as NDJSON")
+    s.add_argument("--count", type=int, default=1000)
+    s.add_argument("--providers", type=int, default=1)
+    s.add_argument("--events", type=int, default=8)
+    s.add_argument("--revision", type=int, default=0)
+    s.add_argument("-o", "--output", help="Output file (default: stdout)")
+    args = ap.parse_args()
+
+    if args.cmd == "serve":
+        api = FakeApi(port=args.port, providers=args.providers, events=args.events, latency=args.latency_ms / 1000)
+        print(f"Fake 17TRACK API on {api.url} (Ctrl+C to stop)")
+        api.start()
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            api.stop()
+        return 0
+
+    fh = open(args.output, "wb") if args.output else sys.stdout.buffer
+    try:
+        for i in range(args.count):
+            fh.write(
+                webhook_payload(number_for(i), providers=args.providers, events=args.events, revision=args.revision)
+                + b"\n"
+            )
+    finally:
+        if args.output:
+            fh.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
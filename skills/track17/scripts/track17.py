@@ -18,6 +18,12 @@ Environment
 - TRACK17_DATA_DIR (optional)            : override data directory (db + inbox + cache)
 - TRACK17_WORKSPACE_DIR (optional)       : override workspace directory (default data dir becomes <workspace>/packages/track17)
 - TRACK17_LANG (optional)                : default translation language, e.g. "en" (default: "en")
+- TRACK17_API_BASE (optional)            : override the API base URL (e.g. a local stub server for testing)
+- TRACK17_SPOOL (optional)               : webhook spool backend, "sqlite" (default) or "dir" (file per payload)
+- TRACK17_RAW_STORAGE (optional)         : "plain" (default) or "compressed" raw JSON for events/payloads
+- TRACK17_SHARDS (optional)              : spread packages over N DB files (default 1; see ShardRouter)
+- TRACK17_SHARD_BY (optional)            : shard key, "number" (default) or "tag" (one tenant per file)
+- TRACK17_SHARD (optional)               : point single-file commands (gc, compact, db-check, export, changes) at shard N
 
 Storage
 By default, data is stored under:
@@ -30,10 +36,13 @@ then data is stored at:
   /clawd/packages/track17/
 
 Inside the data dir:
-  - track17.sqlite3
-  - inbox/ (raw webhook payloads)
-  - processed/ (already processed webhook payloads)
+  - track17.sqlite3 (shard 0; track17-1.sqlite3 ... with TRACK17_SHARDS)
+  - inbox.sqlite3 (webhook spool queue; see SpoolQueue)
+  - inbox/ (raw webhook payloads, legacy/--spool dir mode)
+  - processed/ (already processed webhook payloads, --spool dir mode)
+  - failed/ (payloads the worker gave up on after repeated failures, --spool dir mode)
   - cache/carriers.json (optional carrier list cache)
+  - cache/carriers.idx.pickle (search index built from carriers.json)
 
 Notes
 - This script intentionally uses only the Python standard library.
@@ -43,23 +52,85 @@ Notes
 from __future__ import annotations
 
 import argparse
+import bisect
+import collections
+import concurrent.futures
+import csv
+import ctypes
+import ctypes.util
 import datetime as _dt
+import email.utils
+import functools
+import gzip
 import hashlib
+import heapq
+import http.client
 import http.server
+import itertools
 import json
 import os
 import pathlib
+import pickle
+import random
 import re
+import select
 import shutil
+import signal
 import sqlite3
+import struct
 import sys
 import textwrap
+import threading
 import time
-import urllib.error
+import urllib.parse
 import urllib.request
-from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+import zlib
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
 
-API_BASE = "https://api.17track.net/track/v2.2"
+
+class _LazyModule:
+    """Module stand-in that imports the real module on first attribute access."""
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module: Any = None
+
+    def __getattr__(self, attr: str) -> Any:
+        if self._module is None:
+            self._module = __import__(self._name)
+        return getattr(self._module, attr)
+
+
+# Only the --async webhook server needs asyncio, the heaviest import here; loading
+# it eagerly would add ~20 ms to every CLI call.
+asyncio: Any = _LazyModule("asyncio")
+
+# zstd is optional: Python 3.14+ ships compression.zstd; older versions can use the
+# third-party "zstandard" package. Without either, compressed storage uses zlib.
+try:
+    from compression import zstd as _zstd  # type: ignore[import-not-found]
+
+    def _zstd_compress(data: bytes) -> bytes:
+        return _zstd.compress(data)
+
+    def _zstd_decompress(data: bytes) -> bytes:
+        return _zstd.decompress(data)
+
+except ImportError:
+    try:
+        import zstandard as _zstandard  # type: ignore[import-not-found]
+
+        def _zstd_compress(data: bytes) -> bytes:
+            return _zstandard.ZstdCompressor().compress(data)
+
+        def _zstd_decompress(data: bytes) -> bytes:
+            return _zstandard.ZstdDecompressor().decompress(data)
+
+    except ImportError:
+        _zstd_compress = None  # type: ignore[assignment]
+        _zstd_decompress = None  # type: ignore[assignment]
+
+API_BASE = os.environ.get("TRACK17_API_BASE") or "https://api.17track.net/track/v2.2"
 CARRIERS_URL = "https://res.17track.net/asset/carrier/info/apicarrier.all.json"
 
 
@@ -112,15 +183,53 @@ def resolve_data_dir() -> pathlib.Path:
     return resolve_workspace_dir() / "packages" / "track17"
 
 
+# Shard i hands out package ids from i * SHARD_ID_SPAN + 1, so an id names its shard.
+SHARD_ID_SPAN = 1_000_000_000
+
+
+def shard_count() -> int:
+    raw = os.environ.get("TRACK17_SHARDS") or "1"
+    try:
+        n = int(raw)
+    except ValueError:
+        raise Track17Error(f"TRACK17_SHARDS must be a positive integer, got {raw!r}")
+    if n < 1:
+        raise Track17Error(f"TRACK17_SHARDS must be a positive integer, got {raw!r}")
+    return n
+
+
+def shard_db_path(base: pathlib.Path, shard: int) -> pathlib.Path:
+    return base / ("track17.sqlite3" if shard == 0 else f"track17-{shard}.sqlite3")
+
+
+def pinned_shard() -> int:
+    """The shard TRACK17_SHARD points single-file commands at (0 if unset)."""
+
+    raw = os.environ.get("TRACK17_SHARD")
+    if not raw:
+        return 0
+    count = shard_count()
+    try:
+        n = int(raw)
+    except ValueError:
+        raise Track17Error(f"TRACK17_SHARD must be an integer in 0..{count - 1}, got {raw!r}")
+    if not 0 <= n < count:
+        raise Track17Error(f"TRACK17_SHARD must be an integer in 0..{count - 1}, got {raw!r}")
+    return n
+
+
 def paths() -> Dict[str, pathlib.Path]:
     base = resolve_data_dir()
     return {
         "base": base,
-        "db": base / "track17.sqlite3",
+        "db": shard_db_path(base, pinned_shard()),
         "inbox": base / "inbox",
         "processed": base / "processed",
+        "failed": base / "failed",
+        "queue": base / "inbox.sqlite3",
         "cache": base / "cache",
         "carriers": base / "cache" / "carriers.json",
+        "carriers_index": base / "cache" / "carriers.idx.pickle",
     }
 
 
@@ -133,9 +242,14 @@ def ensure_dirs() -> Dict[str, pathlib.Path]:
     return p
 
 
-def connect_db(db_path: pathlib.Path) -> sqlite3.Connection:
-    conn = sqlite3.connect(str(db_path))
+def connect_db(db_path: pathlib.Path, *, check_same_thread: bool = True) -> sqlite3.Connection:
+    fresh = not db_path.exists() or db_path.stat().st_size == 0
+    conn = sqlite3.connect(str(db_path), check_same_thread=check_same_thread)
     conn.row_factory = sqlite3.Row
+    if fresh:
+        # Only takes effect before the file is initialised (the WAL switch below does that).
+        # Lets `gc` hand freed pages back with PRAGMA incremental_vacuum.
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL;")
     # Reasonable defaults for a small personal DB.
     conn.execute("PRAGMA foreign_keys = ON;")
     conn.execute("PRAGMA journal_mode = WAL;")
@@ -210,45 +324,739 @@ def init_db(conn: sqlite3.Connection) -> None:
         """
     )
     conn.commit()
+    migrate_db(conn)
+
+
+# SQL for _fmt_row_short(), for rows of packages (prefix p = "new." inside triggers).
+# %!-Ns pads by characters, like Python's format(); '' counts as missing, like `or`.
+_SUMMARY_LINE = (
+    "printf('#%-3d %!-26s %!-18s c=%-5d %!-12s %!-20s %s', {p}id, "
+    "CASE WHEN length({p}label) > 25 THEN substr({p}label, 1, 24) || '…' ELSE COALESCE({p}label, '') END, "
+    "{p}number, {p}carrier, "
+    "COALESCE(NULLIF({p}last_status, ''), NULLIF({p}package_status, ''), NULLIF({p}tracking_status, ''), ''), "
+    "COALESCE({p}last_event_time_utc, ''), substr(COALESCE({p}last_event_desc, ''), 1, 60))"
+)
+
+# SQL for _location_text(): a dict location (stored as JSON) shows as its address, city or country.
+_LOCATION_TEXT = (
+    "CASE WHEN json_valid({col}) AND json_type({col}) = 'object' THEN "
+    "NULLIF(COALESCE(NULLIF(json_extract({col}, '$.address'), ''), NULLIF(json_extract({col}, '$.city'), ''), "
+    "NULLIF(json_extract({col}, '$.country'), ''), ''), '') "
+    "ELSE NULLIF({col}, '') END"
+)
+
+
+# Schema migrations, applied in order on top of the base tables created by init_db.
+# Each entry is (user_version after applying, statements). Never edit a shipped
+# migration; append a new one instead.
+_MIGRATIONS: List[Tuple[int, List[str]]] = [
+    (
+        1,
+        [
+            # list_packages: WHERE archived = 0 ORDER BY updated_at DESC (and the --all ordering).
+            "CREATE INDEX IF NOT EXISTS idx_packages_archived_updated ON packages(archived, updated_at DESC)",
+            # find_package: WHERE number = ? ORDER BY id DESC (rowid is implied in the index).
+            "CREATE INDEX IF NOT EXISTS idx_packages_number ON packages(number)",
+            # sync / ingest: WHERE number = ? AND carrier = ? ORDER BY id DESC.
+            "CREATE INDEX IF NOT EXISTS idx_packages_number_carrier ON packages(number, carrier)",
+            # status: WHERE package_id = ? ORDER BY time_utc DESC, id DESC LIMIT ?.
+            "CREATE INDEX IF NOT EXISTS idx_events_package_time ON events(package_id, time_utc DESC, id DESC)",
+        ],
+    ),
+    (
+        2,
+        [
+            # Content-addressed, compressed raw JSON (TRACK17_RAW_STORAGE=compressed / `compact`).
+            """
+            CREATE TABLE IF NOT EXISTS raw_blobs (
+              hash TEXT PRIMARY KEY,
+              codec TEXT NOT NULL,
+              size INTEGER NOT NULL,
+              data BLOB NOT NULL
+            ) WITHOUT ROWID
+            """,
+            "ALTER TABLE events ADD COLUMN raw_ref TEXT",
+            "ALTER TABLE payloads ADD COLUMN raw_ref TEXT",
+        ],
+    ),
+    (
+        3,
+        [
+            # gc: per-package payload history, age cutoffs and blob reference checks.
+            "CREATE INDEX IF NOT EXISTS idx_payloads_number_carrier ON payloads(number, carrier, id)",
+            "CREATE INDEX IF NOT EXISTS idx_payloads_received ON payloads(received_at)",
+            "CREATE INDEX IF NOT EXISTS idx_payloads_raw_ref ON payloads(raw_ref) WHERE raw_ref IS NOT NULL",
+        ],
+    ),
+    (
+        4,
+        [
+            # Adaptive polling: "" sorts before any timestamp, so new packages are due at once.
+            "ALTER TABLE packages ADD COLUMN next_poll_at TEXT NOT NULL DEFAULT ''",
+            "ALTER TABLE packages ADD COLUMN last_webhook_at TEXT",
+            "CREATE INDEX IF NOT EXISTS idx_packages_due ON packages(archived, next_poll_at)",
+        ],
+    ),
+    (
+        5,
+        [
+            # Token buckets shared by every process using this DB (see ApiBudget).
+            """
+            CREATE TABLE IF NOT EXISTS rate_limits (
+              name TEXT PRIMARY KEY,
+              capacity REAL NOT NULL,
+              rate REAL NOT NULL,
+              tokens REAL NOT NULL,
+              updated_at REAL NOT NULL,
+              day TEXT,
+              seeded_at REAL,
+              budget REAL,
+              spent REAL NOT NULL DEFAULT 0,
+              deferred REAL NOT NULL DEFAULT 0
+            ) WITHOUT ROWID
+            """,
+        ],
+    ),
+    (
+        6,
+        [
+            # `list` reads one preformatted line per package (see _fmt_row_short) instead of
+            # building and formatting full packages rows; triggers keep it current.
+            """
+            CREATE TABLE IF NOT EXISTS package_summary (
+              package_id INTEGER PRIMARY KEY,
+              archived INTEGER NOT NULL,
+              updated_at TEXT NOT NULL,
+              line TEXT NOT NULL
+            )
+            """,
+            "CREATE INDEX IF NOT EXISTS idx_package_summary_list ON package_summary(archived, updated_at DESC)",
+            f"""
+            CREATE TRIGGER IF NOT EXISTS package_summary_ai AFTER INSERT ON packages BEGIN
+              INSERT OR REPLACE INTO package_summary (package_id, archived, updated_at, line)
+              VALUES (new.id, new.archived, new.updated_at, {_SUMMARY_LINE.format(p="new.")});
+            END
+            """,
+            f"""
+            CREATE TRIGGER IF NOT EXISTS package_summary_au AFTER UPDATE ON packages BEGIN
+              INSERT OR REPLACE INTO package_summary (package_id, archived, updated_at, line)
+              VALUES (new.id, new.archived, new.updated_at, {_SUMMARY_LINE.format(p="new.")});
+            END
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS package_summary_ad AFTER DELETE ON packages BEGIN
+              DELETE FROM package_summary WHERE package_id = old.id;
+            END
+            """,
+            f"""
+            INSERT OR REPLACE INTO package_summary (package_id, archived, updated_at, line)
+            SELECT id, archived, updated_at, {_SUMMARY_LINE.format(p="")} FROM packages
+            """,
+            # `status` prints events.location_text instead of decoding JSON locations per row.
+            "ALTER TABLE events ADD COLUMN location_text TEXT",
+            f"UPDATE events SET location_text = {_LOCATION_TEXT.format(col='location')} WHERE location IS NOT NULL",
+        ],
+    ),
+    (
+        7,
+        [
+            # Change feed (`track17 changes`): one row per applied update that changed a package,
+            # written in the same transaction. AUTOINCREMENT keeps seq increasing after gc prunes.
+            """
+            CREATE TABLE IF NOT EXISTS changes (
+              seq INTEGER PRIMARY KEY AUTOINCREMENT,
+              created_at TEXT NOT NULL,
+              package_id INTEGER NOT NULL,
+              number TEXT NOT NULL,
+              carrier INTEGER,
+              label TEXT,
+              source TEXT NOT NULL,
+              prev_status TEXT,
+              last_status TEXT,
+              last_sub_status TEXT,
+              last_event_time_utc TEXT,
+              last_event_desc TEXT,
+              new_events INTEGER NOT NULL DEFAULT 0,
+              events_json TEXT,
+              summary TEXT NOT NULL
+            )
+            """,
+        ],
+    ),
+]
+
+SCHEMA_VERSION = _MIGRATIONS[-1][0]
+
+
+def schema_version(conn: sqlite3.Connection) -> int:
+    return int(conn.execute("PRAGMA user_version").fetchone()[0])
+
+
+def migrate_db(conn: sqlite3.Connection) -> int:
+    """Bring the DB up to SCHEMA_VERSION; returns the version it started from."""
+
+    start = schema_version(conn)
+    for version, statements in _MIGRATIONS:
+        if version <= start:
+            continue
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Another process may have migrated while we waited for the lock.
+            if schema_version(conn) >= version:
+                conn.rollback()
+                continue
+            for stmt in statements:
+                conn.execute(stmt)
+            conn.execute(f"PRAGMA user_version = {int(version)}")
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+    return start
+
+
+def open_db(p: Dict[str, pathlib.Path], *, shard: Optional[int] = None) -> sqlite3.Connection:
+    """Connect for a read command: schema setup only runs if the DB is new or behind SCHEMA_VERSION.
+
+    `shard` opens that shard's file instead of p["db"]; a new shard's package
+    ids start at shard * SHARD_ID_SPAN (see ShardRouter).
+    """
+
+    db = p["db"] if shard is None else shard_db_path(p["base"], shard)
+    if not db.exists():
+        ensure_dirs()
+    conn = connect_db(db)
+    if schema_version(conn) < SCHEMA_VERSION:
+        init_db(conn)
+        if shard:
+            conn.execute(
+                "INSERT INTO sqlite_sequence (name, seq) SELECT 'packages', ? "
+                "WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = 'packages')",
+                (shard * SHARD_ID_SPAN,),
+            )
+            conn.commit()
+    return conn
+
+
+# Hot read paths, shared between the functions that run them and `db-check`.
+SQL_LIST_ACTIVE = "SELECT * FROM packages WHERE archived = 0 ORDER BY updated_at DESC"
+SQL_LIST_ALL = "SELECT * FROM packages ORDER BY archived ASC, updated_at DESC"
+SQL_LIST_LINES_ACTIVE = "SELECT line FROM package_summary WHERE archived = 0 ORDER BY updated_at DESC"
+SQL_LIST_LINES_ALL = "SELECT line FROM package_summary ORDER BY archived ASC, updated_at DESC"
+# Sharded `list` merges per-shard streams on (archived, updated_at).
+SQL_LIST_KEYED_ACTIVE = "SELECT archived, updated_at, line FROM package_summary WHERE archived = 0 ORDER BY updated_at DESC"
+SQL_LIST_KEYED_ALL = "SELECT archived, updated_at, line FROM package_summary ORDER BY archived ASC, updated_at DESC"
+SQL_FIND_BY_NUMBER = "SELECT * FROM packages WHERE number = ? ORDER BY id DESC LIMIT 1"
+SQL_SYNC_RESOLVE = "SELECT * FROM packages WHERE number IN ({qs})"
+SQL_INGEST_RESOLVE = "SELECT * FROM packages WHERE number=? AND carrier=? AND param=? ORDER BY id DESC LIMIT 1"
+SQL_RECENT_EVENTS = "SELECT * FROM events WHERE package_id=? ORDER BY time_utc DESC, id DESC LIMIT ?"
+SQL_PAYLOAD_SEEN = "SELECT 1 FROM payloads WHERE sha256 = ?"
+SQL_NEXT_DUE = "SELECT MIN(next_poll_at) FROM packages WHERE archived = 0 AND next_poll_at > ?"
+# export: walks idx_events_package_time backwards, i.e. newest package first, events oldest first.
+SQL_EXPORT_EVENTS = "SELECT * FROM events ORDER BY package_id DESC, time_utc ASC, id ASC"
+SQL_CHANGES_SINCE = "SELECT * FROM changes WHERE seq > ? ORDER BY seq LIMIT ?"
+
+HOT_QUERIES: List[Tuple[str, str, Tuple[Any, ...]]] = [
+    ("list_packages", SQL_LIST_ACTIVE, ()),
+    ("list_packages --all", SQL_LIST_ALL, ()),
+    ("list (summary lines)", SQL_LIST_LINES_ACTIVE, ()),
+    ("list --all (summary lines)", SQL_LIST_LINES_ALL, ()),
+    ("list, sharded merge", SQL_LIST_KEYED_ACTIVE, ()),
+    ("list --all, sharded merge", SQL_LIST_KEYED_ALL, ()),
+    ("find_package (number)", SQL_FIND_BY_NUMBER, ("X",)),
+    ("sync resolve (number, carrier)", SQL_SYNC_RESOLVE.format(qs="?,?"), ("X", "Y")),
+    ("ingest resolve (number, carrier, param)", SQL_INGEST_RESOLVE, ("X", 0, "")),
+    ("status events", SQL_RECENT_EVENTS, (1, 10)),
+    ("ingest dedupe (sha256)", SQL_PAYLOAD_SEEN, ("X",)),
+    ("sync --due-only (next due)", SQL_NEXT_DUE, ("X",)),
+    ("export events", SQL_EXPORT_EVENTS, ()),
+    ("changes --since (cursor)", SQL_CHANGES_SINCE, (0, 500)),
+]
+
+
+def explain_hot_queries(conn: sqlite3.Connection) -> List[Tuple[str, List[str], List[str]]]:
+    """EXPLAIN QUERY PLAN each hot query.
+
+    Returns (name, plan lines, problems) per query; a problem is a full table
+    scan or a temp B-tree sort, i.e. a step that grows with table size.
+    """
+
+    out: List[Tuple[str, List[str], List[str]]] = []
+    for name, sql, params in HOT_QUERIES:
+        plan = [str(r[3]) for r in conn.execute("EXPLAIN QUERY PLAN " + sql, params).fetchall()]
+        problems = []
+        for line in plan:
+            if line.startswith("SCAN") and "USING" not in line:
+                problems.append(line)
+            elif "USE TEMP B-TREE" in line:
+                problems.append(line)
+        out.append((name, plan, problems))
+    return out
 
 
 class Track17Error(RuntimeError):
     pass
 
 
-def _http_json_post(url: str, token: str, payload: Optional[Any]) -> Dict[str, Any]:
-    """POST JSON to 17TRACK and decode JSON response."""
+USER_AGENT = "track17-skill/1.0 (+https://docs.clawd.bot/tools/skills)"
 
-    data_bytes: Optional[bytes]
-    if payload is None:
-        data_bytes = None
-    else:
-        data_bytes = json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
 
-    req = urllib.request.Request(
-        url,
-        data=data_bytes,
-        headers={
+_STALE_CONNECTION_ERRORS = (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError)
+
+
+class _RequestNotSent(Exception):
+    """A network error raised before the request was fully sent (safe to retry)."""
+
+
+class _ApiClient:
+    """Keep-alive HTTP client shared by all api_* helpers.
+
+    Idle connections are pooled per (scheme, host, port) and handed out to one
+    thread at a time, so a parallel sync reuses a handful of TLS sessions instead
+    of handshaking on every call. 429/5xx responses and network errors are retried
+    with jittered exponential backoff, honouring Retry-After when the server sends it.
+
+    Calls that change state on 17TRACK (register, stoptrack, ...) are sent with
+    idempotent=False: they are only retried when the request never reached the
+    server (connect/send failures, 429), never after a timeout or a 5xx, which may
+    follow a call the server already carried out.
+    """
+
+    RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+    def __init__(
+        self,
+        *,
+        timeout: float = 30.0,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
+        max_idle: int = 8,
+    ):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.max_idle = max_idle
+        self._idle: Dict[Tuple[str, str, int], List[http.client.HTTPConnection]] = {}
+        self._lock = threading.Lock()
+        self.stats: Dict[str, int] = {
+            "requests": 0,
+            "connections_opened": 0,
+            "connections_reused": 0,
+            "retries": 0,
+        }
+
+    def _count(self, key: str, n: int = 1) -> None:
+        with self._lock:
+            self.stats[key] += n
+
+    def _acquire(self, key: Tuple[str, str, int]) -> Tuple[http.client.HTTPConnection, bool]:
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                self.stats["connections_reused"] += 1
+                return idle.pop(), True
+            self.stats["connections_opened"] += 1
+
+        scheme, host, port = key
+        if scheme == "https":
+            return http.client.HTTPSConnection(host, port, timeout=self.timeout), False
+        return http.client.HTTPConnection(host, port, timeout=self.timeout), False
+
+    def _release(self, key: Tuple[str, str, int], conn: http.client.HTTPConnection) -> None:
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.max_idle:
+                idle.append(conn)
+                return
+        conn.close()
+
+    def close(self) -> None:
+        with self._lock:
+            pools = list(self._idle.values())
+            self._idle.clear()
+        for idle in pools:
+            for conn in idle:
+                conn.close()
+
+    def _backoff(self, attempt: int, retry_after: Optional[str]) -> float:
+        if retry_after:
+            try:
+                return min(self.backoff_max, max(0.0, float(retry_after)))
+            except ValueError:
+                try:
+                    when = email.utils.parsedate_to_datetime(retry_after)
+                    delta = (when - _dt.datetime.now(tz=_dt.timezone.utc)).total_seconds()
+                    return min(self.backoff_max, max(0.0, delta))
+                except Exception:
+                    pass
+        # "Full jitter": uniform in [0, base * 2^attempt].
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2**attempt)))
+
+    def _send_once(
+        self, key: Tuple[str, str, int], path: str, data: Optional[bytes], headers: Dict[str, str]
+    ) -> Tuple[int, Dict[str, str], bytes]:
+        conn, reused = self._acquire(key)
+        try:
+            try:
+                try:
+                    conn.request("POST", path, body=data, headers=headers)
+                except (OSError, http.client.HTTPException) as e:
+                    raise _RequestNotSent(e) from e
+                resp = conn.getresponse()
+            except (_RequestNotSent, http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError) as e:
+                cause = e.__cause__ if isinstance(e, _RequestNotSent) else e
+                if not reused or not isinstance(cause, _STALE_CONNECTION_ERRORS):
+                    raise
+                # The server closed an idle keep-alive connection; reconnect once.
+                conn.close()
+                self._count("connections_opened")
+                conn = type(conn)(conn.host, conn.port, timeout=self.timeout)
+                try:
+                    conn.request("POST", path, body=data, headers=headers)
+                except (OSError, http.client.HTTPException) as e2:
+                    raise _RequestNotSent(e2) from e2
+                resp = conn.getresponse()
+            body = resp.read()
+        except BaseException:
+            conn.close()
+            raise
+
+        resp_headers = {k.lower(): v for k, v in resp.getheaders()}
+        if resp.will_close:
+            conn.close()
+        else:
+            self._release(key, conn)
+
+        if resp_headers.get("content-encoding", "").lower() == "gzip":
+            body = gzip.decompress(body)
+        return resp.status, resp_headers, body
+
+    def post_json(
+        self, url: str, token: str, payload: Optional[Any], *, idempotent: bool = True
+    ) -> Dict[str, Any]:
+        parts = urllib.parse.urlsplit(url)
+        scheme = parts.scheme or "https"
+        port = parts.port or (443 if scheme == "https" else 80)
+        key = (scheme, parts.hostname or "", port)
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+
+        data = b""
+        if payload is not None:
+            data = json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+        headers = {
             "Content-Type": "application/json",
+            "Content-Length": str(len(data)),
+            "Accept-Encoding": "gzip",
             "17token": token,
-            "User-Agent": "track17-skill/1.0 (+https://docs.clawd.bot/tools/skills)",
-        },
-        method="POST",
-    )
+            "User-Agent": USER_AGENT,
+        }
 
-    try:
-        with urllib.request.urlopen(req, timeout=30) as resp:
-            body = resp.read()
-    except urllib.error.HTTPError as e:
-        body = e.read() if hasattr(e, "read") else b""
-        raise Track17Error(f"HTTP {e.code} from 17TRACK: {body[:500]!r}") from e
-    except urllib.error.URLError as e:
-        raise Track17Error(f"Network error talking to 17TRACK: {e}") from e
+        attempt = 0
+        while True:
+            self._count("requests")
+            try:
+                status, resp_headers, body = self._send_once(key, path, data, headers)
+            except _RequestNotSent as e:
+                if attempt >= self.max_retries:
+                    raise Track17Error(f"Network error talking to 17TRACK: {e.__cause__}") from e.__cause__
+                delay = self._backoff(attempt, None)
+            except (OSError, http.client.HTTPException) as e:
+                # The request went out: a non-idempotent call may already have been applied.
+                if not idempotent or attempt >= self.max_retries:
+                    raise Track17Error(f"Network error talking to 17TRACK: {e}") from e
+                delay = self._backoff(attempt, None)
+            else:
+                if status < 400:
+                    break
+                retryable = status == 429 or (idempotent and status in self.RETRY_STATUSES)
+                if not retryable or attempt >= self.max_retries:
+                    raise Track17Error(f"HTTP {status} from 17TRACK: {body[:500]!r}")
+                delay = self._backoff(attempt, resp_headers.get("retry-after"))
 
+            attempt += 1
+            self._count("retries")
+            time.sleep(delay)
+
+        try:
+            return json.loads(body.decode("utf-8"))
+        except Exception as e:
+            raise Track17Error(f"Could not parse JSON from 17TRACK: {body[:500]!r}") from e
+
+
+_CLIENT = _ApiClient()
+
+
+def http_stats() -> Dict[str, int]:
+    """Snapshot of the shared API client's request/connection/retry counters."""
+
+    with _CLIENT._lock:
+        return dict(_CLIENT.stats)
+
+
+class QuotaExhausted(Track17Error):
+    """The day's 17TRACK quota budget cannot cover a call right now."""
+
+    def __init__(self, message: str, *, retry_at: float):
+        super().__init__(message)
+        self.retry_at = retry_at
+
+
+# Quota units charged per tracking number, by endpoint. 17TRACK deducts quota when
+# a number is registered (or re-tracked); polling is only rate limited, unless the
+# plan meters it (TRACK17_POLL_QUOTA_COST).
+_QUOTA_COST: Dict[str, float] = {"register": 1.0, "retrack": 1.0}
+# Share of the remaining daily quota that may be spent in one burst; the rest
+# trickles in evenly until midnight UTC.
+_QUOTA_BURST = 0.25
+
+
+def _poll_quota_cost() -> float:
     try:
-        return json.loads(body.decode("utf-8"))
-    except Exception as e:
-        raise Track17Error(f"Could not parse JSON from 17TRACK: {body[:500]!r}") from e
+        return max(0.0, float(os.environ.get("TRACK17_POLL_QUOTA_COST") or 0))
+    except ValueError:
+        return 0.0
+
+
+def _utc_day(ts: float) -> str:
+    return _dt.datetime.fromtimestamp(ts, tz=_dt.timezone.utc).strftime("%Y-%m-%d")
+
+
+def _fmt_ts(ts: float) -> str:
+    return _dt.datetime.fromtimestamp(ts, tz=_dt.timezone.utc).replace(microsecond=0).isoformat()
+
+
+class ApiBudget:
+    """Token buckets in the track17 DB, shared by all api_* calls and by every
+    process (cron runs, the worker) that uses the same data dir.
+
+    - "requests": one token per HTTP call, refilled at TRACK17_RATE_LIMIT per
+      second (default 3, 0 disables); callers sleep until a token is free.
+    - "quota": one token per quota unit (see _QUOTA_COST). Seeded from getquota
+      once per UTC day: a quarter of the remaining daily quota is available at
+      once and the rest refills evenly until midnight. A call it cannot cover
+      raises QuotaExhausted rather than sleeping for hours.
+
+    Buckets are updated under BEGIN IMMEDIATE on a private connection, so the
+    caller's own transactions are never involved. That connection waits up to
+    BUSY_TIMEOUT_MS for the DB's write lock, which sync's writer thread may be
+    holding while it applies a chunk. Threads waiting for a request token
+    sleep without holding the budget's lock.
+    """
+
+    BUSY_TIMEOUT_MS = 30_000
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self.waited = 0.0
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            # Used from sync's fetch threads, always under self._lock.
+            # Always shard 0: one budget per data dir, whatever TRACK17_SHARD says.
+            conn = connect_db(shard_db_path(ensure_dirs()["base"], 0), check_same_thread=False)
+            conn.execute(f"PRAGMA busy_timeout = {self.BUSY_TIMEOUT_MS};")
+            init_db(conn)
+            self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def _request_rate() -> float:
+        try:
+            return max(0.0, float(os.environ.get("TRACK17_RATE_LIMIT") or 3))
+        except ValueError:
+            return 3.0
+
+    def _take(
+        self, name: str, cost: float, now: float, *, capacity: Optional[float] = None, rate: float = 0.0
+    ) -> Tuple[bool, float]:
+        """Refill and try to spend; returns (granted, seconds until `cost` is available).
+
+        capacity/rate override the stored bucket shape; None keeps the seeded one.
+        """
+
+        conn = self._db()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT * FROM rate_limits WHERE name = ?", (name,)).fetchone()
+            if capacity is None:
+                capacity, rate = (float(row["capacity"]), float(row["rate"])) if row is not None else (0.0, 0.0)
+            if row is None:
+                tokens = capacity
+            else:
+                tokens = min(capacity, float(row["tokens"]) + max(0.0, now - float(row["updated_at"])) * rate)
+            granted = tokens >= cost
+            if granted:
+                tokens -= cost
+            wait = 0.0 if granted else ((cost - tokens) / rate if rate > 0 else float("inf"))
+            conn.execute(
+                """
+                INSERT INTO rate_limits (name, capacity, rate, tokens, updated_at, spent, deferred)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(name) DO UPDATE SET
+                  capacity = excluded.capacity,
+                  rate = excluded.rate,
+                  tokens = excluded.tokens,
+                  updated_at = excluded.updated_at,
+                  spent = spent + excluded.spent,
+                  deferred = deferred + excluded.deferred
+                """,
+                (name, capacity, rate, tokens, now, cost if granted else 0.0, 0.0 if granted else cost),
+            )
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        return granted, wait
+
+    def _throttle_requests(self) -> None:
+        rate = self._request_rate()
+        if rate <= 0:
+            return
+        while True:
+            with self._lock:
+                granted, wait = self._take("requests", 1.0, time.time(), capacity=max(1.0, rate), rate=rate)
+                if granted:
+                    return
+                self.waited += wait
+            # Sleep unlocked so other threads can check or take tokens meanwhile, then try again.
+            time.sleep(wait)
+
+    def seed(self, quota: Dict[str, Any], now: Optional[float] = None) -> Dict[str, Any]:
+        """(Re)seed the quota bucket from a getquota `data` object."""
+
+        now = time.time() if now is None else now
+
+        def num(key: str) -> Optional[float]:
+            try:
+                return float(quota[key])
+            except (KeyError, TypeError, ValueError):
+                return None
+
+        remaining = num("quota_remain")
+        daily_max, today_used = num("max_track_daily"), num("today_used")
+        if daily_max:
+            daily_left = max(0.0, daily_max - (today_used or 0.0))
+            remaining = daily_left if remaining is None else min(remaining, daily_left)
+        if remaining is None:
+            raise Track17Error(f"Unexpected getquota response: {quota}")
+
+        midnight = _dt.datetime.fromtimestamp(now, tz=_dt.timezone.utc).replace(
+            hour=0, minute=0, second=0, microsecond=0
+        ) + _dt.timedelta(days=1)
+        secs_left = max(60.0, midnight.timestamp() - now)
+        capacity = min(remaining, max(1.0, remaining * _QUOTA_BURST))
+        rate = max(0.0, remaining - capacity) / secs_left
+
+        with self._lock:
+            conn = self._db()
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO rate_limits
+                  (name, capacity, rate, tokens, updated_at, day, seeded_at, budget, spent, deferred)
+                VALUES ('quota', ?, ?, ?, ?, ?, ?, ?, 0, 0)
+                """,
+                (capacity, rate, capacity, now, _utc_day(now), now, remaining),
+            )
+            conn.commit()
+        return self.status(now)
+
+    def ensure_seeded(self, now: float) -> bool:
+        with self._lock:
+            row = self._db().execute("SELECT day FROM rate_limits WHERE name = 'quota'").fetchone()
+        if row is not None and row["day"] == _utc_day(now):
+            return True
+        try:
+            resp = api_getquota()
+        except Track17Error:
+            # Advisory only: the API still enforces the real quota.
+            return False
+        data = resp.get("data") if resp.get("code") in (0, "0") else None
+        if not isinstance(data, dict):
+            return False
+        self.seed(data, now)
+        return True
+
+    def acquire(self, endpoint: str, units: int) -> None:
+        """Wait for a request slot and charge the quota cost of `units` numbers."""
+
+        cost = _QUOTA_COST.get(endpoint, _poll_quota_cost() if endpoint == "gettrackinfo" else 0.0) * units
+        if cost > 0:
+            now = time.time()
+            if self.ensure_seeded(now):
+                with self._lock:
+                    granted, wait = self._take("quota", cost, now)
+                if not granted:
+                    retry_at = now + wait
+                    when = _fmt_ts(retry_at) if wait != float("inf") else "after midnight UTC"
+                    raise QuotaExhausted(
+                        f"17TRACK quota budget exhausted: {endpoint} needs {cost:g} unit(s); "
+                        f"enough accrues at {when}. See: track17 quota",
+                        retry_at=retry_at,
+                    )
+        self._throttle_requests()
+
+    def available(self, name: str = "quota", now: Optional[float] = None) -> Optional[float]:
+        """Tokens a bucket holds right now (None if it was never seeded)."""
+
+        now = time.time() if now is None else now
+        with self._lock:
+            row = self._db().execute("SELECT * FROM rate_limits WHERE name = ?", (name,)).fetchone()
+        if row is None or (name == "quota" and row["day"] != _utc_day(now)):
+            return None
+        return min(float(row["capacity"]), float(row["tokens"]) + max(0.0, now - float(row["updated_at"])) * float(row["rate"]))
+
+    def status(self, now: Optional[float] = None) -> Dict[str, Any]:
+        """Budget snapshot: tokens, refill rate, spend, deferred work and projected exhaustion."""
+
+        now = time.time() if now is None else now
+        with self._lock:
+            row = self._db().execute("SELECT * FROM rate_limits WHERE name = 'quota'").fetchone()
+        if row is None:
+            return {"seeded": False}
+        tokens = self.available("quota", now)
+        budget, spent = float(row["budget"] or 0), float(row["spent"])
+        elapsed = max(1.0, now - float(row["seeded_at"] or now))
+        burn_per_hour = spent / elapsed * 3600
+        out: Dict[str, Any] = {
+            "seeded": True,
+            "day": row["day"],
+            "seeded_at": _fmt_ts(float(row["seeded_at"])) if row["seeded_at"] else None,
+            "budget": budget,
+            "spent": spent,
+            "deferred": float(row["deferred"]),
+            "tokens": round(tokens, 2) if tokens is not None else 0.0,
+            "refill_per_hour": round(float(row["rate"]) * 3600, 2),
+            "burn_per_hour": round(burn_per_hour, 2),
+            "throttling": tokens is None or tokens < 1.0,
+            "projected_exhaustion": None,
+        }
+        if burn_per_hour > 0 and budget > spent:
+            out["projected_exhaustion"] = _fmt_ts(now + (budget - spent) / burn_per_hour * 3600)
+        elif budget <= spent:
+            out["projected_exhaustion"] = "now"
+        return out
+
+
+_BUDGET = ApiBudget()
+
+# Read-only endpoints, safe to resend after a timeout or a 5xx.
+_IDEMPOTENT_ENDPOINTS = frozenset({"gettrackinfo", "getquota"})
+
+
+def _http_json_post(url: str, token: str, payload: Optional[Any]) -> Dict[str, Any]:
+    """POST JSON to 17TRACK and decode JSON response.
+
+    Every call passes through the shared ApiBudget first (rate limit + quota).
+    """
+
+    endpoint = url.rsplit("/", 1)[-1]
+    _BUDGET.acquire(endpoint, len(payload) if isinstance(payload, list) else 0)
+    return _CLIENT.post_json(url, token, payload, idempotent=endpoint in _IDEMPOTENT_ENDPOINTS)
 
 
 def _api_token(required: bool = True) -> Optional[str]:
@@ -360,6 +1168,7 @@ def upsert_package(
     tag: Optional[str] = None,
     lang: Optional[str] = None,
     api_registered: Optional[bool] = None,
+    commit: bool = True,
 ) -> sqlite3.Row:
     now = _utc_now_iso()
     number_n = _normalise_number(number)
@@ -396,7 +1205,8 @@ def upsert_package(
                 f"UPDATE packages SET {', '.join(fields)} WHERE number = ? AND carrier = ? AND param = ?",
                 tuple(values),
             )
-            conn.commit()
+            if commit:
+                conn.commit()
 
         return conn.execute(
             "SELECT * FROM packages WHERE id = ?",
@@ -423,7 +1233,8 @@ def upsert_package(
             1 if api_registered else 0,
         ),
     )
-    conn.commit()
+    if commit:
+        conn.commit()
     return conn.execute(
         "SELECT * FROM packages WHERE number = ? AND carrier = ? AND param = ?",
         (number_n, carrier_n, param_n),
@@ -441,19 +1252,231 @@ def find_package(conn: sqlite3.Connection, key: str) -> Optional[sqlite3.Row]:
 
     # try number exact (normalised)
     n = _normalise_number(k)
-    row = conn.execute(
-        "SELECT * FROM packages WHERE number = ? ORDER BY id DESC LIMIT 1",
-        (n,),
-    ).fetchone()
+    row = conn.execute(SQL_FIND_BY_NUMBER, (n,)).fetchone()
     return row
 
 
 def list_packages(conn: sqlite3.Connection, include_archived: bool = False) -> List[sqlite3.Row]:
     if include_archived:
-        q = "SELECT * FROM packages ORDER BY archived ASC, updated_at DESC"
-        return list(conn.execute(q).fetchall())
-    q = "SELECT * FROM packages WHERE archived = 0 ORDER BY updated_at DESC"
-    return list(conn.execute(q).fetchall())
+        return list(conn.execute(SQL_LIST_ALL).fetchall())
+    return list(conn.execute(SQL_LIST_ACTIVE).fetchall())
+
+
+class ShardRouter:
+    """Routes packages across the DB files of a data dir (TRACK17_SHARDS).
+
+    Shard 0 is the usual track17.sqlite3, so an unsharded data dir is a
+    one-shard router and an existing DB keeps its packages when sharding is
+    turned on. New packages go to crc32(number) % count or, with
+    TRACK17_SHARD_BY=tag, to crc32(tag) % count, so one tenant's packages share
+    a file. A number is looked up in its home shard first and then in the
+    others (rows created before sharding, or under another count). Ids carry
+    their shard (see SHARD_ID_SPAN).
+
+    Writers on different shards never wait on each other's lock. Connections
+    are opened lazily, one per shard; list and search merge the per-shard
+    streams. Read paths skip shard files that do not exist yet (see
+    read_shards), so only writes create them.
+    """
+
+    def __init__(self, p: Dict[str, pathlib.Path], *, count: Optional[int] = None, by: Optional[str] = None):
+        self.p = p
+        self.count = count or shard_count()
+        self.by = (by or os.environ.get("TRACK17_SHARD_BY") or "number").lower()
+        if self.by not in ("number", "tag"):
+            raise Track17Error(f"Unknown TRACK17_SHARD_BY: {self.by} (expected 'number' or 'tag')")
+        self.shards = list(range(self.count))
+        if p["base"].exists():
+            # Files left by an earlier, larger shard count are still read.
+            for f in p["base"].glob("track17-*.sqlite3"):
+                idx = f.stem.split("-", 1)[1]
+                if idx.isdigit() and int(idx) >= self.count:
+                    self.shards.append(int(idx))
+        self._conns: Dict[int, sqlite3.Connection] = {}
+        self._seen: Dict[int, PayloadSeenCache] = {}
+
+    @property
+    def sharded(self) -> bool:
+        return len(self.shards) > 1
+
+    def read_shards(self) -> List[int]:
+        """Shards that can hold rows: shard 0 plus every shard whose file exists (or is open)."""
+
+        return [
+            s for s in self.shards
+            if s == 0 or s in self._conns or shard_db_path(self.p["base"], s).exists()
+        ]
+
+    def conn(self, shard: int) -> sqlite3.Connection:
+        c = self._conns.get(shard)
+        if c is None:
+            c = self._conns[shard] = open_db(self.p, shard=shard)
+        return c
+
+    def close(self) -> None:
+        for c in self._conns.values():
+            c.close()
+        self._conns.clear()
+
+    def home(self, number: str, tag: str = "") -> int:
+        key = tag if self.by == "tag" and tag else number
+        return zlib.crc32(key.encode("utf-8")) % self.count
+
+    def locate(
+        self, number: str, *, carrier: Optional[int] = None, param: Optional[str] = None, tag: str = ""
+    ) -> Tuple[int, Optional[sqlite3.Row]]:
+        """(shard, newest matching row), probing the home shard first; (home, None) if no shard has it."""
+
+        home = self.home(number, tag)
+        if carrier is None:
+            sql, args = SQL_FIND_BY_NUMBER, (number,)
+        else:
+            sql, args = SQL_INGEST_RESOLVE, (number, int(carrier), param or "")
+        readable = self.read_shards()
+        for shard in sorted(readable, key=lambda s: s != home):
+            row = self.conn(shard).execute(sql, args).fetchone()
+            if row is not None:
+                return shard, row
+        return home, None
+
+    def conn_for(self, number: str, *, carrier: Optional[int] = None, param: Optional[str] = None, tag: str = "") -> sqlite3.Connection:
+        if not self.sharded:
+            return self.conn(0)
+        return self.conn(self.locate(_normalise_number(number), carrier=carrier, param=param, tag=tag)[0])
+
+    def find_package(self, key: str) -> Tuple[sqlite3.Connection, Optional[sqlite3.Row]]:
+        """find_package() across shards; returns the connection that owns the row (shard 0 if none)."""
+
+        if not self.sharded:
+            return self.conn(0), find_package(self.conn(0), key)
+        k = key.strip()
+        if k.isdigit() and int(k) // SHARD_ID_SPAN in self.read_shards():
+            conn = self.conn(int(k) // SHARD_ID_SPAN)
+            row = conn.execute("SELECT * FROM packages WHERE id = ?", (int(k),)).fetchone()
+            if row:
+                return conn, row
+        shard, row = self.locate(_normalise_number(k))
+        return self.conn(shard) if row else self.conn(0), row
+
+    def upsert_package(self, **kwargs: Any) -> sqlite3.Row:
+        conn = self.conn_for(kwargs["number"], carrier=kwargs["carrier"], param=kwargs["param"], tag=kwargs.get("tag") or "")
+        return upsert_package(conn, **kwargs)
+
+    def list_packages(self, include_archived: bool = False) -> List[sqlite3.Row]:
+        rows: List[sqlite3.Row] = []
+        for shard in self.read_shards():
+            rows.extend(list_packages(self.conn(shard), include_archived))
+        return rows
+
+    def list_lines(self, include_archived: bool = False) -> Iterable[str]:
+        """`list` lines from every shard, merged in (archived, updated_at DESC) order."""
+
+        if not self.sharded:
+            cur = self.conn(0).cursor()
+            cur.row_factory = None
+            return (r[0] for r in cur.execute(SQL_LIST_LINES_ALL if include_archived else SQL_LIST_LINES_ACTIVE))
+        streams = []
+        for shard in self.read_shards():
+            cur = self.conn(shard).cursor()
+            cur.row_factory = None
+            streams.append(cur.execute(SQL_LIST_KEYED_ALL if include_archived else SQL_LIST_KEYED_ACTIVE))
+        merged = heapq.merge(*streams, key=lambda r: (-r[0], r[1]), reverse=True)
+        return (r[2] for r in merged)
+
+    def next_due(self, now: str) -> Optional[str]:
+        due = [self.conn(s).execute(SQL_NEXT_DUE, (now,)).fetchone()[0] for s in self.read_shards()]
+        return min((d for d in due if d), default=None)
+
+    def apply_sync_chunk(self, accepted: List[Dict[str, Any]]) -> List[Tuple[bool, str]]:
+        """_apply_sync_chunk() per owning shard (one transaction each)."""
+
+        if not self.sharded:
+            return _apply_sync_chunk(self.conn(0), accepted)
+        groups: Dict[int, List[Dict[str, Any]]] = {}
+        for acc in accepted:
+            number = _normalise_number(str(acc.get("number") or ""))
+            shard, _ = self.locate(number, carrier=int(acc.get("carrier") or 0), param=str(acc.get("param") or ""), tag=str(acc.get("tag") or ""))
+            groups.setdefault(shard, []).append(acc)
+        results: List[Tuple[bool, str]] = []
+        for shard, part in groups.items():
+            results.extend(_apply_sync_chunk(self.conn(shard), part))
+        return results
+
+    def import_batch(
+        self, batch: List[Tuple[int, Dict[str, Any]]], *, register: bool, stats: Dict[str, int], problems: List[str]
+    ) -> bool:
+        """_import_batch() per owning shard; False once registration has to stop.
+
+        An item goes to the shard that already holds its number (any carrier),
+        else to its home shard. After a shard's registration fails, the rest of
+        the batch is stored unregistered.
+        """
+
+        if not self.sharded:
+            return _import_batch(self.conn(0), batch, register=register, stats=stats, problems=problems)
+        groups: Dict[int, List[Tuple[int, Dict[str, Any]]]] = {}
+        for line_no, item in batch:
+            shard, _ = self.locate(item["number"], tag=item["tag"])
+            groups.setdefault(shard, []).append((line_no, item))
+        ok = True
+        for shard, part in groups.items():
+            ok = _import_batch(self.conn(shard), part, register=register and ok, stats=stats, problems=problems) and ok
+        return ok
+
+    def ingest(
+        self, *, raw_body: bytes, headers: Optional[Dict[str, str]] = None, source: str, secret: Optional[str], seen: bool = False
+    ) -> Tuple[bool, str]:
+        """ingest_payload() on the shard that owns the payload's package.
+
+        The payload row lives next to its package, so duplicate detection stays
+        per shard. `seen` keeps one PayloadSeenCache per shard for long runs.
+        """
+
+        shard = 0
+        if self.sharded:
+            try:
+                data = json.loads(raw_body.decode("utf-8")).get("data")
+            except Exception:
+                data = None
+            if isinstance(data, dict):
+                shard, _ = self.locate(
+                    _normalise_number(str(data.get("number") or "")),
+                    carrier=int(data.get("carrier") or 0),
+                    param=str(data.get("param") or ""),
+                    tag=str(data.get("tag") or ""),
+                )
+        conn = self.conn(shard)
+        cache = None
+        if seen:
+            cache = self._seen.get(shard)
+            if cache is None:
+                cache = self._seen[shard] = PayloadSeenCache(conn)
+        return ingest_payload(conn, raw_body=raw_body, headers=headers, source=source, secret=secret, seen=cache)
+
+    def search(
+        self, query: str, *, sort: str = "rank", limit: int = 20, rebuild: bool = False, **kwargs: Any
+    ) -> Tuple[List[Any], Optional[float]]:
+        """search_events() on every shard merged by score (or time); returns (rows, index build seconds or None).
+
+        bm25 statistics are per shard, so scores from different shards are only
+        roughly comparable.
+        """
+
+        built: Optional[float] = None
+        streams = []
+        for shard in self.read_shards():
+            conn = self.conn(shard)
+            t = ensure_search_index(conn, rebuild=rebuild)
+            if t is not None:
+                built = (built or 0.0) + t
+            streams.append(search_events(conn, query, sort=sort, limit=limit, **kwargs))
+        if len(streams) == 1:
+            return streams[0], built
+        if sort == "rank":
+            merged = heapq.merge(*streams, key=lambda r: r["score"])
+        else:
+            merged = heapq.merge(*streams, key=lambda r: r["time_utc"] or r["time_iso"] or "", reverse=True)
+        return list(itertools.islice(merged, limit)), built
 
 
 def _safe_get(d: Any, path: Sequence[Any], default: Any = None) -> Any:
@@ -535,9 +1558,10 @@ def event_hash(event: Dict[str, Any]) -> str:
     return hashlib.sha1(raw.encode("utf-8")).hexdigest()
 
 
-def store_payload(
+def _insert_payload(
     conn: sqlite3.Connection,
     *,
+    sha: str,
     raw_body: bytes,
     source: str,
     event_type: Optional[str],
@@ -545,171 +1569,618 @@ def store_payload(
     carrier: Optional[int],
     signature: Optional[str],
     signature_valid: Optional[bool],
-) -> str:
-    sha = _sha256_hex(raw_body)
+) -> bool:
+    """INSERT OR IGNORE one payloads row (no commit); returns False if the sha was already stored."""
 
-    try:
-        conn.execute(
-            """
-            INSERT INTO payloads (received_at, source, event_type, number, carrier, signature, signature_valid, sha256, raw_json)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """,
-            (
-                _utc_now_iso(),
-                source,
-                event_type,
-                number,
-                carrier,
-                signature,
-                1 if signature_valid else (0 if signature_valid is not None else None),
-                sha,
-                raw_body.decode("utf-8", errors="replace"),
-            ),
-        )
-        conn.commit()
-    except sqlite3.IntegrityError:
-        # Duplicate payload (same SHA256). Ignore.
-        pass
+    raw_text = raw_body.decode("utf-8", errors="replace")
+    raw_ref: Optional[str] = None
+    if raw_storage_mode() == "compressed":
+        raw_ref, _ = pack_payload_raw(conn, raw_text)
+        raw_text = ""
 
-    return sha
+    cur = conn.execute(
+        """
+        INSERT OR IGNORE INTO payloads (
+          received_at, source, event_type, number, carrier, signature, signature_valid, sha256, raw_json, raw_ref
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        (
+            _utc_now_iso(),
+            source,
+            event_type,
+            number,
+            carrier,
+            signature,
+            1 if signature_valid else (0 if signature_valid is not None else None),
+            sha,
+            raw_text,
+            raw_ref,
+        ),
+    )
+    return cur.rowcount > 0
 
 
-def apply_update_from_trackinfo(
+def store_payload(
     conn: sqlite3.Connection,
     *,
-    package_row: sqlite3.Row,
-    response_item: Dict[str, Any],
-    raw_payload_sha: Optional[str],
+    raw_body: bytes,
     source: str,
-) -> Tuple[bool, str]:
-    """Apply a gettrackinfo item or webhook payload to local DB.
-
-    Returns: (changed, summary)
-    """
+    event_type: Optional[str],
+    number: Optional[str],
+    carrier: Optional[int],
+    signature: Optional[str],
+    signature_valid: Optional[bool],
+) -> str:
+    sha = _sha256_hex(raw_body)
 
-    pkg_id = int(package_row["id"])
+    # Duplicate payloads (same SHA256) are ignored.
+    _insert_payload(
+        conn,
+        sha=sha,
+        raw_body=raw_body,
+        source=source,
+        event_type=event_type,
+        number=number,
+        carrier=carrier,
+        signature=signature,
+        signature_valid=signature_valid,
+    )
+    conn.commit()
 
-    tracking_status = response_item.get("tracking_status")
-    package_status = response_item.get("package_status")
+    return sha
 
-    track_info = response_item.get("track_info")
-    if not isinstance(track_info, dict):
-        track_info = {}
 
-    latest = extract_latest_fields(track_info)
+# Raw JSON storage
+#
+# In "compressed" mode raw JSON lives in raw_blobs, keyed by the SHA-256 of its
+# text, instead of inline in events.raw_json / payloads.raw_json:
+#   - events.raw_ref = <hash> of the event body (without "_provider_key", which
+#     is restored from events.provider_key on read);
+#   - payloads.raw_ref = "s:<hash>" for a skeleton whose events were replaced by
+#     {"$blob": <hash>} references, or <hash> for the whole body when the
+#     skeleton would not reproduce it byte for byte.
+# A package's history repeats in every payload, so each event body ends up
+# stored once however many payloads carry it.
 
-    # Determine if this update is new
-    prev = conn.execute("SELECT * FROM packages WHERE id = ?", (pkg_id,)).fetchone()
-    prev_sha = prev["last_payload_sha"] if prev else None
+_BLOB_KEY = "$blob"
+_SKELETON_PREFIX = "s:"
 
-    changed = False
-    if raw_payload_sha and raw_payload_sha != prev_sha:
-        changed = True
 
-    # Also consider event change if payload_sha is missing
-    if not raw_payload_sha:
-        for k in ["last_event_time_utc", "last_event_desc", "last_status", "last_sub_status"]:
-            if prev and latest.get(k) and latest.get(k) != prev.get(k):
-                changed = True
-                break
+def raw_storage_mode() -> str:
+    mode = (os.environ.get("TRACK17_RAW_STORAGE") or "plain").lower()
+    if mode not in ("plain", "compressed"):
+        raise Track17Error(f"Unknown TRACK17_RAW_STORAGE: {mode} (expected 'plain' or 'compressed')")
+    return mode
 
-    now = _utc_now_iso()
 
+def _compress(data: bytes) -> Tuple[str, bytes]:
+    if _zstd_compress is not None:
+        packed, codec = _zstd_compress(data), "zstd"
+    else:
+        packed, codec = zlib.compress(data, 6), "zlib"
+    if len(packed) >= len(data):
+        return "none", data
+    return codec, packed
+
+
+def _decompress(codec: str, data: bytes) -> bytes:
+    if codec == "none":
+        return data
+    if codec == "zlib":
+        return zlib.decompress(data)
+    if codec == "zstd":
+        if _zstd_decompress is None:
+            raise Track17Error("This DB holds zstd-compressed blobs; install 'zstandard' or use Python 3.14+")
+        return _zstd_decompress(data)
+    raise Track17Error(f"Unknown blob codec: {codec}")
+
+
+def _put_blob(conn: sqlite3.Connection, text: str) -> Tuple[str, int]:
+    """Store text content-addressed; returns (hash, bytes newly written)."""
+
+    raw = text.encode("utf-8")
+    h = _sha256_hex(raw)
+    if conn.execute("SELECT 1 FROM raw_blobs WHERE hash = ?", (h,)).fetchone():
+        return h, 0
+    codec, packed = _compress(raw)
     conn.execute(
-        """
-        UPDATE packages
-        SET updated_at = ?,
-            tracking_status = ?,
-            package_status = ?,
-            last_status = ?,
-            last_sub_status = ?,
-            last_event_time_utc = ?,
-            last_event_desc = ?,
-            last_location = ?,
-            last_update_at = ?,
-            last_payload_sha = ?
-        WHERE id = ?
-        """,
-        (
-            now,
-            str(tracking_status) if tracking_status is not None else prev["tracking_status"],
-            str(package_status) if package_status is not None else prev["package_status"],
-            latest.get("last_status") or prev["last_status"],
-            latest.get("last_sub_status") or prev["last_sub_status"],
-            latest.get("last_event_time_utc") or prev["last_event_time_utc"],
-            latest.get("last_event_desc") or prev["last_event_desc"],
-            latest.get("last_location") or prev["last_location"],
-            now,
-            raw_payload_sha or prev_sha,
-            pkg_id,
-        ),
+        "INSERT OR IGNORE INTO raw_blobs (hash, codec, size, data) VALUES (?, ?, ?, ?)",
+        (h, codec, len(raw), sqlite3.Binary(packed)),
     )
+    return h, len(packed) + len(h)
 
-    # Store events (best-effort)
-    inserted_events = 0
-    for e in iter_events(track_info):
-        eh = event_hash(e)
-        try:
-            conn.execute(
-                """
-                INSERT INTO events (
-                  package_id, provider_key, time_utc, time_iso, description, location,
-                  stage, sub_status, raw_json, event_hash, created_at
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """,
-                (
-                    pkg_id,
-                    e.get("_provider_key"),
-                    e.get("time_utc"),
-                    e.get("time_iso"),
-                    (e.get("description_translation", {}) or {}).get("description")
-                    if isinstance(e.get("description_translation"), dict)
-                    else e.get("description_translation")
-                    or e.get("description"),
-                    json.dumps(e.get("location"), ensure_ascii=False) if isinstance(e.get("location"), dict) else e.get("location"),
-                    e.get("stage"),
-                    e.get("sub_status"),
-                    json.dumps(e, ensure_ascii=False),
-                    eh,
-                    now,
-                ),
-            )
-            inserted_events += 1
-        except sqlite3.IntegrityError:
-            pass
 
-    conn.commit()
+def _get_blob(conn: sqlite3.Connection, h: str) -> str:
+    row = conn.execute("SELECT codec, data FROM raw_blobs WHERE hash = ?", (h,)).fetchone()
+    if row is None:
+        raise Track17Error(f"Missing raw blob {h}")
+    return _decompress(row[0], bytes(row[1])).decode("utf-8")
 
-    # Summary
-    label = package_row["label"] or package_row["number"]
-    status = latest.get("last_status") or package_status or tracking_status or "unknown"
-    event_desc = latest.get("last_event_desc")
-    event_time = latest.get("last_event_time_utc")
 
-    bits = [f"{label}: {status}"]
-    if event_time:
-        bits.append(f"@ {event_time}")
-    if event_desc:
-        bits.append(f"- {event_desc}")
+def _canonical_event(e: Dict[str, Any]) -> str:
+    body = {k: v for k, v in e.items() if k != "_provider_key"}
+    return json.dumps(body, ensure_ascii=False, separators=(",", ":"))
 
-    summary = " ".join(bits)
 
-    if inserted_events and changed:
-        summary += f" (+{inserted_events} events)"
+def pack_event_raw(conn: sqlite3.Connection, e: Dict[str, Any]) -> Tuple[str, int]:
+    """Store an event body; returns (events.raw_ref, bytes newly written)."""
 
-    if source == "webhook":
-        summary = "[webhook] " + summary
+    return _put_blob(conn, _canonical_event(e))
 
-    return changed, summary
 
+def load_event_raw(conn: sqlite3.Connection, raw_json: Optional[str], raw_ref: Optional[str], provider_key: Any) -> Optional[str]:
+    """events.raw_json as originally written, whichever way it is stored."""
 
-def _parse_gettrackinfo_response_items(resp: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
-    code = resp.get("code")
-    if code not in (0, "0"):
-        raise Track17Error(f"17TRACK API error code: {code} ({resp})")
+    if not raw_ref:
+        return raw_json
+    body = json.loads(_get_blob(conn, raw_ref))
+    body["_provider_key"] = provider_key
+    return json.dumps(body, ensure_ascii=False)
 
-    data = resp.get("data") or {}
-    accepted = data.get("accepted") or []
+
+def _payload_event_lists(payload: Any) -> List[List[Any]]:
+    providers = _safe_get(payload, ["data", "track_info", "tracking", "providers"], [])
+    if not isinstance(providers, list):
+        return []
+    return [p["events"] for p in providers if isinstance(p, dict) and isinstance(p.get("events"), list)]
+
+
+def pack_payload_raw(conn: sqlite3.Connection, text: str) -> Tuple[str, int]:
+    """Store a payload body; returns (payloads.raw_ref, bytes newly written)."""
+
+    try:
+        payload = json.loads(text)
+    except ValueError:
+        payload = None
+
+    event_lists = _payload_event_lists(payload)
+    if event_lists and json.dumps(payload, ensure_ascii=False, separators=(",", ":")) == text:
+        written = 0
+        for events in event_lists:
+            for i, e in enumerate(events):
+                if isinstance(e, dict):
+                    h, n = _put_blob(conn, json.dumps(e, ensure_ascii=False, separators=(",", ":")))
+                    written += n
+                    events[i] = {_BLOB_KEY: h}
+        h, n = _put_blob(conn, json.dumps(payload, ensure_ascii=False, separators=(",", ":")))
+        return _SKELETON_PREFIX + h, written + n
+
+    # Not reproducible from a skeleton: keep the exact text as one blob.
+    return _put_blob(conn, text)
+
+
+def load_payload_raw(conn: sqlite3.Connection, raw_json: Optional[str], raw_ref: Optional[str]) -> str:
+    """payloads.raw_json as originally received, whichever way it is stored."""
+
+    if not raw_ref:
+        return raw_json or ""
+    if not raw_ref.startswith(_SKELETON_PREFIX):
+        return _get_blob(conn, raw_ref)
+    payload = json.loads(_get_blob(conn, raw_ref[len(_SKELETON_PREFIX) :]))
+    for events in _payload_event_lists(payload):
+        for i, e in enumerate(events):
+            if isinstance(e, dict) and set(e) == {_BLOB_KEY}:
+                events[i] = json.loads(_get_blob(conn, e[_BLOB_KEY]))
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+
+
+class _ShaBloom:
+    """Bloom filter over hex SHA-256 digests.
+
+    The digests are already uniformly distributed, so bit positions are taken
+    straight from 32-bit slices of the digest instead of re-hashing.
+    """
+
+    def __init__(self, capacity: int, bits_per_item: int = 10):
+        self.capacity = max(1024, capacity)
+        self.m = self.capacity * bits_per_item
+        self.k = 7  # ~optimal for 10 bits/item (~1% false positives)
+        self.bits = bytearray((self.m + 7) // 8)
+        self.count = 0
+
+    def _positions(self, sha_hex: str) -> Iterable[int]:
+        for i in range(self.k):
+            yield int(sha_hex[i * 8 : i * 8 + 8], 16) % self.m
+
+    def add(self, sha_hex: str) -> None:
+        for pos in self._positions(sha_hex):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, sha_hex: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(sha_hex))
+
+
+class PayloadSeenCache:
+    """Answers "was this payload SHA already ingested?" without touching JSON.
+
+    An LRU of recent SHAs gives definite hits for redelivery storms; a bloom
+    filter seeded from the payloads table gives definite misses for new
+    payloads. Only bloom positives fall through to an indexed lookup. Seeding
+    reads every stored SHA once, so use one cache per long-lived connection
+    (process-inbox, worker), not per payload.
+    """
+
+    def __init__(self, conn: sqlite3.Connection, *, lru_size: int = 4096):
+        self.lru_size = lru_size
+        self._lru: "collections.OrderedDict[str, None]" = collections.OrderedDict()
+        self.stats: Dict[str, int] = {"lru_hits": 0, "bloom_misses": 0, "db_checks": 0, "duplicates": 0}
+        self._seed(conn)
+
+    def _seed(self, conn: sqlite3.Connection) -> None:
+        total = int(conn.execute("SELECT COUNT(*) FROM payloads").fetchone()[0])
+        self._bloom = _ShaBloom(capacity=max(65536, total * 2))
+        for (sha,) in conn.execute("SELECT sha256 FROM payloads"):
+            self._bloom.add(sha)
+
+    def seen(self, conn: sqlite3.Connection, sha: str) -> bool:
+        if sha in self._lru:
+            self._lru.move_to_end(sha)
+            self.stats["lru_hits"] += 1
+            self.stats["duplicates"] += 1
+            return True
+        if sha not in self._bloom:
+            self.stats["bloom_misses"] += 1
+            return False
+        self.stats["db_checks"] += 1
+        if conn.execute(SQL_PAYLOAD_SEEN, (sha,)).fetchone() is None:
+            return False
+        self.add(conn, sha)
+        self.stats["duplicates"] += 1
+        return True
+
+    def add(self, conn: sqlite3.Connection, sha: str) -> None:
+        self._lru[sha] = None
+        self._lru.move_to_end(sha)
+        if len(self._lru) > self.lru_size:
+            self._lru.popitem(last=False)
+        if sha not in self._bloom:
+            if self._bloom.count >= self._bloom.capacity:
+                # Past capacity the false-positive rate climbs; rebuild at twice the size.
+                self._seed(conn)
+            self._bloom.add(sha)
+
+
+# Poll intervals (seconds) by 17TRACK latest_status. Anything not listed uses the
+# in-transit rules, which also look at how fresh the last carrier event is.
+_POLL_BY_STATUS: Dict[str, int] = {
+    "outfordelivery": 30 * 60,
+    "availableforpickup": 2 * 3600,
+    "deliveryfailure": 60 * 60,
+    "exception": 2 * 3600,
+    "inforeceived": 6 * 3600,
+    "notfound": 6 * 3600,
+    "delivered": 3 * 86400,
+    "expired": 7 * 86400,
+}
+_POLL_MIN = 15 * 60
+_POLL_MAX = 7 * 86400
+# A package with a webhook in this window is mostly kept current by pushes;
+# polling only backstops missed deliveries.
+_WEBHOOK_FRESH = 48 * 3600
+_WEBHOOK_BACKOFF = 4
+
+
+def _parse_iso(value: Optional[str]) -> Optional[_dt.datetime]:
+    if not value:
+        return None
+    try:
+        dt = _dt.datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=_dt.timezone.utc)
+    return dt
+
+
+def poll_interval(row: Any, now: _dt.datetime) -> int:
+    """Seconds until this package is worth polling again.
+
+    `row` is a packages row (or dict with the same keys) holding the state just
+    written. Terminal and quiet packages back off; out-for-delivery and
+    exceptions are polled often; recent webhooks stretch the interval.
+    """
+
+    if (row["tracking_status"] or "").lower() == "stopped":
+        return _POLL_MAX
+
+    status = (row["last_status"] or row["package_status"] or "").lower()
+    interval = _POLL_BY_STATUS.get(status)
+    if interval is None:
+        last_event = _parse_iso(row["last_event_time_utc"])
+        age = (now - last_event).total_seconds() if last_event else None
+        if age is None or age > 7 * 86400:
+            interval = 24 * 3600
+        elif age > 3 * 86400:
+            interval = 12 * 3600
+        elif age > 86400:
+            interval = 6 * 3600
+        else:
+            interval = 2 * 3600
+
+    last_webhook = _parse_iso(row["last_webhook_at"])
+    if last_webhook and (now - last_webhook).total_seconds() < _WEBHOOK_FRESH:
+        interval *= _WEBHOOK_BACKOFF
+
+    return max(_POLL_MIN, min(_POLL_MAX, interval))
+
+
+def next_poll_at(row: Any, now: _dt.datetime) -> str:
+    return (now + _dt.timedelta(seconds=poll_interval(row, now))).replace(microsecond=0).isoformat()
+
+
+def _location_text(loc: Optional[str]) -> str:
+    """Display text of an events.location value (dict locations are stored as JSON)."""
+
+    if isinstance(loc, str) and loc.startswith("{"):
+        try:
+            loc_obj = json.loads(loc)
+            return loc_obj.get("address") or loc_obj.get("city") or loc_obj.get("country") or ""
+        except Exception:
+            pass
+    return loc or ""
+
+
+def _event_row_values(e: Dict[str, Any]) -> Tuple[Any, ...]:
+    """Column values (provider_key .. raw_json) for an events row."""
+
+    return (
+        e.get("_provider_key"),
+        e.get("time_utc"),
+        e.get("time_iso"),
+        (e.get("description_translation", {}) or {}).get("description")
+        if isinstance(e.get("description_translation"), dict)
+        else e.get("description_translation")
+        or e.get("description"),
+        json.dumps(e.get("location"), ensure_ascii=False) if isinstance(e.get("location"), dict) else e.get("location"),
+        e.get("stage"),
+        e.get("sub_status"),
+        json.dumps(e, ensure_ascii=False),
+    )
+
+
+# Keep well under SQLite's default host-parameter limit (999 on older builds).
+_SQL_BATCH = 500
+
+
+def _chunked(seq: Sequence[Any], size: int = _SQL_BATCH) -> Iterable[Sequence[Any]]:
+    for i in range(0, len(seq), size):
+        yield seq[i : i + size]
+
+
+def _known_event_hashes(conn: sqlite3.Connection, pkg_ids: Iterable[int]) -> Dict[int, set]:
+    ids = sorted(set(pkg_ids))
+    known: Dict[int, set] = {i: set() for i in ids}
+    for part in _chunked(ids):
+        qs = ",".join("?" * len(part))
+        for r in conn.execute(f"SELECT package_id, event_hash FROM events WHERE package_id IN ({qs})", tuple(part)):
+            known[int(r[0])].add(r[1])
+    return known
+
+
+def apply_trackinfo_updates(
+    conn: sqlite3.Connection,
+    updates: Sequence[Tuple[Any, Dict[str, Any], Optional[str]]],
+    *,
+    source: str,
+    commit: bool = True,
+) -> List[Tuple[bool, str]]:
+    """Apply many gettrackinfo items / webhook payloads in one transaction.
+
+    `updates` holds (package_row, response_item, raw_payload_sha) triples, where
+    package_row is the current packages row (sqlite3.Row or dict). Package rows
+    are written with one executemany, new events with batched INSERT OR IGNORE,
+    each changed package gets a `changes` row (the feed behind `track17
+    changes`), and the whole set is committed once (unless commit=False, for
+    callers that manage the transaction themselves).
+
+    Returns one (changed, summary) pair per update, in order.
+    """
+
+    now_dt = _dt.datetime.now(tz=_dt.timezone.utc).replace(microsecond=0)
+    now = now_dt.isoformat()
+    known = _known_event_hashes(conn, (int(u[0]["id"]) for u in updates))
+    compressed = raw_storage_mode() == "compressed"
+
+    # Latest state per package, so repeated updates for one package chain correctly.
+    state: Dict[int, Dict[str, Any]] = {}
+    pkg_params: List[Tuple[Any, ...]] = []
+    event_params: List[Tuple[Any, ...]] = []
+    change_params: List[Tuple[Any, ...]] = []
+    results: List[Tuple[bool, str]] = []
+
+    for package_row, response_item, raw_payload_sha in updates:
+        pkg_id = int(package_row["id"])
+        prev = state.get(pkg_id) or {k: package_row[k] for k in package_row.keys()}
+        prev_sha = prev["last_payload_sha"]
+
+        tracking_status = response_item.get("tracking_status")
+        package_status = response_item.get("package_status")
+
+        track_info = response_item.get("track_info")
+        if not isinstance(track_info, dict):
+            track_info = {}
+
+        latest = extract_latest_fields(track_info)
+
+        # Determine if this update is new
+        changed = False
+        if raw_payload_sha and raw_payload_sha != prev_sha:
+            changed = True
+
+        # Also consider event change if payload_sha is missing
+        if not raw_payload_sha:
+            for k in ["last_event_time_utc", "last_event_desc", "last_status", "last_sub_status"]:
+                if latest.get(k) and latest.get(k) != prev.get(k):
+                    changed = True
+                    break
+
+        cur = dict(prev)
+        cur.update(
+            updated_at=now,
+            tracking_status=str(tracking_status) if tracking_status is not None else prev["tracking_status"],
+            package_status=str(package_status) if package_status is not None else prev["package_status"],
+            last_update_at=now,
+            last_payload_sha=raw_payload_sha or prev_sha,
+        )
+        for k in ["last_status", "last_sub_status", "last_event_time_utc", "last_event_desc", "last_location"]:
+            cur[k] = latest.get(k) or prev[k]
+        if source == "webhook":
+            cur["last_webhook_at"] = now
+        cur["next_poll_at"] = next_poll_at(cur, now_dt)
+        state[pkg_id] = cur
+        pkg_params.append(
+            (
+                cur["updated_at"],
+                cur["tracking_status"],
+                cur["package_status"],
+                cur["last_status"],
+                cur["last_sub_status"],
+                cur["last_event_time_utc"],
+                cur["last_event_desc"],
+                cur["last_location"],
+                cur["last_update_at"],
+                cur["last_payload_sha"],
+                cur["last_webhook_at"],
+                cur["next_poll_at"],
+                pkg_id,
+            )
+        )
+
+        # Store events (best-effort); skip hashes we already hold for this package.
+        inserted_events = 0
+        new_events: List[Dict[str, Any]] = []
+        seen = known.setdefault(pkg_id, set())
+        for e in iter_events(track_info):
+            eh = event_hash(e)
+            if eh in seen:
+                continue
+            seen.add(eh)
+            values = _event_row_values(e)
+            raw_ref = None
+            if compressed:
+                raw_ref, _ = pack_event_raw(conn, e)
+                values = values[:-1] + (None,)
+            location = _location_text(values[4]) or None
+            event_params.append((pkg_id, *values, raw_ref, location, eh, now))
+            new_events.append({"time_utc": values[1], "description": values[3], "location": location})
+            inserted_events += 1
+
+        # Summary
+        label = package_row["label"] or package_row["number"]
+        status = latest.get("last_status") or package_status or tracking_status or "unknown"
+        event_desc = latest.get("last_event_desc")
+        event_time = latest.get("last_event_time_utc")
+
+        bits = [f"{label}: {status}"]
+        if event_time:
+            bits.append(f"@ {event_time}")
+        if event_desc:
+            bits.append(f"- {event_desc}")
+
+        summary = " ".join(bits)
+
+        if inserted_events and changed:
+            summary += f" (+{inserted_events} events)"
+
+        if source == "webhook":
+            summary = "[webhook] " + summary
+
+        results.append((changed, summary))
+        if changed:
+            change_params.append(
+                (
+                    now,
+                    pkg_id,
+                    package_row["number"],
+                    package_row["carrier"],
+                    package_row["label"],
+                    source,
+                    prev["last_status"],
+                    cur["last_status"],
+                    cur["last_sub_status"],
+                    cur["last_event_time_utc"],
+                    cur["last_event_desc"],
+                    inserted_events,
+                    json.dumps(new_events, ensure_ascii=False, separators=(",", ":")) if new_events else None,
+                    summary,
+                )
+            )
+
+    conn.executemany(
+        """
+        UPDATE packages
+        SET updated_at = ?,
+            tracking_status = ?,
+            package_status = ?,
+            last_status = ?,
+            last_sub_status = ?,
+            last_event_time_utc = ?,
+            last_event_desc = ?,
+            last_location = ?,
+            last_update_at = ?,
+            last_payload_sha = ?,
+            last_webhook_at = ?,
+            next_poll_at = ?
+        WHERE id = ?
+        """,
+        pkg_params,
+    )
+    for part in _chunked(event_params):
+        conn.executemany(
+            """
+            INSERT OR IGNORE INTO events (
+              package_id, provider_key, time_utc, time_iso, description, location,
+              stage, sub_status, raw_json, raw_ref, location_text, event_hash, created_at
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            part,
+        )
+    if change_params:
+        conn.executemany(
+            """
+            INSERT INTO changes (
+              created_at, package_id, number, carrier, label, source, prev_status, last_status,
+              last_sub_status, last_event_time_utc, last_event_desc, new_events, events_json, summary
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            change_params,
+        )
+
+    if commit:
+        conn.commit()
+
+    return results
+
+
+def apply_update_from_trackinfo(
+    conn: sqlite3.Connection,
+    *,
+    package_row: sqlite3.Row,
+    response_item: Dict[str, Any],
+    raw_payload_sha: Optional[str],
+    source: str,
+) -> Tuple[bool, str]:
+    """Apply a gettrackinfo item or webhook payload to local DB.
+
+    Returns: (changed, summary)
+    """
+
+    # Work from the stored row, not the caller's possibly stale copy.
+    prev = conn.execute("SELECT * FROM packages WHERE id = ?", (int(package_row["id"]),)).fetchone()
+    if prev is None:
+        prev = package_row
+    changed, summary = apply_trackinfo_updates(conn, [(prev, response_item, raw_payload_sha)], source=source)[0]
+    return changed, summary
+
+
+def _parse_gettrackinfo_response_items(resp: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    code = resp.get("code")
+    if code not in (0, "0"):
+        raise Track17Error(f"17TRACK API error code: {code} ({resp})")
+
+    data = resp.get("data") or {}
+    accepted = data.get("accepted") or []
     rejected = data.get("rejected") or []
     if not isinstance(accepted, list):
         accepted = []
@@ -722,9 +2193,15 @@ def cmd_init(args: argparse.Namespace) -> int:
     p = ensure_dirs()
     conn = connect_db(p["db"])
     init_db(conn)
+    router = ShardRouter(p)
+    for shard in router.shards:
+        router.conn(shard)
+    router.close()
     print("Initialised track17 storage:")
     print(f"  data_dir: {p['base']}")
     print(f"  db:       {p['db']}")
+    if router.sharded:
+        print(f"  shards:   {len(router.shards)} (by {router.by}): " + ", ".join(shard_db_path(p["base"], s).name for s in router.shards))
     print(f"  inbox:    {p['inbox']}")
     print(f"  cache:    {p['cache']}")
     return 0
@@ -732,16 +2209,25 @@ def cmd_init(args: argparse.Namespace) -> int:
 
 def cmd_add(args: argparse.Namespace) -> int:
     p = ensure_dirs()
-    conn = connect_db(p["db"])
-    init_db(conn)
 
     number = _normalise_number(args.number)
     carrier = int(args.carrier or 0)
+    if not carrier and getattr(args, "carrier_name", None):
+        code, matches = suggest_carrier(p, args.carrier_name)
+        if code is None:
+            print(f"Carrier name {args.carrier_name!r} is ambiguous or unknown; pass --carrier with one of:")
+            for _, c, n in matches:
+                print(f"- {c}: {n}")
+            return 2
+        carrier = int(code)
+        print(f"Using carrier {carrier} ({matches[0][2]}) from the local carrier index.")
     param = args.param or ""
     label = args.label
     tag = args.tag or (label[:32] if label else "")
     lang = args.lang or (os.environ.get("TRACK17_LANG") or "en")
 
+    # The package's shard (just track17.sqlite3 unless TRACK17_SHARDS is set).
+    conn = ShardRouter(p).conn_for(number, carrier=carrier, param=param, tag=tag)
     row = upsert_package(
         conn,
         number=number,
@@ -833,6 +2319,7 @@ def cmd_add(args: argparse.Namespace) -> int:
 
 
 def _fmt_row_short(r: sqlite3.Row) -> str:
+    # Mirrored in SQL by _SUMMARY_LINE (package_summary.line); keep the two in step.
     label = r["label"] or ""
     num = r["number"]
     car = r["carrier"]
@@ -846,22 +2333,16 @@ def _fmt_row_short(r: sqlite3.Row) -> str:
 
 
 def cmd_list(args: argparse.Namespace) -> int:
-    p = ensure_dirs()
-    conn = connect_db(p["db"])
-    init_db(conn)
-
-    rows = list_packages(conn, include_archived=args.all)
-    if not rows:
+    # Lines are preformatted by the package_summary triggers; plain tuples skip sqlite3.Row.
+    lines = list(ShardRouter(paths()).list_lines(args.all))
+    if not lines:
         print("No packages tracked yet. Use: track17 add <number> --label ...")
         return 0
 
     print("Tracked packages:")
     print("#    Label                      Number             Carrier Status       Last event time       Last event")
     print("-" * 110)
-    for r in rows:
-        if not args.all and r["archived"]:
-            continue
-        print(_fmt_row_short(r))
+    sys.stdout.write("\n".join(lines) + "\n")
     return 0
 
 
@@ -884,70 +2365,136 @@ def _build_trackinfo_items(rows: List[sqlite3.Row]) -> List[Dict[str, Any]]:
     return items
 
 
+def _fetch_trackinfo_chunk(batch: List[Dict[str, Any]]) -> Tuple[Dict[str, Any], float]:
+    """Call gettrackinfo for one chunk; returns (response, elapsed seconds).
+
+    Runs on worker threads during a parallel sync, so it must not touch the DB.
+    """
+
+    t0 = time.monotonic()
+    resp = api_gettrackinfo(batch)
+    return resp, time.monotonic() - t0
+
+
+def _payload_sha_for_item(acc: Dict[str, Any]) -> Optional[str]:
+    try:
+        return hashlib.sha256(json.dumps(acc, ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()
+    except Exception:
+        return None
+
+
+def _apply_sync_chunk(conn: sqlite3.Connection, accepted: List[Dict[str, Any]]) -> List[Tuple[bool, str]]:
+    """Resolve and apply one gettrackinfo chunk with a single keyed query and one commit."""
+
+    keys = [(_normalise_number(str(acc.get("number") or "")), int(acc.get("carrier") or 0)) for acc in accepted]
+
+    # Find matching package rows; if multiple, pick the newest.
+    by_key: Dict[Tuple[str, int], sqlite3.Row] = {}
+    numbers = sorted({k[0] for k in keys})
+    for part in _chunked(numbers):
+        qs = ",".join("?" * len(part))
+        for r in conn.execute(SQL_SYNC_RESOLVE.format(qs=qs), tuple(part)):
+            key = (r["number"], int(r["carrier"]))
+            if key not in by_key or r["id"] > by_key[key]["id"]:
+                by_key[key] = r
+
+    updates: List[Tuple[Any, Dict[str, Any], Optional[str]]] = []
+    for acc, (num, car) in zip(accepted, keys):
+        pkg = by_key.get((num, car))
+        if not pkg:
+            # Unknown locally; create minimal row (use tag if present).
+            pkg = upsert_package(
+                conn,
+                number=num,
+                carrier=car,
+                param=str(acc.get("param") or ""),
+                label=None,
+                tag=str(acc.get("tag") or ""),
+                lang=str(acc.get("lang") or "en"),
+                api_registered=True,
+            )
+            by_key[(num, car)] = pkg
+        updates.append((pkg, acc, _payload_sha_for_item(acc)))
+
+    return apply_trackinfo_updates(conn, updates, source="poll")
+
+
 def cmd_sync(args: argparse.Namespace) -> int:
     p = ensure_dirs()
-    conn = connect_db(p["db"])
-    init_db(conn)
+    router = ShardRouter(p)
 
-    rows = list_packages(conn, include_archived=False)
+    rows = router.list_packages(include_archived=False)
     if args.active_only:
         rows = [r for r in rows if (r["tracking_status"] or "").lower() != "stopped"]
 
+    # API supports max 40 items per call.
+    CHUNK = 40
+    skipped = 0
+    if getattr(args, "due_only", False):
+        now = _utc_now_iso()
+        eligible = len(rows)
+        rows = [r for r in rows if r["next_poll_at"] <= now]
+        skipped = eligible - len(rows)
+        calls_full = -(-eligible // CHUNK)
+        calls_due = -(-len(rows) // CHUNK)
+        print(
+            f"Due: {len(rows)} of {eligible} package(s); skipped {skipped} not yet due, "
+            f"saving {calls_full - calls_due} of {calls_full} gettrackinfo call(s)."
+        )
+
+    poll_cost = _poll_quota_cost()
+    if rows and poll_cost > 0:
+        # Polling is metered on this plan: spend the budget on the most overdue packages first.
+        available = _BUDGET.available() if _BUDGET.ensure_seeded(time.time()) else None
+        if available is not None and len(rows) * poll_cost > available:
+            rows = sorted(rows, key=lambda r: r["next_poll_at"])
+            affordable = int(available // poll_cost)
+            print(
+                f"Quota budget covers {affordable} of {len(rows)} package(s); "
+                f"deferring {len(rows) - affordable} (see: track17 quota)."
+            )
+            rows = rows[:affordable]
+
     if not rows:
         print("No packages to sync.")
+        if skipped:
+            nxt = router.next_due(_utc_now_iso())
+            if nxt:
+                print(f"Next package due at {nxt}.")
         return 0
 
     items = _build_trackinfo_items(rows)
+    chunks = [items[i : i + CHUNK] for i in range(0, len(items), CHUNK)]
+    parallel = max(1, int(getattr(args, "parallel", 1) or 1))
 
-    # API supports max 40 items per call.
-    CHUNK = 40
     changed_summaries: List[str] = []
     rejected_total: List[Dict[str, Any]] = []
+    latencies: List[float] = []
 
-    for i in range(0, len(items), CHUNK):
-        batch = items[i : i + CHUNK]
-        resp = api_gettrackinfo(batch)
-        accepted, rejected = _parse_gettrackinfo_response_items(resp)
-        rejected_total.extend(rejected)
-
-        # Apply accepted items
-        for acc in accepted:
-            num = _normalise_number(str(acc.get("number") or ""))
-            car = int(acc.get("carrier") or 0)
-
-            # Find matching package row; if multiple, pick the newest.
-            pkg = conn.execute(
-                "SELECT * FROM packages WHERE number=? AND carrier=? ORDER BY id DESC LIMIT 1",
-                (num, car),
-            ).fetchone()
-            if not pkg:
-                # Unknown locally; create minimal row (use tag if present).
-                pkg = upsert_package(
-                    conn,
-                    number=num,
-                    carrier=car,
-                    param=str(acc.get("param") or ""),
-                    label=None,
-                    tag=str(acc.get("tag") or ""),
-                    lang=str(acc.get("lang") or "en"),
-                    api_registered=True,
-                )
-
-            raw_payload_sha = None
-            try:
-                raw_payload_sha = hashlib.sha256(json.dumps(acc, ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()
-            except Exception:
-                pass
-
-            changed, summary = apply_update_from_trackinfo(
-                conn,
-                package_row=pkg,
-                response_item=acc,
-                raw_payload_sha=raw_payload_sha,
-                source="poll",
-            )
-            if changed:
-                changed_summaries.append(summary)
+    # HTTP requests run on a bounded pool of worker threads; responses are applied
+    # here, on the calling thread, so the SQLite connection has a single writer.
+    t_start = time.monotonic()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=min(parallel, len(chunks))) as pool:
+        futures = {pool.submit(_fetch_trackinfo_chunk, batch): idx for idx, batch in enumerate(chunks)}
+        try:
+            for fut in concurrent.futures.as_completed(futures):
+                idx = futures[fut]
+                resp, elapsed = fut.result()
+                latencies.append(elapsed)
+                accepted, rejected = _parse_gettrackinfo_response_items(resp)
+                rejected_total.extend(rejected)
+
+                if getattr(args, "verbose", False):
+                    print(f"  chunk {idx + 1}/{len(chunks)}: {len(chunks[idx])} item(s) in {elapsed:.2f}s")
+
+                for changed, summary in router.apply_sync_chunk(accepted):
+                    if changed:
+                        changed_summaries.append(summary)
+        except BaseException:
+            for f in futures:
+                f.cancel()
+            raise
+    t_total = time.monotonic() - t_start
 
     # Output
     if rejected_total:
@@ -959,6 +2506,21 @@ def cmd_sync(args: argparse.Namespace) -> int:
         if len(rejected_total) > 10:
             print(f"  ... ({len(rejected_total) - 10} more)")
 
+    rate = len(items) / t_total if t_total > 0 else 0.0
+    print(
+        f"Fetched {len(items)} package(s) in {len(chunks)} chunk(s), parallel={parallel}: "
+        f"{t_total:.2f}s ({rate:.1f} pkg/s; chunk latency "
+        f"min {min(latencies):.2f}s / avg {sum(latencies) / len(latencies):.2f}s / max {max(latencies):.2f}s)"
+    )
+
+    if getattr(args, "verbose", False):
+        st = http_stats()
+        print(
+            f"HTTP: {st['requests']} request(s), {st['connections_opened']} connection(s) opened, "
+            f"{st['connections_reused']} reused, {st['retries']} retried, "
+            f"{_BUDGET.waited:.2f}s waiting on the rate limit"
+        )
+
     if not changed_summaries:
         print(f"Sync complete. No changes ({len(rows)} packages checked).")
         return 0
@@ -971,11 +2533,7 @@ def cmd_sync(args: argparse.Namespace) -> int:
 
 
 def cmd_status(args: argparse.Namespace) -> int:
-    p = ensure_dirs()
-    conn = connect_db(p["db"])
-    init_db(conn)
-
-    pkg = find_package(conn, args.key)
+    conn, pkg = ShardRouter(paths()).find_package(args.key)
     if not pkg:
         print(f"Package not found: {args.key}")
         return 2
@@ -990,18 +2548,22 @@ def cmd_status(args: argparse.Namespace) -> int:
             raise Track17Error(f"Refresh failed: {err.get('code')} {err.get('message')}")
         if accepted:
             acc = accepted[0]
-            raw_payload_sha = hashlib.sha256(json.dumps(acc, ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()
+            raw_payload_sha = _payload_sha_for_item(acc)
             _, _ = apply_update_from_trackinfo(conn, package_row=pkg, response_item=acc, raw_payload_sha=raw_payload_sha, source="poll")
             pkg = find_package(conn, str(pkg["id"])) or pkg
 
     if args.json:
         # Include recent events.
         ev = conn.execute(
-            "SELECT * FROM events WHERE package_id=? ORDER BY time_utc DESC, id DESC LIMIT ?",
+            SQL_RECENT_EVENTS,
             (pkg["id"], args.events),
         ).fetchall()
         out = {k: pkg[k] for k in pkg.keys()}
-        out["events"] = [dict(r) for r in ev]
+        out["events"] = []
+        for r in ev:
+            d = dict(r)
+            d["raw_json"] = load_event_raw(conn, d["raw_json"], d.pop("raw_ref", None), d["provider_key"])
+            out["events"].append(d)
         print(json.dumps(out, indent=2, ensure_ascii=False))
         return 0
 
@@ -1023,7 +2585,7 @@ def cmd_status(args: argparse.Namespace) -> int:
     print(f"Last updated:    {pkg['last_update_at']}")
 
     ev = conn.execute(
-        "SELECT * FROM events WHERE package_id=? ORDER BY time_utc DESC, id DESC LIMIT ?",
+        SQL_RECENT_EVENTS,
         (pkg["id"], args.events),
     ).fetchall()
     if ev:
@@ -1032,25 +2594,14 @@ def cmd_status(args: argparse.Namespace) -> int:
         for r in ev:
             t = r["time_utc"] or r["time_iso"] or ""
             d = r["description"] or ""
-            loc = r["location"] or ""
-            if isinstance(loc, str) and loc.startswith("{"):
-                # stored json string for dict location
-                try:
-                    loc_obj = json.loads(loc)
-                    loc = loc_obj.get("address") or loc_obj.get("city") or loc_obj.get("country") or ""
-                except Exception:
-                    pass
+            loc = r["location_text"] if r["location_text"] is not None else _location_text(r["location"])
             print(f"- {t} {d} {('(' + loc + ')') if loc else ''}")
 
     return 0
 
 
 def cmd_stop(args: argparse.Namespace) -> int:
-    p = ensure_dirs()
-    conn = connect_db(p["db"])
-    init_db(conn)
-
-    pkg = find_package(conn, args.key)
+    conn, pkg = ShardRouter(ensure_dirs()).find_package(args.key)
     if not pkg:
         print(f"Package not found: {args.key}")
         return 2
@@ -1079,11 +2630,7 @@ def cmd_stop(args: argparse.Namespace) -> int:
 
 
 def cmd_retrack(args: argparse.Namespace) -> int:
-    p = ensure_dirs()
-    conn = connect_db(p["db"])
-    init_db(conn)
-
-    pkg = find_package(conn, args.key)
+    conn, pkg = ShardRouter(ensure_dirs()).find_package(args.key)
     if not pkg:
         print(f"Package not found: {args.key}")
         return 2
@@ -1102,7 +2649,7 @@ def cmd_retrack(args: argparse.Namespace) -> int:
         raise Track17Error(f"Retrack failed: {err.get('code')} {err.get('message')}")
 
     conn.execute(
-        "UPDATE packages SET tracking_status='Tracking', updated_at=? WHERE id=?",
+        "UPDATE packages SET tracking_status='Tracking', next_poll_at='', updated_at=? WHERE id=?",
         (_utc_now_iso(), pkg["id"]),
     )
     conn.commit()
@@ -1112,11 +2659,7 @@ def cmd_retrack(args: argparse.Namespace) -> int:
 
 
 def cmd_remove(args: argparse.Namespace) -> int:
-    p = ensure_dirs()
-    conn = connect_db(p["db"])
-    init_db(conn)
-
-    pkg = find_package(conn, args.key)
+    conn, pkg = ShardRouter(ensure_dirs()).find_package(args.key)
     if not pkg:
         print(f"Package not found: {args.key}")
         return 2
@@ -1138,108 +2681,1304 @@ def cmd_remove(args: argparse.Namespace) -> int:
     return 0
 
 
-def cmd_quota(args: argparse.Namespace) -> int:
-    _ = ensure_dirs()
-    resp = api_getquota()
-    code = resp.get("code")
-    if code not in (0, "0"):
-        raise Track17Error(f"17TRACK API error code: {code} ({resp})")
-    data = resp.get("data") or {}
-    print(json.dumps(data, indent=2, ensure_ascii=False))
-    return 0
-
+# Columns read by `import`; a CSV without a header row is read in this order.
+_IMPORT_FIELDS = ("number", "label", "carrier", "param", "tag", "lang")
+# register accepts at most 40 numbers per call.
+_REGISTER_CHUNK = 40
+# 17TRACK's rejection code for a number that is already registered on this account.
+_ERR_ALREADY_REGISTERED = -18019901
 
-def cmd_carriers_update(args: argparse.Namespace) -> int:
-    p = ensure_dirs()
-    dest = p["carriers"]
 
-    try:
-        with urllib.request.urlopen(CARRIERS_URL, timeout=30) as resp:
-            body = resp.read()
-    except Exception as e:
-        raise Track17Error(f"Failed to download carrier list: {e}") from e
+def _open_text(path: str, mode: str) -> Any:
+    """Open a UTF-8 text file, gzip-compressed when the name ends in .gz."""
 
-    dest.write_bytes(body)
-    print(f"Saved carrier list to {dest}")
-    return 0
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8", newline="")
+    return open(path, mode, encoding="utf-8", newline="")
 
 
-def cmd_carriers_search(args: argparse.Namespace) -> int:
-    p = ensure_dirs()
-    src = p["carriers"]
-    if not src.exists():
-        print("Carrier cache not found. Run: track17 carriers-update")
-        return 2
+def iter_import_records(fh: Any, fmt: str) -> Iterable[Tuple[int, Optional[Dict[str, Any]]]]:
+    """Yield (line number, record) from a CSV or NDJSON stream; record is None for an unreadable line.
 
-    data = json.loads(src.read_text("utf-8"))
-    q = args.query.lower().strip()
+    NDJSON lines may be plain objects or `track17 export` records, whose event lines are skipped.
+    """
 
-    # The carrier JSON schema is not documented in detail here; we do a best-effort search.
-    matches: List[Tuple[str, Any]] = []
-    if isinstance(data, list):
-        for item in data:
-            if not isinstance(item, dict):
+    if fmt == "ndjson":
+        for line_no, line in enumerate(fh, 1):
+            line = line.strip()
+            if not line:
                 continue
-            name = str(item.get("name") or item.get("en") or item.get("cn") or "")
-            code = item.get("key") or item.get("code") or item.get("id")
-            hay = f"{name} {code}".lower()
-            if q in hay:
-                matches.append((name, code))
-    elif isinstance(data, dict):
-        # sometimes top-level has "data".
-        arr = data.get("data") if isinstance(data.get("data"), list) else None
-        if arr:
-            for item in arr:
-                if not isinstance(item, dict):
-                    continue
-                name = str(item.get("name") or item.get("en") or item.get("cn") or "")
-                code = item.get("key") or item.get("code") or item.get("id")
-                hay = f"{name} {code}".lower()
-                if q in hay:
-                    matches.append((name, code))
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                yield line_no, None
+                continue
+            if not isinstance(rec, dict):
+                yield line_no, None
+            elif rec.get("type", "package") == "package":
+                yield line_no, rec
+        return
+
+    reader = csv.reader(fh)
+    header: Optional[List[str]] = None
+    for row in reader:
+        if not any(c.strip() for c in row):
+            continue
+        if header is None:
+            cells = [c.strip().lower() for c in row]
+            if "number" in cells:
+                header = cells
+                continue
+            header = list(_IMPORT_FIELDS)
+        yield reader.line_num, {k: v.strip() for k, v in zip(header, row) if v.strip()}
+
+
+def _import_item(
+    rec: Dict[str, Any], resolve_carrier: Any
+) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """Normalise one import record; returns (item, None) or (None, reason)."""
+
+    number = _normalise_number(str(rec.get("number") or ""))
+    if not number:
+        return None, "no tracking number"
+
+    carrier_v = rec.get("carrier")
+    name = str(rec.get("carrier_name") or "")
+    carrier = 0
+    if isinstance(carrier_v, int) or (isinstance(carrier_v, str) and carrier_v.isdigit()):
+        carrier = int(carrier_v)
+    elif carrier_v:
+        name = name or str(carrier_v)
+    if not carrier and name:
+        code, matches = resolve_carrier(name)
+        if code is None:
+            options = ", ".join(f"{c} ({n})" for _, c, n in matches[:3]) or "no match"
+            return None, f"carrier {name!r} is ambiguous or unknown: {options}"
+        carrier = int(code)
+
+    label = str(rec["label"]) if rec.get("label") else None
+    return {
+        "number": number,
+        "carrier": carrier,
+        "param": str(rec.get("param") or ""),
+        "label": label,
+        "tag": str(rec.get("tag") or (label[:32] if label else "")),
+        "lang": str(rec.get("lang") or os.environ.get("TRACK17_LANG") or "en"),
+    }, None
 
-    if not matches:
-        print("No carrier matches.")
-        return 0
 
-    print(f"Found {len(matches)} carrier(s):")
-    for name, code in matches[:50]:
-        print(f"- {code}: {name}")
-    if len(matches) > 50:
-        print(f"... ({len(matches) - 50} more)")
-    return 0
+def _register_items(
+    conn: sqlite3.Connection,
+    pending: List[Tuple[Dict[str, Any], sqlite3.Row]],
+    stats: Dict[str, int],
+    problems: List[str],
+) -> None:
+    """Register up to 40 (item, package row) pairs in one call and record the result in one transaction."""
+
+    payload: List[Dict[str, Any]] = []
+    for item, _ in pending:
+        it: Dict[str, Any] = {"number": item["number"]}
+        for key in ("carrier", "tag", "param", "lang"):
+            if item[key]:
+                it[key] = item[key]
+        payload.append(it)
+
+    accepted, rejected = _parse_gettrackinfo_response_items(api_register(payload))
+
+    rows_by_number: Dict[str, List[sqlite3.Row]] = {}
+    for _, row in pending:
+        rows_by_number.setdefault(row["number"], []).append(row)
 
+    now = _utc_now_iso()
+    registered: List[Tuple[str, int]] = []
+    for acc in accepted:
+        candidates = rows_by_number.get(_normalise_number(str(acc.get("number") or "")))
+        if not candidates:
+            continue
+        row = candidates.pop(0)
+        new_carrier = int(acc.get("carrier") or row["carrier"] or 0)
+        if new_carrier == int(row["carrier"]):
+            registered.append((now, int(row["id"])))
+            continue
+        # 17TRACK detected or corrected the carrier: move the row, or merge into an existing one (as `add` does).
+        existing = conn.execute(
+            "SELECT id FROM packages WHERE number=? AND carrier=? AND param=?",
+            (row["number"], new_carrier, row["param"]),
+        ).fetchone()
+        if existing:
+            conn.execute(
+                "UPDATE packages SET label=COALESCE(label, ?), api_registered=1, updated_at=? WHERE id=?",
+                (row["label"], now, existing["id"]),
+            )
+            conn.execute("UPDATE packages SET archived=1, updated_at=? WHERE id=?", (now, row["id"]))
+        else:
+            conn.execute(
+                "UPDATE packages SET carrier=?, api_registered=1, updated_at=? WHERE id=?",
+                (new_carrier, now, row["id"]),
+            )
+        stats["registered"] += 1
+
+    for rej in rejected:
+        number = _normalise_number(str(rej.get("number") or ""))
+        err = rej.get("error") or {}
+        candidates = rows_by_number.get(number)
+        if str(err.get("code")) == str(_ERR_ALREADY_REGISTERED) and candidates:
+            registered.append((now, int(candidates.pop(0)["id"])))
+            continue
+        stats["rejected"] += 1
+        problems.append(f"{number}: rejected by 17TRACK: {err.get('code')} {err.get('message')}")
 
-def parse_webhook_payload(raw_body: bytes) -> Dict[str, Any]:
-    try:
-        return json.loads(raw_body.decode("utf-8"))
-    except Exception as e:
-        raise Track17Error(f"Invalid JSON payload: {e}") from e
+    conn.executemany("UPDATE packages SET api_registered=1, updated_at=? WHERE id=?", registered)
+    stats["registered"] += len(registered)
+    conn.commit()
 
 
-def ingest_payload(
+def _import_batch(
     conn: sqlite3.Connection,
+    batch: List[Tuple[int, Dict[str, Any]]],
     *,
-    raw_body: bytes,
-    headers: Optional[Dict[str, str]] = None,
-    source: str,
-    secret: Optional[str],
-) -> Tuple[bool, str]:
-    """Ingest a webhook (or webhook-like) payload."""
+    register: bool,
+    stats: Dict[str, int],
+    problems: List[str],
+) -> bool:
+    """Insert one batch of unique items and register the unregistered ones.
+
+    Existing rows are found with one keyed query; a carrier-0 (auto-detect) item
+    also matches a row of the same number whose carrier 17TRACK already filled
+    in. Returns False once registration has to stop (quota or API failure).
+    """
 
-    headers = headers or {}
+    numbers = sorted({item["number"] for _, item in batch})
+    by_key: Dict[Tuple[str, int, str], sqlite3.Row] = {}
+    by_number: Dict[Tuple[str, str], sqlite3.Row] = {}
+    for part in _chunked(numbers):
+        qs = ",".join("?" * len(part))
+        for r in conn.execute(SQL_SYNC_RESOLVE.format(qs=qs), tuple(part)):
+            by_key[(r["number"], int(r["carrier"]), r["param"])] = r
+            prev = by_number.get((r["number"], r["param"]))
+            if not r["archived"] and (prev is None or (r["api_registered"], r["id"]) > (prev["api_registered"], prev["id"])):
+                by_number[(r["number"], r["param"])] = r
 
-    sig_pair = guess_signature_header(headers)
-    sig_header_name = sig_pair[0] if sig_pair else None
-    sig_value = sig_pair[1] if sig_pair else None
+    now = _utc_now_iso()
+    inserts: List[Tuple[Any, ...]] = []
+    matched: List[Tuple[Dict[str, Any], Optional[sqlite3.Row]]] = []
+    for _, item in batch:
+        key = (item["number"], item["carrier"], item["param"])
+        row = by_key.get(key)
+        if row is None and not item["carrier"]:
+            row = by_number.get((item["number"], item["param"]))
+        if row is not None and row["api_registered"]:
+            stats["existing"] += 1
+            continue
+        if row is None:
+            inserts.append(
+                (now, now, item["label"], item["number"], item["carrier"], item["param"], item["tag"], item["lang"])
+            )
+        matched.append((item, row))
 
-    sig_valid: Optional[bool] = None
-    if secret and sig_value:
-        expected = compute_webhook_signature(raw_body, secret)
-        sig_valid = expected.lower() == sig_value.lower()
+    if inserts:
+        conn.executemany(
+            """
+            INSERT OR IGNORE INTO packages (
+              created_at, updated_at, label, number, carrier, param, tag, lang, api_registered
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, 0)
+            """,
+            inserts,
+        )
+        conn.commit()
+        stats["inserted"] += len(inserts)
+        qs = ",".join("?" * len(numbers))
+        for r in conn.execute(SQL_SYNC_RESOLVE.format(qs=qs), tuple(numbers)):
+            by_key[(r["number"], int(r["carrier"]), r["param"])] = r
 
-    payload_sha = store_payload(
+    pending = [(item, row or by_key[(item["number"], item["carrier"], item["param"])]) for item, row in matched]
+    if not register or not pending:
+        stats["unregistered"] += len(pending)
+        return True
+
+    try:
+        _register_items(conn, pending, stats, problems)
+    except Track17Error as e:
+        conn.rollback()
+        stats["unregistered"] += len(pending)
+        problems.append(f"Registration stopped: {e}")
+        return False
+    return True
+
+
+def import_packages(
+    conn: Union[sqlite3.Connection, ShardRouter],
+    records: Iterable[Tuple[int, Optional[Dict[str, Any]]]],
+    *,
+    register: bool = True,
+    resolve_carrier: Any = None,
+    batch_size: int = _REGISTER_CHUNK,
+    problems: Optional[List[str]] = None,
+) -> Dict[str, int]:
+    """Stream import records into the DB, registering new numbers in batches.
+
+    Records are deduplicated within the stream, then handled `batch_size` at a
+    time (at most 40, the register limit): one keyed lookup, one INSERT
+    executemany, one register call and one commit for its results. If
+    registration fails part-way (e.g. QuotaExhausted), the remaining rows are
+    still stored, unregistered; importing the same file again registers them.
+    Given a ShardRouter instead of a connection, each batch is split by
+    owning shard (see ShardRouter.import_batch).
+    """
+
+    problems = problems if problems is not None else []
+    batch_size = max(1, min(_REGISTER_CHUNK, batch_size))
+    stats = dict.fromkeys(
+        ("read", "invalid", "duplicates", "existing", "inserted", "registered", "rejected", "unregistered"), 0
+    )
+
+    def no_index(name: str) -> Tuple[Optional[Any], List[Tuple[float, Any, str]]]:
+        raise Track17Error(f"Carrier name {name!r} needs the carrier index. Run: track17 carriers-update")
+
+    resolve_carrier = resolve_carrier or no_index
+    import_batch = conn.import_batch if isinstance(conn, ShardRouter) else functools.partial(_import_batch, conn)
+    seen: set = set()
+    batch: List[Tuple[int, Dict[str, Any]]] = []
+    for line_no, rec in records:
+        stats["read"] += 1
+        try:
+            item, reason = _import_item(rec, resolve_carrier) if rec is not None else (None, "not a JSON object")
+        except Track17Error as e:
+            item, reason = None, str(e)
+        if item is None:
+            stats["invalid"] += 1
+            problems.append(f"line {line_no}: {reason}")
+            continue
+        key = (item["number"], item["carrier"], item["param"])
+        if key in seen:
+            stats["duplicates"] += 1
+            continue
+        seen.add(key)
+        batch.append((line_no, item))
+        if len(batch) >= batch_size:
+            register = import_batch(batch, register=register, stats=stats, problems=problems) and register
+            batch = []
+    if batch:
+        import_batch(batch, register=register, stats=stats, problems=problems)
+    return stats
+
+
+def iter_export_records(
+    conn: sqlite3.Connection, *, include_archived: bool = False, events: bool = True, raw: bool = False
+) -> Iterable[Dict[str, Any]]:
+    """Yield package records, each followed by its events, holding one row of each at a time.
+
+    Packages come newest first; events are merged in from a single ordered scan
+    of the events index rather than a query per package.
+    """
+
+    where = "" if include_archived else " WHERE archived = 0"
+    packages = conn.execute(f"SELECT * FROM packages{where} ORDER BY id DESC")
+    event_rows = iter(conn.execute(SQL_EXPORT_EVENTS)) if events else iter(())
+    ev = next(event_rows, None)
+
+    for pkg in packages:
+        rec: Dict[str, Any] = {"type": "package"}
+        rec.update((k, pkg[k]) for k in pkg.keys())
+        yield rec
+
+        pkg_id = int(pkg["id"])
+        # Events of packages that were filtered out (archived) are skipped on the way past.
+        while ev is not None and int(ev["package_id"]) > pkg_id:
+            ev = next(event_rows, None)
+        while ev is not None and int(ev["package_id"]) == pkg_id:
+            out: Dict[str, Any] = {"type": "event", "number": pkg["number"]}
+            out.update((k, ev[k]) for k in ev.keys() if k not in ("raw_json", "raw_ref"))
+            if raw:
+                out["raw_json"] = load_event_raw(conn, ev["raw_json"], ev["raw_ref"], ev["provider_key"])
+            yield out
+            ev = next(event_rows, None)
+
+
+def cmd_import(args: argparse.Namespace) -> int:
+    p = ensure_dirs()
+    # Rows go to their owning shard (just track17.sqlite3 unless TRACK17_SHARDS is set).
+    router = ShardRouter(p)
+
+    fmt = args.format or ("csv" if args.file.lower().endswith((".csv", ".csv.gz")) else "ndjson")
+    index: List[Optional[CarrierIndex]] = []
+
+    def resolve_carrier(name: str) -> Tuple[Optional[Any], List[Tuple[float, Any, str]]]:
+        if not index:
+            index.append(load_carrier_index(p))
+        return suggest_carrier(p, name, index[0])
+
+    problems: List[str] = []
+    t0 = time.monotonic()
+    fh = sys.stdin if args.file == "-" else _open_text(args.file, "r")
+    try:
+        stats = import_packages(
+            router,
+            iter_import_records(fh, fmt),
+            register=not args.no_register,
+            resolve_carrier=resolve_carrier,
+            batch_size=args.batch_size,
+            problems=problems,
+        )
+    finally:
+        if fh is not sys.stdin:
+            fh.close()
+        router.close()
+    elapsed = time.monotonic() - t0
+
+    print(
+        f"Imported {stats['read']} record(s) in {elapsed:.2f}s: {stats['inserted']} new, "
+        f"{stats['existing']} already tracked, {stats['duplicates']} duplicate(s) in the file, "
+        f"{stats['invalid']} invalid."
+    )
+    print(
+        f"Registered {stats['registered']} with 17TRACK, {stats['rejected']} rejected, "
+        f"{stats['unregistered']} left unregistered."
+    )
+    for msg in problems[:20]:
+        print(f"- {msg}")
+    if len(problems) > 20:
+        print(f"... ({len(problems) - 20} more)")
+    if stats["unregistered"] and not args.no_register:
+        print("Re-run the same import later to register the rest.")
+    return 1 if stats["invalid"] or stats["rejected"] else 0
+
+
+def cmd_export(args: argparse.Namespace) -> int:
+    conn = open_db(paths())
+
+    to_stdout = args.output in (None, "-")
+    fh = sys.stdout if to_stdout else _open_text(args.output, "w")
+    counts = {"package": 0, "event": 0}
+    try:
+        for rec in iter_export_records(conn, include_archived=args.all, events=not args.no_events, raw=args.raw):
+            counts[rec["type"]] += 1
+            fh.write(json.dumps(rec, ensure_ascii=False, separators=(",", ":")) + "\n")
+    finally:
+        if not to_stdout:
+            fh.close()
+
+    print(
+        f"Exported {counts['package']} package(s) and {counts['event']} event(s)"
+        + ("" if to_stdout else f" to {args.output}")
+        + ".",
+        file=sys.stderr if to_stdout else sys.stdout,
+    )
+    return 0
+
+
+def iter_changes(conn: sqlite3.Connection, since: int = 0, *, limit: Optional[int] = None, page: int = 500) -> Iterable[Dict[str, Any]]:
+    """Yield change-feed records with seq > since, oldest first, paging by seq."""
+
+    remaining = limit if limit is not None else -1
+    while remaining:
+        n = page if remaining < 0 else min(page, remaining)
+        rows = conn.execute(SQL_CHANGES_SINCE, (since, n)).fetchall()
+        for r in rows:
+            rec = {k: r[k] for k in r.keys() if k != "events_json"}
+            rec["events"] = json.loads(r["events_json"]) if r["events_json"] else []
+            yield rec
+        if len(rows) < n:
+            return
+        since = int(rows[-1]["seq"])
+        remaining = -1 if remaining < 0 else remaining - len(rows)
+
+
+def prune_changes(conn: sqlite3.Connection, *, max_age_days: float, max_rows: int) -> int:
+    """Delete up to max_rows of the oldest change-feed rows older than max_age_days."""
+
+    cutoff = (_dt.datetime.now(tz=_dt.timezone.utc) - _dt.timedelta(days=max_age_days)).replace(microsecond=0).isoformat()
+    with conn:
+        return conn.execute(
+            "DELETE FROM changes WHERE seq IN (SELECT seq FROM changes ORDER BY seq LIMIT ?) AND created_at < ?",
+            (max_rows, cutoff),
+        ).rowcount
+
+
+def _read_cursor(path: pathlib.Path) -> int:
+    try:
+        return int(path.read_text("utf-8").strip() or "0")
+    except FileNotFoundError:
+        return 0
+    except ValueError:
+        raise Track17Error(f"Cursor file {path} does not hold a change number")
+
+
+def cmd_changes(args: argparse.Namespace) -> int:
+    conn = open_db(paths())
+
+    cursor_file = pathlib.Path(_expand(args.cursor_file)) if args.cursor_file else None
+    if args.since is not None:
+        since = args.since
+    else:
+        since = _read_cursor(cursor_file) if cursor_file else 0
+
+    first = conn.execute("SELECT MIN(seq) FROM changes").fetchone()[0]
+    if first is None:
+        # Empty feed: the next change gets sqlite_sequence + 1, so anything below that is gone.
+        row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'changes'").fetchone()
+        first = int(row[0]) + 1 if row else 1
+    if since and first > since + 1:
+        print(
+            f"Warning: changes #{since + 1}..#{first - 1} were pruned by gc; re-read packages to catch up.",
+            file=sys.stderr,
+        )
+
+    last = since
+    count = 0
+    for rec in iter_changes(conn, since, limit=args.limit):
+        if args.json:
+            sys.stdout.write(json.dumps(rec, ensure_ascii=False, separators=(",", ":")) + "\n")
+        else:
+            sys.stdout.write(f"#{rec['seq']} {rec['created_at']} {rec['summary']}\n")
+        last = int(rec["seq"])
+        count += 1
+    sys.stdout.flush()
+
+    if cursor_file is not None and last != since:
+        tmp = cursor_file.with_name(cursor_file.name + ".tmp")
+        tmp.write_text(f"{last}\n", "utf-8")
+        os.replace(tmp, cursor_file)
+    if not args.json:
+        print(f"{count} change(s); cursor {last}" if count else f"No changes since #{since}.", file=sys.stderr)
+    return 0
+
+
+# Full-text search over events (`track17 search`)
+#
+# events_fts is created on first use rather than by a migration, because not
+# every SQLite build ships FTS5. Its rowid is events.id; triggers keep it in
+# step with events inserts/deletes and with package label/tag edits, so the
+# bulk apply path needs no changes.
+
+# Text of a location column: plain strings as-is, dict locations (stored as JSON) as their text values.
+_FTS_LOCATION = (
+    "CASE WHEN json_valid({col}) AND json_type({col}) = 'object' "
+    "THEN (SELECT group_concat(value, ' ') FROM json_each({col}) WHERE type = 'text') ELSE {col} END"
+)
+
+_FTS_SCHEMA: List[str] = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS events_fts USING fts5(
+      description, location, label, tag,
+      tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS events_fts_ai AFTER INSERT ON events BEGIN
+      INSERT INTO events_fts (rowid, description, location, label, tag)
+      SELECT new.id, new.description, {_FTS_LOCATION.format(col="new.location")}, p.label, p.tag
+      FROM packages p WHERE p.id = new.package_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS events_fts_ad AFTER DELETE ON events BEGIN
+      DELETE FROM events_fts WHERE rowid = old.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS events_fts_au AFTER UPDATE OF description, location ON events BEGIN
+      UPDATE events_fts
+      SET description = new.description, location = {_FTS_LOCATION.format(col="new.location")}
+      WHERE rowid = new.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS packages_fts_au AFTER UPDATE OF label, tag ON packages
+    WHEN old.label IS NOT new.label OR old.tag IS NOT new.tag BEGIN
+      UPDATE events_fts SET label = new.label, tag = new.tag
+      WHERE rowid IN (SELECT id FROM events WHERE package_id = new.id);
+    END
+    """,
+]
+
+_FTS_DROP: List[str] = [
+    "DROP TRIGGER IF EXISTS events_fts_ai",
+    "DROP TRIGGER IF EXISTS events_fts_ad",
+    "DROP TRIGGER IF EXISTS events_fts_au",
+    "DROP TRIGGER IF EXISTS packages_fts_au",
+    "DROP TABLE IF EXISTS events_fts",
+]
+
+# bm25 column weights: description, location, label, tag.
+_FTS_WEIGHTS = (4.0, 2.0, 1.0, 1.0)
+
+
+def fts_available(conn: sqlite3.Connection) -> bool:
+    try:
+        conn.execute("CREATE VIRTUAL TABLE temp.fts5_probe USING fts5(x)")
+    except sqlite3.OperationalError:
+        return False
+    conn.execute("DROP TABLE temp.fts5_probe")
+    return True
+
+
+def ensure_search_index(conn: sqlite3.Connection, *, rebuild: bool = False) -> Optional[float]:
+    """Create (or rebuild) events_fts and backfill it; returns the build time, or None if it already existed."""
+
+    exists = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'events_fts'").fetchone()
+    if exists and not rebuild:
+        return None
+    if not fts_available(conn):
+        raise Track17Error("This Python's SQLite was built without FTS5; `search` is unavailable.")
+
+    t0 = time.monotonic()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        for stmt in _FTS_DROP if rebuild else []:
+            conn.execute(stmt)
+        for stmt in _FTS_SCHEMA:
+            conn.execute(stmt)
+        conn.execute(
+            f"""
+            INSERT INTO events_fts (rowid, description, location, label, tag)
+            SELECT e.id, e.description, {_FTS_LOCATION.format(col="e.location")}, p.label, p.tag
+            FROM events e JOIN packages p ON p.id = e.package_id
+            """
+        )
+        conn.execute("INSERT INTO events_fts (events_fts) VALUES ('optimize')")
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    return time.monotonic() - t0
+
+
+def fts_query(text: str) -> str:
+    """Turn plain search words into an FTS5 expression: every word must match; a trailing * is a prefix."""
+
+    terms = []
+    for word in text.split():
+        prefix = word.endswith("*") and len(word) > 1
+        word = word.rstrip("*")
+        if word:
+            terms.append('"' + word.replace('"', '""') + '"' + ("*" if prefix else ""))
+    if not terms:
+        raise Track17Error("Empty search query")
+    return " ".join(terms)
+
+
+def _parse_time_filter(value: str) -> str:
+    """--since/--until: an ISO date/time, or a relative age like 7d / 12h / 30m (before now)."""
+
+    m = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([dhm])\s*", value)
+    if m:
+        secs = float(m.group(1)) * {"d": 86400, "h": 3600, "m": 60}[m.group(2)]
+        when = _dt.datetime.now(tz=_dt.timezone.utc) - _dt.timedelta(seconds=secs)
+        return when.replace(microsecond=0).isoformat()
+    dt = _parse_iso(value)
+    if dt is None:
+        raise Track17Error(f"Not a date/time or age (e.g. 2026-01-31, 7d): {value!r}")
+    return dt.astimezone(_dt.timezone.utc).isoformat()
+
+
+def search_events(
+    conn: sqlite3.Connection,
+    query: str,
+    *,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    include_archived: bool = False,
+    by_package: bool = False,
+    sort: str = "rank",
+    limit: int = 20,
+) -> List[Any]:
+    """Events matching an FTS5 expression, best bm25 score first (or newest first with sort="time").
+
+    With by_package, one row per package: its best-scoring event plus `hits`.
+    Times compare as text; both stored times and filters are UTC ISO 8601.
+    """
+
+    where = ["events_fts MATCH ?"]
+    params: List[Any] = [query]
+    if since:
+        where.append("COALESCE(e.time_utc, e.time_iso) >= ?")
+        params.append(since)
+    if until:
+        where.append("COALESCE(e.time_utc, e.time_iso) < ?")
+        params.append(until)
+    if not include_archived:
+        where.append("p.archived = 0")
+
+    weights = ", ".join(str(w) for w in _FTS_WEIGHTS)
+    matches = f"""
+        SELECT e.id, e.package_id, e.time_utc, e.time_iso, e.description, e.location, e.stage, e.sub_status,
+               p.number, p.carrier, p.label, p.tag, p.last_status, bm25(events_fts, {weights}) AS score
+        FROM events_fts
+        JOIN events e ON e.id = events_fts.rowid
+        JOIN packages p ON p.id = e.package_id
+        WHERE {" AND ".join(where)}
+    """
+    order = "score, e.id DESC" if sort == "rank" else "COALESCE(e.time_utc, e.time_iso) DESC, e.id DESC"
+    try:
+        if not by_package:
+            return conn.execute(f"{matches} ORDER BY {order} LIMIT ?", (*params, limit)).fetchall()
+        # bm25() cannot be used under GROUP BY, so group the ordered matches here:
+        # a package's first row is its best event.
+        best: Dict[int, Dict[str, Any]] = {}
+        for r in conn.execute(f"{matches} ORDER BY {order}", params):
+            hit = best.get(r["package_id"])
+            if hit is None:
+                best[r["package_id"]] = dict(r, hits=1)
+            else:
+                hit["hits"] += 1
+        return list(best.values())[:limit]
+    except sqlite3.OperationalError as e:
+        raise Track17Error(f"Bad search query {query!r}: {e}") from e
+
+
+def cmd_search(args: argparse.Namespace) -> int:
+    router = ShardRouter(paths())
+
+    query = " ".join(args.query)
+    t0 = time.perf_counter()
+    rows, built = router.search(
+        query if args.match else fts_query(query),
+        rebuild=args.rebuild,
+        since=_parse_time_filter(args.since) if args.since else None,
+        until=_parse_time_filter(args.until) if args.until else None,
+        include_archived=args.all,
+        by_package=args.by_package,
+        sort=args.sort,
+        limit=args.limit,
+    )
+    elapsed = time.perf_counter() - t0 - (built or 0.0)
+    if built is not None:
+        print(f"Built the search index in {built:.2f}s.", file=sys.stderr)
+
+    if args.json:
+        print(json.dumps([dict(r) for r in rows], indent=2, ensure_ascii=False))
+        return 0
+
+    if not rows:
+        print("No matching events.")
+        return 0
+
+    print(f"{len(rows)} match(es) in {1000 * elapsed:.1f} ms:")
+    for r in rows:
+        who = f"#{r['package_id']} {r['label'] or r['number']}"
+        loc = _location_text(r["location"])
+        hits = f" [{r['hits']} event(s)]" if args.by_package else ""
+        print(f"- {who}: {r['time_utc'] or r['time_iso'] or ''} {r['description'] or ''}{f' ({loc})' if loc else ''}{hits}")
+    return 0
+
+
+def _fmt_bytes(n: float) -> str:
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if abs(n) < 1024 or unit == "GiB":
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
+    return f"{n:.1f} GiB"
+
+
+def _db_file_bytes(conn: sqlite3.Connection) -> int:
+    page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    return int(conn.execute("PRAGMA page_count").fetchone()[0]) * int(page_size)
+
+
+def cmd_compact(args: argparse.Namespace) -> int:
+    p = ensure_dirs()
+    conn = connect_db(p["db"])
+    init_db(conn)
+
+    batch = max(1, args.batch_size)
+    file_before = _db_file_bytes(conn)
+    text_bytes = 0
+    blob_bytes = 0
+    n_events = 0
+    n_payloads = 0
+
+    # Events: move inline raw_json into shared blobs, a batch per transaction.
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            "SELECT id, raw_json FROM events WHERE id > ? AND raw_ref IS NULL AND raw_json IS NOT NULL ORDER BY id LIMIT ?",
+            (last_id, batch),
+        ).fetchall()
+        if not rows:
+            break
+        updates = []
+        for r in rows:
+            last_id = int(r["id"])
+            try:
+                e = json.loads(r["raw_json"])
+            except ValueError:
+                continue
+            if not isinstance(e, dict):
+                continue
+            # Only switch rows whose text load_event_raw() will reproduce exactly.
+            body = {k: v for k, v in e.items() if k != "_provider_key"}
+            body["_provider_key"] = e.get("_provider_key")
+            if json.dumps(body, ensure_ascii=False) != r["raw_json"]:
+                continue
+            ref, written = pack_event_raw(conn, e)
+            text_bytes += len(r["raw_json"].encode("utf-8"))
+            blob_bytes += written + len(ref)
+            updates.append((ref, r["id"]))
+        conn.executemany("UPDATE events SET raw_json = NULL, raw_ref = ? WHERE id = ?", updates)
+        conn.commit()
+        n_events += len(updates)
+
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            "SELECT id, raw_json FROM payloads WHERE id > ? AND raw_ref IS NULL ORDER BY id LIMIT ?",
+            (last_id, batch),
+        ).fetchall()
+        if not rows:
+            break
+        updates = []
+        for r in rows:
+            last_id = int(r["id"])
+            ref, written = pack_payload_raw(conn, r["raw_json"])
+            text_bytes += len(r["raw_json"].encode("utf-8"))
+            blob_bytes += written + len(ref)
+            updates.append((ref, r["id"]))
+        conn.executemany("UPDATE payloads SET raw_json = '', raw_ref = ? WHERE id = ?", updates)
+        conn.commit()
+        n_payloads += len(updates)
+
+    print(f"Compacted {n_events} event(s) and {n_payloads} payload(s).")
+    if text_bytes:
+        saved = text_bytes - blob_bytes
+        print(
+            f"Raw JSON: {_fmt_bytes(text_bytes)} inline -> {_fmt_bytes(blob_bytes)} in blobs "
+            f"(saved {_fmt_bytes(saved)}, {100.0 * saved / text_bytes:.0f}%)"
+        )
+
+    if args.vacuum:
+        conn.execute("VACUUM")
+        file_after = _db_file_bytes(conn)
+        print(f"DB file: {_fmt_bytes(file_before)} -> {_fmt_bytes(file_after)} after VACUUM")
+    elif n_events or n_payloads:
+        print("Run with --vacuum to return the freed pages to the filesystem.")
+
+    if raw_storage_mode() != "compressed":
+        print("Note: new rows are still stored inline; set TRACK17_RAW_STORAGE=compressed to keep them compact.")
+    return 0
+
+
+def _gc_candidates(
+    conn: sqlite3.Connection, *, keep_per_package: int, cutoff_iso: str, limit: int
+) -> List[int]:
+    """Payload ids that the retention policy allows deleting (oldest first, at most `limit`).
+
+    - beyond the newest `keep_per_package` payloads of a (number, carrier);
+    - older than the cutoff, if the package is delivered or archived;
+    - older than the cutoff, if the payload has no tracking number at all.
+    This is a read (it does not take the write lock).
+    """
+
+    rows = conn.execute(
+        """
+        SELECT id FROM (
+          SELECT id, ROW_NUMBER() OVER (PARTITION BY number, carrier ORDER BY id DESC) AS rn
+          FROM payloads
+          WHERE number IS NOT NULL
+        ) WHERE rn > ?
+        UNION
+        SELECT pl.id
+        FROM payloads pl
+        JOIN packages pk ON pk.number = pl.number AND pk.carrier = pl.carrier
+        WHERE pl.received_at < ?
+          AND (pk.archived = 1 OR lower(pk.last_status) = 'delivered' OR lower(pk.package_status) = 'delivered')
+        UNION
+        SELECT id FROM payloads WHERE number IS NULL AND received_at < ?
+        ORDER BY id
+        LIMIT ?
+        """,
+        (keep_per_package, cutoff_iso, cutoff_iso, limit),
+    ).fetchall()
+    return [int(r[0]) for r in rows]
+
+
+def _archive_payloads(conn: sqlite3.Connection, rows: Sequence[sqlite3.Row], archive_dir: pathlib.Path) -> None:
+    """Append rows to monthly gzip NDJSON files (payloads-YYYY-MM.ndjson.gz), flushed to disk."""
+
+    by_month: Dict[str, List[str]] = {}
+    for r in rows:
+        month = str(r["received_at"] or "")[:7] or "unknown"
+        rec = {k: r[k] for k in r.keys() if k not in ("raw_json", "raw_ref")}
+        rec["raw_json"] = load_payload_raw(conn, r["raw_json"], r["raw_ref"])
+        by_month.setdefault(month, []).append(json.dumps(rec, ensure_ascii=False, separators=(",", ":")))
+
+    archive_dir.mkdir(parents=True, exist_ok=True)
+    for month, lines in by_month.items():
+        # Appending a new gzip member keeps earlier runs' data readable as one stream.
+        with open(archive_dir / f"payloads-{month}.ndjson.gz", "ab") as fh:
+            with gzip.GzipFile(fileobj=fh, mode="wb") as gz:
+                gz.write(("\n".join(lines) + "\n").encode("utf-8"))
+            fh.flush()
+            os.fsync(fh.fileno())
+
+
+def gc_payloads(
+    conn: sqlite3.Connection,
+    *,
+    keep_per_package: int,
+    max_age_days: float,
+    max_rows: int,
+    batch_size: int = 500,
+    archive_dir: Optional[pathlib.Path] = None,
+    vacuum_pages: int = 1000,
+) -> Dict[str, int]:
+    """Apply the payload retention policy, deleting at most `max_rows` rows.
+
+    Deletes happen in short transactions of `batch_size` rows so the write lock
+    is never held for long; the blobs that deleted payloads referenced directly
+    are dropped when nothing else points at them. Ends with an incremental vacuum.
+    """
+
+    cutoff = (_dt.datetime.now(tz=_dt.timezone.utc) - _dt.timedelta(days=max_age_days)).replace(microsecond=0).isoformat()
+    ids = _gc_candidates(conn, keep_per_package=max(1, keep_per_package), cutoff_iso=cutoff, limit=max_rows)
+
+    stats = {"candidates": len(ids), "deleted": 0, "archived": 0, "blobs_deleted": 0, "pages_freed": 0}
+    for part in _chunked(ids, max(1, batch_size)):
+        qs = ",".join("?" * len(part))
+        rows = conn.execute(f"SELECT * FROM payloads WHERE id IN ({qs})", tuple(part)).fetchall()
+        if archive_dir is not None:
+            _archive_payloads(conn, rows, archive_dir)
+            stats["archived"] += len(rows)
+
+        refs = sorted({r["raw_ref"] for r in rows if r["raw_ref"]})
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            stats["deleted"] += conn.execute(f"DELETE FROM payloads WHERE id IN ({qs})", tuple(part)).rowcount
+            for ref in refs:
+                if conn.execute("SELECT 1 FROM payloads WHERE raw_ref = ? LIMIT 1", (ref,)).fetchone():
+                    continue
+                h = ref[len(_SKELETON_PREFIX) :] if ref.startswith(_SKELETON_PREFIX) else ref
+                if conn.execute("SELECT 1 FROM events WHERE raw_ref = ? LIMIT 1", (h,)).fetchone():
+                    continue
+                stats["blobs_deleted"] += conn.execute("DELETE FROM raw_blobs WHERE hash = ?", (h,)).rowcount
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+
+    if vacuum_pages > 0 and int(conn.execute("PRAGMA auto_vacuum").fetchone()[0]) == 2:
+        before = int(conn.execute("PRAGMA freelist_count").fetchone()[0])
+        # executescript steps the pragma to completion; execute() would free a single page.
+        conn.executescript(f"PRAGMA incremental_vacuum({int(vacuum_pages)});")
+        stats["pages_freed"] = before - int(conn.execute("PRAGMA freelist_count").fetchone()[0])
+
+    return stats
+
+
+def _gc_setting(value: Optional[float], option: str, env: str, default: float, cast: Any = float) -> Any:
+    """A gc option: the command-line value, else the env var, else the default (never negative)."""
+
+    source = option
+    if value is None:
+        raw = os.environ.get(env)
+        if not raw:
+            return cast(default)
+        source = env
+        try:
+            value = cast(raw)
+        except ValueError:
+            raise Track17Error(f"{env} must be a non-negative number, got {raw!r}")
+    if value < 0:
+        raise Track17Error(f"{source} must be a non-negative number, got {value!r}")
+    return value
+
+
+def cmd_gc(args: argparse.Namespace) -> int:
+    args.keep = _gc_setting(args.keep, "--keep", "TRACK17_GC_KEEP", 20, int)
+    args.max_age_days = _gc_setting(args.max_age_days, "--max-age-days", "TRACK17_GC_MAX_AGE_DAYS", 30)
+    args.changes_days = _gc_setting(args.changes_days, "--changes-days", "TRACK17_GC_CHANGES_DAYS", 90)
+
+    p = ensure_dirs()
+    conn = connect_db(p["db"])
+    init_db(conn)
+
+    if args.enable_incremental_vacuum:
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("VACUUM")
+        print("Enabled incremental auto-vacuum (rebuilt the DB once with VACUUM).")
+
+    archive_dir = None
+    if args.archive:
+        archive_dir = pathlib.Path(_expand(args.archive_dir)) if args.archive_dir else p["base"] / "archive"
+
+    stats = gc_payloads(
         conn,
+        keep_per_package=args.keep,
+        max_age_days=args.max_age_days,
+        max_rows=args.max_rows,
+        batch_size=args.batch_size,
+        archive_dir=archive_dir,
+        vacuum_pages=args.vacuum_pages,
+    )
+
+    print(
+        f"gc: deleted {stats['deleted']} payload(s) (policy: keep {args.keep}/package, "
+        f"{args.max_age_days:g} days for delivered/archived), {stats['blobs_deleted']} blob(s)."
+    )
+    if archive_dir is not None:
+        print(f"Archived {stats['archived']} payload(s) to {archive_dir}")
+    pruned = prune_changes(conn, max_age_days=args.changes_days, max_rows=args.max_rows)
+    if pruned:
+        print(f"Pruned {pruned} change-feed row(s) older than {args.changes_days:g} days.")
+    if int(conn.execute("PRAGMA auto_vacuum").fetchone()[0]) == 2:
+        print(f"Incremental vacuum freed {stats['pages_freed']} page(s).")
+    else:
+        print("Note: incremental vacuum is off for this DB; run `gc --enable-incremental-vacuum` once to turn it on.")
+    if stats["candidates"] >= args.max_rows:
+        print(f"Stopped at --max-rows {args.max_rows}; run gc again to continue.")
+    return 0
+
+
+def cmd_db_check(args: argparse.Namespace) -> int:
+    p = ensure_dirs()
+    conn = connect_db(p["db"])
+    start = schema_version(conn)
+    init_db(conn)
+    if start != SCHEMA_VERSION:
+        print(f"Migrated schema: v{start} -> v{SCHEMA_VERSION}")
+    print(f"Schema version: v{schema_version(conn)}")
+
+    failed = 0
+    for name, plan, problems in explain_hot_queries(conn):
+        print(f"{'FAIL' if problems else 'ok':<4}  {name}")
+        if problems or args.verbose:
+            for line in plan:
+                print(f"        {line}")
+        failed += 1 if problems else 0
+
+    if failed:
+        print(f"{failed} hot query(ies) are not fully served by an index.")
+        return 1
+    print("All hot queries use an index.")
+    return 0
+
+
+def cmd_quota(args: argparse.Namespace) -> int:
+    p = ensure_dirs()
+    if not args.local:
+        resp = api_getquota()
+        code = resp.get("code")
+        if code not in (0, "0"):
+            raise Track17Error(f"17TRACK API error code: {code} ({resp})")
+        data = resp.get("data") or {}
+        print(json.dumps(data, indent=2, ensure_ascii=False))
+        _BUDGET.seed(data)
+
+    st = _BUDGET.status()
+    if not st["seeded"]:
+        print("Quota budget not seeded yet (run `track17 quota` without --local).")
+        return 0
+
+    conn = connect_db(p["db"])
+    init_db(conn)
+    now = _utc_now_iso()
+    due = conn.execute("SELECT COUNT(*) FROM packages WHERE archived = 0 AND next_poll_at <= ?", (now,)).fetchone()[0]
+    unregistered = conn.execute("SELECT COUNT(*) FROM packages WHERE archived = 0 AND api_registered = 0").fetchone()[0]
+
+    print(
+        f"Budget for {st['day']} (UTC): {st['spent']:g} of {st['budget']:g} unit(s) spent since {st['seeded_at']}, "
+        f"{st['tokens']:g} available now, refilling {st['refill_per_hour']:g}/h."
+    )
+    if st["throttling"]:
+        print("Throttling: calls that cost quota are refused until enough units accrue.")
+    if st["projected_exhaustion"]:
+        print(f"At the current burn rate ({st['burn_per_hour']:g}/h) the daily quota runs out at {st['projected_exhaustion']}.")
+    print(
+        f"Queued work: {due} package(s) due for polling, {unregistered} not yet registered, "
+        f"{st['deferred']:g} unit(s) of calls deferred today."
+    )
+    return 0
+
+
+def _iter_carrier_records(data: Any) -> Iterable[Tuple[Any, str]]:
+    """Yield (code, name) from the downloaded carrier list.
+
+    The carrier JSON schema is not documented in detail; accept a top-level list
+    or {"data": [...]}, and the field names seen in the wild.
+    """
+
+    if isinstance(data, dict):
+        data = data.get("data") if isinstance(data.get("data"), list) else None
+    if not isinstance(data, list):
+        return
+    for item in data:
+        if not isinstance(item, dict):
+            continue
+        name = str(item.get("name") or item.get("_name") or item.get("en") or item.get("cn") or "")
+        code = item.get("key") or item.get("code") or item.get("id")
+        if code is None and not name:
+            continue
+        yield code, name
+
+
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+
+
+def _norm_text(text: str) -> str:
+    return _NON_ALNUM.sub(" ", text.lower()).strip()
+
+
+def _trigrams(text: str) -> set:
+    padded = f"  {text} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+class CarrierIndex:
+    """Search index over the carrier list.
+
+    - `tokens`: sorted (token, carrier idx) pairs from names and codes; prefix
+      lookups are a bisect range over it (a flattened trie).
+    - `grams`: trigram -> carrier idxs, for typo-tolerant fuzzy ranking.
+    Built once from carriers.json and pickled next to it; `load()` reuses the
+    pickle while the source's mtime/size (or, failing that, content hash) match.
+    """
+
+    VERSION = 1
+
+    def __init__(self, records: Iterable[Tuple[Any, str]], *, source_sig: Tuple[int, int, str] = (0, 0, "")):
+        self.source_sig = source_sig
+        self.codes: List[Any] = []
+        self.names: List[str] = []
+        self.norm_names: List[str] = []
+        self.gram_counts: List[int] = []
+        self.by_code: Dict[str, int] = {}
+        token_pairs: List[Tuple[str, int]] = []
+        grams: Dict[str, List[int]] = {}
+
+        for code, name in records:
+            idx = len(self.codes)
+            norm = _norm_text(name)
+            self.codes.append(code)
+            self.names.append(name)
+            self.norm_names.append(norm)
+            if code is not None:
+                self.by_code[str(code)] = idx
+                token_pairs.append((str(code), idx))
+            for tok in set(norm.split()):
+                token_pairs.append((tok, idx))
+            tri = _trigrams(norm)
+            self.gram_counts.append(len(tri))
+            for g in tri:
+                grams.setdefault(g, []).append(idx)
+
+        token_pairs.sort()
+        self.tokens = [t for t, _ in token_pairs]
+        self.token_ids = [i for _, i in token_pairs]
+        self.grams = {g: tuple(ids) for g, ids in grams.items()}
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    @staticmethod
+    def _source_sig(src: pathlib.Path, *, with_hash: bool) -> Tuple[int, int, str]:
+        st = src.stat()
+        digest = _sha256_hex(src.read_bytes()) if with_hash else ""
+        return st.st_mtime_ns, st.st_size, digest
+
+    @classmethod
+    def build(cls, src: pathlib.Path, cache_path: Optional[pathlib.Path] = None) -> "CarrierIndex":
+        raw = src.read_bytes()
+        st = src.stat()
+        try:
+            data = json.loads(raw.decode("utf-8"))
+        except Exception as e:
+            raise Track17Error(f"Carrier cache is not valid JSON ({src}): {e}") from e
+        index = cls(_iter_carrier_records(data), source_sig=(st.st_mtime_ns, st.st_size, _sha256_hex(raw)))
+        if cache_path is not None:
+            tmp = cache_path.with_suffix(".tmp")
+            tmp.write_bytes(pickle.dumps((cls.VERSION, index), protocol=pickle.HIGHEST_PROTOCOL))
+            tmp.replace(cache_path)
+        return index
+
+    @classmethod
+    def load(cls, src: pathlib.Path, cache_path: pathlib.Path) -> "CarrierIndex":
+        try:
+            version, index = pickle.loads(cache_path.read_bytes())
+        except Exception:
+            return cls.build(src, cache_path)
+        if version != cls.VERSION or not isinstance(index, cls):
+            return cls.build(src, cache_path)
+
+        mtime_ns, size, digest = cls._source_sig(src, with_hash=False)
+        if (mtime_ns, size) == index.source_sig[:2]:
+            return index
+        # Touched but possibly unchanged (e.g. re-downloaded): compare content before rebuilding.
+        if size == index.source_sig[1] and cls._source_sig(src, with_hash=True)[2] == index.source_sig[2]:
+            index.source_sig = (mtime_ns, size, index.source_sig[2])
+            cache_path.write_bytes(pickle.dumps((cls.VERSION, index), protocol=pickle.HIGHEST_PROTOCOL))
+            return index
+        return cls.build(src, cache_path)
+
+    def _prefix_ids(self, prefix: str) -> Iterable[Tuple[str, int]]:
+        lo = bisect.bisect_left(self.tokens, prefix)
+        hi = bisect.bisect_left(self.tokens, prefix + "\uffff", lo)
+        for i in range(lo, hi):
+            yield self.tokens[i], self.token_ids[i]
+
+    def search(self, query: str, limit: int = 50) -> List[Tuple[float, Any, str]]:
+        """Ranked (score, code, name) matches: exact code/name, token prefixes, then trigram similarity."""
+
+        q = _norm_text(query)
+        if not q:
+            return []
+        q_tokens = q.split()
+        scores: Dict[int, float] = {}
+
+        def bump(idx: int, amount: float) -> None:
+            scores[idx] = scores.get(idx, 0.0) + amount
+
+        exact = self.by_code.get(query.strip())
+        if exact is not None:
+            bump(exact, 100.0)
+
+        # Token prefixes: every query token should prefix some token of the name.
+        for tok in q_tokens:
+            hit: Dict[int, float] = {}
+            for t, idx in self._prefix_ids(tok):
+                hit[idx] = max(hit.get(idx, 0.0), 4.0 if t == tok else 2.0)
+            for idx, amount in hit.items():
+                bump(idx, amount)
+
+        # Trigram similarity (Dice coefficient) for typos and partial words.
+        q_grams = _trigrams(q)
+        overlap: Dict[int, int] = {}
+        for g in q_grams:
+            for idx in self.grams.get(g, ()):
+                overlap[idx] = overlap.get(idx, 0) + 1
+        for idx, n in overlap.items():
+            dice = 2.0 * n / (len(q_grams) + self.gram_counts[idx])
+            if dice >= 0.3 or idx in scores:
+                bump(idx, 3.0 * dice)
+
+        for idx in scores:
+            name = self.norm_names[idx]
+            if name == q:
+                scores[idx] += 10.0
+            elif name.startswith(q):
+                scores[idx] += 3.0
+            elif q in name:
+                scores[idx] += 1.0
+
+        ranked = sorted(scores.items(), key=lambda kv: (-kv[1], len(self.names[kv[0]]), kv[0]))
+        return [(round(score, 3), self.codes[idx], self.names[idx]) for idx, score in ranked[:limit]]
+
+
+def load_carrier_index(p: Dict[str, pathlib.Path]) -> Optional[CarrierIndex]:
+    """The local carrier index, or None if carriers.json was never downloaded."""
+
+    if not p["carriers"].exists():
+        return None
+    return CarrierIndex.load(p["carriers"], p["carriers_index"])
+
+
+def suggest_carrier(
+    p: Dict[str, pathlib.Path], name: str, index: Optional[CarrierIndex] = None
+) -> Tuple[Optional[Any], List[Tuple[float, Any, str]]]:
+    """Resolve a carrier name locally: (code if the top match is unambiguous, top matches).
+
+    Pass an already loaded `index` when resolving many names.
+    """
+
+    index = index or load_carrier_index(p)
+    if index is None:
+        raise Track17Error("Carrier cache not found. Run: track17 carriers-update")
+    matches = index.search(name, limit=5)
+    if not matches:
+        return None, []
+    if len(matches) == 1 or matches[0][0] >= matches[1][0] * 1.25:
+        return matches[0][1], matches
+    return None, matches
+
+
+def cmd_carriers_update(args: argparse.Namespace) -> int:
+    p = ensure_dirs()
+    dest = p["carriers"]
+
+    try:
+        with urllib.request.urlopen(CARRIERS_URL, timeout=30) as resp:
+            body = resp.read()
+    except Exception as e:
+        raise Track17Error(f"Failed to download carrier list: {e}") from e
+
+    dest.write_bytes(body)
+    index = CarrierIndex.build(dest, p["carriers_index"])
+    print(f"Saved carrier list to {dest} ({len(index)} carriers indexed)")
+    return 0
+
+
+def cmd_carriers_search(args: argparse.Namespace) -> int:
+    p = ensure_dirs()
+    t0 = time.perf_counter()
+    index = load_carrier_index(p)
+    if index is None:
+        print("Carrier cache not found. Run: track17 carriers-update")
+        return 2
+    t1 = time.perf_counter()
+    matches = index.search(args.query, limit=args.limit)
+    t2 = time.perf_counter()
+
+    if args.json:
+        print(json.dumps([{"code": c, "name": n, "score": sc} for sc, c, n in matches], indent=2, ensure_ascii=False))
+        return 0
+
+    if not matches:
+        print("No carrier matches.")
+        return 0
+
+    print(f"Top {len(matches)} carrier match(es):")
+    for score, code, name in matches:
+        print(f"- {code}: {name}" + (f"  (score {score:g})" if args.verbose else ""))
+    if args.verbose:
+        print(f"Index load {1000 * (t1 - t0):.2f} ms, lookup {1000 * (t2 - t1):.3f} ms over {len(index)} carriers.")
+    return 0
+
+
+def parse_webhook_payload(raw_body: bytes) -> Dict[str, Any]:
+    try:
+        return json.loads(raw_body.decode("utf-8"))
+    except Exception as e:
+        raise Track17Error(f"Invalid JSON payload: {e}") from e
+
+
+def ingest_payload(
+    conn: sqlite3.Connection,
+    *,
+    raw_body: bytes,
+    headers: Optional[Dict[str, str]] = None,
+    source: str,
+    secret: Optional[str],
+    seen: Optional[PayloadSeenCache] = None,
+) -> Tuple[bool, str]:
+    """Ingest a webhook (or webhook-like) payload.
+
+    Exact duplicates (same body SHA256) are detected before the JSON is parsed
+    and skipped entirely. Otherwise the payload row (signature verdict and
+    extracted basics included) and the package update are written with a
+    single commit, and rolled back together if any step fails. Pass a
+    PayloadSeenCache when ingesting many payloads on one connection.
+    """
+
+    headers = headers or {}
+    payload_sha = _sha256_hex(raw_body)
+
+    if seen is not None:
+        duplicate = seen.seen(conn, payload_sha)
+    else:
+        duplicate = conn.execute(SQL_PAYLOAD_SEEN, (payload_sha,)).fetchone() is not None
+    if duplicate:
+        return False, f"Duplicate payload {payload_sha[:12]} (already ingested)"
+
+    sig_pair = guess_signature_header(headers)
+    sig_header_name = sig_pair[0] if sig_pair else None
+    sig_value = sig_pair[1] if sig_pair else None
+
+    sig_valid: Optional[bool] = None
+    if secret and sig_value:
+        expected = compute_webhook_signature(raw_body, secret)
+        sig_valid = expected.lower() == sig_value.lower()
+
+    payload_fields: Dict[str, Any] = dict(
+        sha=payload_sha,
         raw_body=raw_body,
         source=source,
         event_type=None,
@@ -1249,36 +3988,71 @@ def ingest_payload(
         signature_valid=sig_valid,
     )
 
-    payload = parse_webhook_payload(raw_body)
+    try:
+        payload = parse_webhook_payload(raw_body)
+    except Track17Error:
+        # Keep the raw body for later inspection, then report the parse error.
+        _insert_payload(conn, **payload_fields)
+        conn.commit()
+        raise
 
     # 17TRACK webhook structure: { event: "TRACKING_UPDATED", data: {...} }
-    event_type = payload.get("event")
-    data = payload.get("data")
+    event_type = payload.get("event") if isinstance(payload, dict) else None
+    data = payload.get("data") if isinstance(payload, dict) else None
 
-    # Update payload record with extracted basics (best-effort)
-    number = None
-    carrier = None
+    # Record extracted basics (best-effort)
     if isinstance(data, dict):
-        number = data.get("number")
-        carrier = data.get("carrier")
-
-    conn.execute(
-        "UPDATE payloads SET event_type=?, number=?, carrier=? WHERE sha256=?",
-        (event_type, number, carrier, payload_sha),
-    )
+        payload_fields["number"] = data.get("number")
+        payload_fields["carrier"] = data.get("carrier")
+    payload_fields["event_type"] = event_type
+
+    # The payload row and the package update land together or not at all: a
+    # payload row left behind by a failed update would turn every redelivery
+    # into a "duplicate" and lose the update for good.
+    changed, summary = False, ""
+    conn.execute("SAVEPOINT ingest_payload")
+    try:
+        inserted = _insert_payload(conn, **payload_fields)
+        if inserted and isinstance(data, dict):
+            changed, summary = _apply_webhook_data(conn, data, payload_sha, source)
+        conn.execute("RELEASE ingest_payload")
+    except BaseException:
+        # SQLite may already have rolled the whole transaction back (e.g. SQLITE_FULL).
+        if conn.in_transaction:
+            conn.execute("ROLLBACK TO ingest_payload")
+            conn.execute("RELEASE ingest_payload")
+        raise
     conn.commit()
 
+    if not inserted:
+        # Another consumer stored it since our check.
+        return False, f"Duplicate payload {payload_sha[:12]} (already ingested)"
+    if seen is not None:
+        seen.add(conn, payload_sha)
     if not isinstance(data, dict):
         return False, f"Stored payload {payload_sha} (no data object)"
 
+    if secret and sig_value:
+        validity = "valid" if sig_valid else "INVALID"
+        summary = f"[{validity} signature via {sig_header_name}] " + summary
+    elif secret and not sig_value:
+        summary = "[no signature header] " + summary
+
+    return changed, summary
+
+
+def _apply_webhook_data(
+    conn: sqlite3.Connection, data: Dict[str, Any], payload_sha: str, source: str
+) -> Tuple[bool, str]:
+    """Apply a webhook's data object to its package (created if unknown), without committing."""
+
     number_s = _normalise_number(str(data.get("number") or ""))
     carrier_i = int(data.get("carrier") or 0)
     tag = str(data.get("tag") or "")
     param = str(data.get("param") or "")
 
-    # Ensure package exists
     pkg = conn.execute(
-        "SELECT * FROM packages WHERE number=? AND carrier=? AND param=? ORDER BY id DESC LIMIT 1",
+        SQL_INGEST_RESOLVE,
         (number_s, carrier_i, param),
     ).fetchone()
 
@@ -1292,30 +4066,15 @@ def ingest_payload(
             tag=tag,
             lang=os.environ.get("TRACK17_LANG") or "en",
             api_registered=True,
+            commit=False,
         )
 
     # Use the data object as the response item; it includes track_info.
-    changed, summary = apply_update_from_trackinfo(
-        conn,
-        package_row=pkg,
-        response_item=data,
-        raw_payload_sha=payload_sha,
-        source=source,
-    )
-
-    if secret and sig_value:
-        validity = "valid" if sig_valid else "INVALID"
-        summary = f"[{validity} signature via {sig_header_name}] " + summary
-    elif secret and not sig_value:
-        summary = "[no signature header] " + summary
-
-    return changed, summary
+    return apply_trackinfo_updates(conn, [(pkg, data, payload_sha)], source=source, commit=False)[0]
 
 
 def cmd_ingest_webhook(args: argparse.Namespace) -> int:
-    p = ensure_dirs()
-    conn = connect_db(p["db"])
-    init_db(conn)
+    router = ShardRouter(ensure_dirs())
 
     raw_body: bytes
     if args.file:
@@ -1325,28 +4084,42 @@ def cmd_ingest_webhook(args: argparse.Namespace) -> int:
 
     secret = args.secret or os.environ.get("TRACK17_WEBHOOK_SECRET")
 
-    changed, summary = ingest_payload(conn, raw_body=raw_body, headers={}, source="webhook", secret=secret)
+    changed, summary = router.ingest(raw_body=raw_body, headers={}, source="webhook", secret=secret)
 
     print(summary)
     return 0
 
 
-def cmd_process_inbox(args: argparse.Namespace) -> int:
-    p = ensure_dirs()
-    conn = connect_db(p["db"])
-    init_db(conn)
+def _spool_backend(args: argparse.Namespace) -> str:
+    backend = (getattr(args, "spool", None) or os.environ.get("TRACK17_SPOOL") or "sqlite").lower()
+    if backend not in ("sqlite", "dir"):
+        raise Track17Error(f"Unknown spool backend: {backend} (expected 'sqlite' or 'dir')")
+    return backend
 
-    secret = args.secret or os.environ.get("TRACK17_WEBHOOK_SECRET")
 
-    inbox = p["inbox"]
-    files = sorted([f for f in inbox.glob("*.json") if f.is_file()])
-    if not files:
-        print("Inbox is empty.")
-        return 0
+# A worker moves an inbox file to failed/ (and process-inbox/worker move a queued
+# payload to the queue's inbox_failed table) once it has failed this many times.
+INBOX_MAX_ATTEMPTS = 3
 
-    changed_count = 0
-    summaries: List[str] = []
 
+def _process_inbox_dir(
+    router: ShardRouter,
+    p: Dict[str, pathlib.Path],
+    secret: Optional[str],
+    summaries: List[str],
+    failures: Optional[Dict[str, int]] = None,
+) -> Tuple[int, int]:
+    """Ingest file-per-payload spool entries; returns (ingested, changed).
+
+    Files that fail stay in the inbox and are not counted. With `failures` (the
+    worker's per-file failure counts), a file is moved to failed/ after
+    INBOX_MAX_ATTEMPTS failures instead of being retried forever.
+    """
+
+    inbox = p["inbox"]
+    files = sorted([f for f in inbox.glob("*.json") if f.is_file() and not f.name.endswith(".headers.json")])
+
+    ingested = changed_count = 0
     for f in files:
         raw = f.read_bytes()
         # We store headers separately in a sidecar .headers.json (optional)
@@ -1359,7 +4132,7 @@ def cmd_process_inbox(args: argparse.Namespace) -> int:
                 headers = {}
 
         try:
-            changed, summary = ingest_payload(conn, raw_body=raw, headers=headers, source="webhook", secret=secret)
+            changed, summary = router.ingest(raw_body=raw, headers=headers, source="webhook", secret=secret, seen=True)
             if changed:
                 changed_count += 1
                 summaries.append(summary)
@@ -1371,8 +4144,107 @@ def cmd_process_inbox(args: argparse.Namespace) -> int:
                 sidecar.rename(p["processed"] / sidecar.name)
         except Exception as e:
             print(f"Failed to process {f.name}: {e}")
+            if failures is not None:
+                failures[f.name] = failures.get(f.name, 0) + 1
+                if failures[f.name] >= INBOX_MAX_ATTEMPTS:
+                    _quarantine_inbox_file(p, f, sidecar)
+                    del failures[f.name]
+            continue
+        ingested += 1
+        if failures:
+            failures.pop(f.name, None)
+
+    return ingested, changed_count
+
+
+def _quarantine_inbox_file(p: Dict[str, pathlib.Path], f: pathlib.Path, sidecar: pathlib.Path) -> None:
+    p["failed"].mkdir(parents=True, exist_ok=True)
+    try:
+        f.rename(p["failed"] / f.name)
+        if sidecar.exists():
+            sidecar.rename(p["failed"] / sidecar.name)
+    except OSError as e:
+        print(f"Could not move {f.name} to {p['failed']}: {e}")
+        return
+    print(f"Moved {f.name} to {p['failed']} after {INBOX_MAX_ATTEMPTS} failed attempts.")
 
-    print(f"Processed {len(files)} inbox payload(s). Updated {changed_count} package(s).")
+
+def _process_inbox_queue(
+    router: ShardRouter,
+    queue: "SpoolQueue",
+    secret: Optional[str],
+    batch_size: int,
+    summaries: List[str],
+    *,
+    after_id: int = 0,
+) -> Tuple[int, int, int]:
+    """Drain the SQLite spool in id order, acking each batch at once.
+
+    Returns (ingested, changed, last id seen); pass the last id back as
+    `after_id` to resume without revisiting entries that failed. A failed
+    entry stays queued until it has failed INBOX_MAX_ATTEMPTS times (counted
+    in the queue, so across runs), then moves to the queue's inbox_failed table.
+    """
+
+    processed = 0
+    changed_count = 0
+    while True:
+        batch = queue.read_batch(after_id=after_id, limit=batch_size)
+        if not batch:
+            break
+        done: List[int] = []
+        for item_id, raw, headers in batch:
+            after_id = item_id
+            try:
+                changed, summary = router.ingest(
+                    raw_body=raw, headers=headers, source="webhook", secret=secret, seen=True
+                )
+            except Exception as e:
+                print(f"Failed to process queued payload #{item_id}: {e}")
+                # Left queued (retried on the next run) until it has failed too often.
+                if queue.fail(item_id, str(e), max_attempts=INBOX_MAX_ATTEMPTS):
+                    print(f"Moved queued payload #{item_id} to inbox_failed after {INBOX_MAX_ATTEMPTS} failed attempts.")
+                continue
+            done.append(item_id)
+            if changed:
+                changed_count += 1
+                summaries.append(summary)
+        queue.ack(done)
+        processed += len(done)
+    return processed, changed_count, after_id
+
+
+def cmd_process_inbox(args: argparse.Namespace) -> int:
+    p = ensure_dirs()
+    router = ShardRouter(p)
+
+    secret = args.secret or os.environ.get("TRACK17_WEBHOOK_SECRET")
+    backend = _spool_backend(args)
+
+    summaries: List[str] = []
+    processed = changed_count = waiting = 0
+    if backend == "sqlite":
+        queue = SpoolQueue(p["queue"])
+        try:
+            processed, changed_count, _ = _process_inbox_queue(router, queue, secret, max(1, args.batch_size), summaries)
+            waiting = queue.depth()
+        finally:
+            queue.close()
+
+    # Always sweep the directory too, so payloads spooled before switching backends are not stranded.
+    n, c = _process_inbox_dir(router, p, secret, summaries)
+    processed += n
+    changed_count += c
+    waiting += _spool_backlog(None, p["inbox"])
+
+    if not processed:
+        if waiting:
+            print(f"Ingested nothing; {waiting} payload(s) failed and stay queued for the next run.")
+        else:
+            print("Inbox is empty.")
+        return 0
+
+    print(f"Processed {processed} inbox payload(s). Updated {changed_count} package(s).")
     for s in summaries[:20]:
         print(f"- {s}")
     if len(summaries) > 20:
@@ -1381,11 +4253,495 @@ def cmd_process_inbox(args: argparse.Namespace) -> int:
     return 0
 
 
+class SpoolQueue:
+    """Durable webhook spool backed by a WAL-mode SQLite table.
+
+    Lives in its own DB file so the receiver never waits on the main DB's write
+    lock. Enqueue is a single INSERT plus a rowid-range DELETE that enforces the
+    size bound (keep the newest `max_items`), so neither depends on backlog size.
+    Safe to share between request threads.
+
+    A payload that fails to ingest stays queued with its attempt count bumped
+    (see fail); after INBOX_MAX_ATTEMPTS it moves to the inbox_failed table.
+    """
+
+    def __init__(self, path: pathlib.Path, *, max_items: int = 5000):
+        self.path = path
+        self.max_items = max_items
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode = WAL;")
+        self._conn.execute("PRAGMA synchronous = NORMAL;")
+        self._conn.execute("PRAGMA busy_timeout = 5000;")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS inbox (
+              id INTEGER PRIMARY KEY AUTOINCREMENT,
+              received_at TEXT NOT NULL,
+              headers_json TEXT NOT NULL,
+              body BLOB NOT NULL,
+              attempts INTEGER NOT NULL DEFAULT 0
+            )
+            """
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(inbox)")}
+        if "attempts" not in columns:
+            # Queue files created before attempts were counted.
+            self._conn.execute("ALTER TABLE inbox ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS inbox_failed (
+              id INTEGER PRIMARY KEY,
+              received_at TEXT NOT NULL,
+              failed_at TEXT NOT NULL,
+              attempts INTEGER NOT NULL,
+              error TEXT NOT NULL,
+              headers_json TEXT NOT NULL,
+              body BLOB NOT NULL
+            )
+            """
+        )
+
+    def enqueue(self, raw_body: bytes, headers: Dict[str, str]) -> Tuple[int, int]:
+        """Append a payload; returns (queue id, number of evicted entries)."""
+
+        return self.enqueue_many([(raw_body, headers)])
+
+    def enqueue_many(self, items: Sequence[Tuple[bytes, Dict[str, str]]]) -> Tuple[int, int]:
+        """Append payloads in one transaction; returns (last queue id, number of evicted entries)."""
+
+        now = _utc_now_iso()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                item_id = 0
+                for raw_body, headers in items:
+                    cur = self._conn.execute(
+                        "INSERT INTO inbox (received_at, headers_json, body) VALUES (?, ?, ?)",
+                        (now, json.dumps(headers), sqlite3.Binary(raw_body)),
+                    )
+                    item_id = int(cur.lastrowid or 0)
+                evicted = self._conn.execute("DELETE FROM inbox WHERE id <= ?", (item_id - self.max_items,)).rowcount
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return item_id, max(0, evicted)
+
+    def read_batch(self, *, after_id: int = 0, limit: int = 200) -> List[Tuple[int, bytes, Dict[str, str]]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, headers_json, body FROM inbox WHERE id > ? ORDER BY id LIMIT ?",
+                (after_id, limit),
+            ).fetchall()
+        out: List[Tuple[int, bytes, Dict[str, str]]] = []
+        for item_id, headers_json, body in rows:
+            try:
+                headers = json.loads(headers_json)
+            except Exception:
+                headers = {}
+            out.append((int(item_id), bytes(body), headers))
+        return out
+
+    def ack(self, ids: Sequence[int]) -> None:
+        if not ids:
+            return
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                for part in _chunked(list(ids)):
+                    qs = ",".join("?" * len(part))
+                    self._conn.execute(f"DELETE FROM inbox WHERE id IN ({qs})", tuple(part))
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def fail(self, item_id: int, error: str, *, max_attempts: int = 0) -> bool:
+        """Count a failed ingest of `item_id`; returns True if it was moved to inbox_failed.
+
+        max_attempts=0 only counts (the entry stays queued however often it fails).
+        """
+
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute("UPDATE inbox SET attempts = attempts + 1 WHERE id = ?", (item_id,))
+                moved = 0
+                if max_attempts > 0:
+                    moved = self._conn.execute(
+                        """
+                        INSERT INTO inbox_failed (id, received_at, failed_at, attempts, error, headers_json, body)
+                        SELECT id, received_at, ?, attempts, ?, headers_json, body
+                        FROM inbox WHERE id = ? AND attempts >= ?
+                        """,
+                        (_utc_now_iso(), error, item_id, max_attempts),
+                    ).rowcount
+                    if moved:
+                        self._conn.execute("DELETE FROM inbox WHERE id = ?", (item_id,))
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return moved > 0
+
+    def depth(self) -> int:
+        with self._lock:
+            return int(self._conn.execute("SELECT COUNT(*) FROM inbox").fetchone()[0])
+
+    def failed_count(self) -> int:
+        with self._lock:
+            return int(self._conn.execute("SELECT COUNT(*) FROM inbox_failed").fetchone()[0])
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class _InotifyWatcher:
+    """Minimal inotify(7) wrapper (Linux, via ctypes) used by the worker to sleep until files change.
+
+    `watches` maps a directory to the filename prefixes that should wake us.
+    Use `create()`, which returns None where inotify is unavailable.
+    """
+
+    _IN_MODIFY = 0x002
+    _IN_CLOSE_WRITE = 0x008
+    _IN_MOVED_TO = 0x080
+    _IN_CREATE = 0x100
+    _EVENT = struct.Struct("iIII")
+
+    def __init__(self, watches: Dict[pathlib.Path, Tuple[str, ...]]):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._prefixes: Dict[int, Tuple[str, ...]] = {}
+        mask = self._IN_MODIFY | self._IN_CLOSE_WRITE | self._IN_MOVED_TO | self._IN_CREATE
+        for path, prefixes in watches.items():
+            wd = libc.inotify_add_watch(self._fd, os.fsencode(str(path)), mask)
+            if wd < 0:
+                err = ctypes.get_errno()
+                os.close(self._fd)
+                raise OSError(err, f"inotify_add_watch failed for {path}")
+            self._prefixes[wd] = prefixes
+
+    @classmethod
+    def create(cls, watches: Dict[pathlib.Path, Tuple[str, ...]]) -> Optional["_InotifyWatcher"]:
+        if not sys.platform.startswith("linux"):
+            return None
+        try:
+            return cls(watches)
+        except (OSError, AttributeError):
+            return None
+
+    def wait(self, timeout: float) -> bool:
+        """Block until a relevant change (True) or the timeout (False)."""
+
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            ready, _, _ = select.select([self._fd], [], [], remaining)
+            if not ready:
+                return False
+            try:
+                buf = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                continue
+            off = 0
+            hit = False
+            while off + self._EVENT.size <= len(buf):
+                wd, _mask, _cookie, length = self._EVENT.unpack_from(buf, off)
+                name = buf[off + self._EVENT.size : off + self._EVENT.size + length].rstrip(b"\0").decode("utf-8", "replace")
+                off += self._EVENT.size + length
+                if name.startswith(self._prefixes.get(wd, ())):
+                    hit = True
+            if hit:
+                return True
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+
+def _raise_keyboard_interrupt(signum: int, frame: Any) -> None:
+    raise KeyboardInterrupt
+
+
+def cmd_worker(args: argparse.Namespace) -> int:
+    p = ensure_dirs()
+    # Schema setup happens once; the connections (and sqlite3's statement caches) live for the whole run.
+    router = ShardRouter(p)
+
+    secret = args.secret or os.environ.get("TRACK17_WEBHOOK_SECRET")
+    backend = _spool_backend(args)
+    batch_size = max(1, args.batch_size)
+    queue = SpoolQueue(p["queue"]) if backend == "sqlite" else None
+
+    watches: Dict[pathlib.Path, Tuple[str, ...]] = {p["inbox"]: ("",)}
+    if queue is not None:
+        watches = {p["base"]: (p["queue"].name,)}
+    watcher = None if args.poll else _InotifyWatcher.create(watches)
+
+    signal.signal(signal.SIGTERM, _raise_keyboard_interrupt)
+    mode = "inotify" if watcher else f"polling every {args.poll_interval:g}s"
+    print(f"track17 worker started ({backend} spool, {mode}). Press Ctrl+C to stop.", flush=True)
+
+    cursor = 0
+    dir_failures: Dict[str, int] = {}
+    sweep_dir = True  # pick up legacy files once at startup, then only in dir mode
+    try:
+        while True:
+            t0 = time.monotonic()
+            summaries: List[str] = []
+            processed = changed = 0
+            if queue is not None:
+                processed, changed, cursor = _process_inbox_queue(
+                    router, queue, secret, batch_size, summaries, after_id=cursor
+                )
+            if sweep_dir or queue is None:
+                n, c = _process_inbox_dir(router, p, secret, summaries, dir_failures)
+                processed += n
+                changed += c
+                sweep_dir = False
+
+            if processed:
+                print(
+                    f"Ingested {processed} payload(s) in {time.monotonic() - t0:.3f}s; "
+                    f"updated {changed} package(s).",
+                    flush=True,
+                )
+                for s in summaries:
+                    print(f"- {s}", flush=True)
+
+            if args.once:
+                break
+            if processed:
+                # More may have landed while we were busy; check again before sleeping.
+                continue
+            # Idle: revisit queued payloads that failed, once per wake-up, until
+            # they succeed or reach INBOX_MAX_ATTEMPTS.
+            cursor = 0
+            if watcher is not None:
+                # The timeout doubles as a safety-net poll in case an event is missed.
+                if watcher.wait(max(args.poll_interval, 30.0)):
+                    # inotify fires on the spooler's first write, possibly before its commit is
+                    # visible; a short pause also lets a burst coalesce into one micro-batch.
+                    time.sleep(0.02)
+            else:
+                time.sleep(args.poll_interval)
+    except KeyboardInterrupt:
+        print("Worker stopped.")
+    finally:
+        if watcher is not None:
+            watcher.close()
+        if queue is not None:
+            queue.close()
+        router.close()
+
+    return 0
+
+
+class _Histogram:
+    """Fixed-bucket histogram with Prometheus `le` semantics; observe() is one bisect and three adds."""
+
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-quantile (0.0 when empty, inf past the last bucket)."""
+
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        acc = 0
+        for bound, n in zip(self.bounds, self.counts):
+            acc += n
+            if acc >= rank:
+                return bound
+        return float("inf")
+
+    def render(self, name: str, help_text: str) -> List[str]:
+        lines = [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+        acc = 0
+        for bound, n in zip(self.bounds, self.counts):
+            acc += n
+            lines.append(f'{name}_bucket{{le="{bound:g}"}} {acc}')
+        lines.append(f'{name}_bucket{{le="+Inf"}} {self.count}')
+        lines.append(f"{name}_sum {self.sum:.6g}")
+        lines.append(f"{name}_count {self.count}")
+        return lines
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "p50": self.quantile(0.5),
+            "p99": self.quantile(0.99),
+        }
+
+
+class WebhookMetrics:
+    """Receiver counters and histograms, served as GET /metrics (Prometheus text) and GET /stats (JSON).
+
+    Recording costs a lock and a few integer adds per request. Anything that
+    touches the disk (the spool backlog) is only computed when scraped, and the
+    signature check runs after the response has been sent.
+    """
+
+    LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+    SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.started = time.time()
+        self.requests: Dict[Tuple[str, int], int] = {}
+        self.signatures = {"valid": 0, "invalid": 0, "missing": 0, "unchecked": 0}
+        self.evictions = 0
+        self.spool_errors = 0
+        self.request_seconds = _Histogram(self.LATENCY_BUCKETS)
+        self.body_bytes = _Histogram(self.SIZE_BUCKETS)
+        self.spool_seconds = _Histogram(self.LATENCY_BUCKETS)
+
+    def observe_request(self, method: str, code: int, seconds: Optional[float] = None, body_len: Optional[int] = None) -> None:
+        key = (method, code)
+        with self._lock:
+            self.requests[key] = self.requests.get(key, 0) + 1
+            if seconds is not None:
+                self.request_seconds.observe(seconds)
+            if body_len is not None:
+                self.body_bytes.observe(body_len)
+
+    def observe_spool(self, seconds: float, *, signatures: Sequence[str] = (), evicted: int = 0) -> None:
+        with self._lock:
+            self.spool_seconds.observe(seconds)
+            self.evictions += evicted
+            for verdict in signatures:
+                self.signatures[verdict] += 1
+
+    def spool_failed(self, n: int = 1) -> None:
+        with self._lock:
+            self.spool_errors += n
+
+    def snapshot(self, gauges: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+        with self._lock:
+            out: Dict[str, Any] = {
+                "uptime_seconds": round(time.time() - self.started, 3),
+                "requests_by_code": {f"{m} {c}": n for (m, c), n in sorted(self.requests.items())},
+                "signatures": dict(self.signatures),
+                "spool_evictions": self.evictions,
+                "spool_errors": self.spool_errors,
+                "request_seconds": self.request_seconds.to_dict(),
+                "body_bytes": self.body_bytes.to_dict(),
+                "spool_seconds": self.spool_seconds.to_dict(),
+            }
+        out.update(gauges or {})
+        return out
+
+    def render(self, gauges: Optional[Dict[str, Tuple[str, float]]] = None) -> str:
+        """Prometheus text exposition format (0.0.4). `gauges` maps name -> (help, value)."""
+
+        p = "track17_webhook"
+        with self._lock:
+            lines = [
+                f"# HELP {p}_requests_total HTTP requests by method and status code.",
+                f"# TYPE {p}_requests_total counter",
+            ]
+            for (method, code), n in sorted(self.requests.items()):
+                lines.append(f'{p}_requests_total{{method="{method}",code="{code}"}} {n}')
+            lines.append(f"# HELP {p}_signatures_total Spooled payloads by signature check result.")
+            lines.append(f"# TYPE {p}_signatures_total counter")
+            for verdict, n in self.signatures.items():
+                lines.append(f'{p}_signatures_total{{result="{verdict}"}} {n}')
+            lines += [
+                f"# HELP {p}_spool_evictions_total Spooled payloads dropped to stay under --max-queue.",
+                f"# TYPE {p}_spool_evictions_total counter",
+                f"{p}_spool_evictions_total {self.evictions}",
+                f"# HELP {p}_spool_errors_total Payloads that could not be spooled.",
+                f"# TYPE {p}_spool_errors_total counter",
+                f"{p}_spool_errors_total {self.spool_errors}",
+            ]
+            lines += self.request_seconds.render(f"{p}_request_duration_seconds", "Time to receive, answer and spool a POST.")
+            lines += self.body_bytes.render(f"{p}_request_body_bytes", "POST body size.")
+            lines += self.spool_seconds.render(f"{p}_spool_write_duration_seconds", "Time per spool write (one batch on --async).")
+        lines += [
+            f"# HELP {p}_start_time_seconds Unix time the receiver started.",
+            f"# TYPE {p}_start_time_seconds gauge",
+            f"{p}_start_time_seconds {self.started:.3f}",
+        ]
+        for name, (help_text, value) in (gauges or {}).items():
+            lines += [f"# HELP {p}_{name} {help_text}", f"# TYPE {p}_{name} gauge", f"{p}_{name} {value:g}"]
+        return "\n".join(lines) + "\n"
+
+
+def _signature_verdict(raw_body: bytes, headers: Dict[str, str], secret: Optional[str]) -> str:
+    """valid / invalid / missing (secret set, no header) / unchecked (no secret), for receiver metrics."""
+
+    if not secret:
+        return "unchecked"
+    sig_pair = guess_signature_header(headers)
+    if not sig_pair:
+        return "missing"
+    try:
+        expected = compute_webhook_signature(raw_body, secret)
+    except UnicodeDecodeError:
+        return "invalid"
+    return "valid" if expected.lower() == sig_pair[1].lower() else "invalid"
+
+
+def _spool_backlog(queue: Optional[SpoolQueue], inbox_dir: pathlib.Path) -> int:
+    """Spooled payloads the worker has not ingested yet."""
+
+    if queue is not None:
+        return queue.depth()
+    try:
+        with os.scandir(inbox_dir) as it:
+            return sum(1 for e in it if e.name.endswith(".json") and not e.name.endswith(".headers.json"))
+    except OSError:
+        return 0
+
+
+def _metrics_response(handler: http.server.BaseHTTPRequestHandler, code: int, body: bytes, ctype: str) -> None:
+    handler.send_response(code)
+    handler.send_header("Content-Type", ctype)
+    handler.send_header("Content-Length", str(len(body)))
+    handler.end_headers()
+    handler.wfile.write(body)
+
+
 class _WebhookHandler(http.server.BaseHTTPRequestHandler):
     server_version = "track17-webhook/1.0"
 
+    def do_GET(self) -> None:  # noqa: N802
+        server: "WebhookServer" = self.server  # type: ignore[assignment]
+        path = self.path.split("?", 1)[0]
+        if path == "/metrics":
+            body = server.metrics.render(server.gauges()).encode("utf-8")
+            _metrics_response(self, 200, body, "text/plain; version=0.0.4; charset=utf-8")
+            code = 200
+        elif path == "/stats":
+            stats = server.metrics.snapshot({k: v for k, (_, v) in server.gauges().items()})
+            _metrics_response(self, 200, json.dumps(stats).encode("utf-8"), "application/json")
+            code = 200
+        else:
+            _metrics_response(self, 404, b"{\"ok\":false}\n", "application/json")
+            code = 404
+        server.metrics.observe_request("GET", code)
+
     def do_POST(self) -> None:  # noqa: N802
         server: "WebhookServer" = self.server  # type: ignore[assignment]
+        t0 = time.perf_counter()
 
         try:
             length = int(self.headers.get("Content-Length") or "0")
@@ -1401,7 +4757,10 @@ class _WebhookHandler(http.server.BaseHTTPRequestHandler):
         self.wfile.write(b"{\"ok\":true}\n")
 
         # Then spool payload to disk.
-        server.spool(raw_body, dict(self.headers))
+        try:
+            server.spool(raw_body, dict(self.headers))
+        finally:
+            server.metrics.observe_request("POST", 200, time.perf_counter() - t0, len(raw_body))
 
     def log_message(self, fmt: str, *args: Any) -> None:
         # Quiet by default; use --verbose to see logs.
@@ -1411,6 +4770,10 @@ class _WebhookHandler(http.server.BaseHTTPRequestHandler):
 
 
 class WebhookServer(http.server.ThreadingHTTPServer):
+    # socketserver's default listen backlog is 5: a burst of concurrent deliveries
+    # overflows it and the extra connects wait ~1s for a SYN retransmit.
+    request_queue_size = 128
+
     def __init__(
         self,
         server_address: Tuple[str, int],
@@ -1419,42 +4782,326 @@ class WebhookServer(http.server.ThreadingHTTPServer):
         inbox_dir: pathlib.Path,
         verbose: bool = False,
         max_files: int = 5000,
+        queue: Optional[SpoolQueue] = None,
+        secret: Optional[str] = None,
     ):
         super().__init__(server_address, RequestHandlerClass)
         self.inbox_dir = inbox_dir
         self.verbose = verbose
         self.max_files = max_files
+        # When set, payloads go to the SQLite spool; otherwise one file per payload in inbox_dir.
+        self.queue = queue
+        # Only used to count signature verdicts in /metrics; payloads are spooled either way.
+        self.secret = secret
+        self.metrics = WebhookMetrics()
+
+    def gauges(self) -> Dict[str, Tuple[str, float]]:
+        return {"backlog": ("Spooled payloads not yet ingested by the worker.", _spool_backlog(self.queue, self.inbox_dir))}
 
     def spool(self, raw_body: bytes, headers: Dict[str, str]) -> None:
-        ts = _dt.datetime.now(tz=_dt.timezone.utc).strftime("%Y%m%dT%H%M%SZ")
-        sha = _sha256_hex(raw_body)[:16]
-        fname = f"{ts}_{sha}.json"
-        fpath = self.inbox_dir / fname
+        t0 = time.perf_counter()
+        try:
+            if self.queue is not None:
+                item_id, evicted = self.queue.enqueue(raw_body, headers)
+                where = f"#{item_id} to {self.queue.path}"
+            else:
+                fpath, evicted = _spool_to_dir(self.inbox_dir, self.max_files, raw_body, headers)
+                where = f"to {fpath}" if fpath else ""
+        except Exception:
+            self.metrics.spool_failed()
+            raise
+        elapsed = time.perf_counter() - t0
+        self.metrics.observe_spool(elapsed, signatures=(_signature_verdict(raw_body, headers, self.secret),), evicted=evicted)
+        if where and self.verbose:
+            print(f"Spooled webhook payload {where}")
 
-        # Don't overwrite existing.
-        if fpath.exists():
-            return
 
-        # Very small backpressure: if inbox is huge, drop oldest processed files.
+def _spool_to_dir(
+    inbox_dir: pathlib.Path, max_files: int, raw_body: bytes, headers: Dict[str, str]
+) -> Tuple[Optional[pathlib.Path], int]:
+    """File-per-payload spool (--spool dir).
+
+    Returns (new file or None if it already existed, number of old payloads evicted).
+    """
+
+    ts = _dt.datetime.now(tz=_dt.timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    sha = _sha256_hex(raw_body)[:16]
+    fname = f"{ts}_{sha}.json"
+    fpath = inbox_dir / fname
+
+    # Don't overwrite existing.
+    if fpath.exists():
+        return None, 0
+
+    # Very small backpressure: if inbox is huge, drop oldest processed files.
+    evicted = 0
+    try:
+        existing = sorted(inbox_dir.glob("*.json"))
+        if len(existing) >= max_files:
+            for old in existing[: max(0, len(existing) - max_files + 1)]:
+                try:
+                    old.unlink()
+                    if not old.name.endswith(".headers.json"):
+                        evicted += 1
+                    side = old.with_suffix(".headers.json")
+                    if side.exists():
+                        side.unlink()
+                except Exception:
+                    pass
+    except Exception:
+        pass
+
+    # Sidecar first: a consumer that wakes on the body file must find its headers.
+    (inbox_dir / f"{fpath.stem}.headers.json").write_text(json.dumps(headers), "utf-8")
+    fpath.write_bytes(raw_body)
+    return fpath, evicted
+
+
+class AsyncWebhookServer:
+    """asyncio webhook receiver (stdlib only): one task per connection, one spool writer.
+
+    Request tasks parse just enough HTTP/1.1 to get the headers and body, push
+    (received_at, body, headers) onto a bounded in-memory queue and answer 200.
+    When the queue is full they answer 503 with Retry-After instead of waiting.
+    A single writer task drains the queue in batches into the SQLite spool (or
+    the inbox directory) on a dedicated thread, so the event loop never blocks
+    on disk I/O and the spool has exactly one writer.
+
+    GET /stats returns queue depth, enqueue latency and drop counts plus the
+    WebhookMetrics snapshot as JSON; GET /metrics serves the same metrics in
+    Prometheus text format.
+    """
+
+    MAX_BODY = 10 * 1024 * 1024
+
+    _OK = b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nContent-Length: 12\r\n\r\n{\"ok\":true}\n"
+    _BUSY = (
+        b"HTTP/1.1 503 Service Unavailable\r\nRetry-After: 1\r\nContent-Type: application/json\r\n"
+        b"Content-Length: 25\r\n\r\n{\"ok\":false,\"busy\":true}\n"
+    )
+    _NOT_FOUND = b"HTTP/1.1 404 Not Found\r\nContent-Type: application/json\r\nContent-Length: 13\r\n\r\n{\"ok\":false}\n"
+    _CONTINUE = b"HTTP/1.1 100 Continue\r\n\r\n"
+
+    def __init__(
+        self,
+        *,
+        inbox_dir: pathlib.Path,
+        queue: Optional[SpoolQueue] = None,
+        max_files: int = 5000,
+        max_pending: int = 1000,
+        batch_size: int = 200,
+        verbose: bool = False,
+        secret: Optional[str] = None,
+    ):
+        self.inbox_dir = inbox_dir
+        self.queue = queue
+        self.max_files = max_files
+        self.max_pending = max_pending
+        self.batch_size = batch_size
+        self.verbose = verbose
+        self.secret = secret
+        self.metrics = WebhookMetrics()
+        self.stats: Dict[str, Any] = {
+            "requests": 0,
+            "accepted": 0,
+            "dropped": 0,
+            "spooled": 0,
+            "spool_errors": 0,
+            "max_depth": 0,
+            "enqueue_latency_sum": 0.0,
+            "enqueue_latency_max": 0.0,
+        }
+        self._pending: Optional["asyncio.Queue[Tuple[float, bytes, Dict[str, str]]]"] = None
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="track17-spool")
+
+    def snapshot(self) -> Dict[str, Any]:
+        out = dict(self.stats)
+        out["depth"] = self._pending.qsize() if self._pending is not None else 0
+        out["max_pending"] = self.max_pending
+        spooled = out["spooled"] or 0
+        out["enqueue_latency_avg"] = (out["enqueue_latency_sum"] / spooled) if spooled else 0.0
+        return out
+
+    def gauges(self) -> Dict[str, Tuple[str, float]]:
+        return {
+            "backlog": ("Spooled payloads not yet ingested by the worker.", _spool_backlog(self.queue, self.inbox_dir)),
+            "pending": ("Accepted payloads waiting in memory for the spool writer.", self._pending.qsize() if self._pending else 0),
+        }
+
+    def _spool_batch(self, batch: List[Tuple[float, bytes, Dict[str, str]]]) -> None:
+        # Runs on the spool thread, so the signature check stays off the event loop.
+        t0 = time.perf_counter()
+        if self.queue is not None:
+            _, evicted = self.queue.enqueue_many([(body, headers) for _, body, headers in batch])
+        else:
+            evicted = 0
+            for _, body, headers in batch:
+                evicted += _spool_to_dir(self.inbox_dir, self.max_files, body, headers)[1]
+        elapsed = time.perf_counter() - t0
+        verdicts = [_signature_verdict(body, headers, self.secret) for _, body, headers in batch]
+        self.metrics.observe_spool(elapsed, signatures=verdicts, evicted=evicted)
+
+    async def _writer(self) -> None:
+        assert self._pending is not None
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._pending.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._pending.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+            try:
+                await loop.run_in_executor(self._executor, self._spool_batch, batch)
+            except Exception as e:
+                self.stats["spool_errors"] += len(batch)
+                self.metrics.spool_failed(len(batch))
+                print(f"Failed to spool {len(batch)} payload(s): {e}", file=sys.stderr)
+            else:
+                done = time.monotonic()
+                self.stats["spooled"] += len(batch)
+                for t_recv, _, _ in batch:
+                    lat = done - t_recv
+                    self.stats["enqueue_latency_sum"] += lat
+                    if lat > self.stats["enqueue_latency_max"]:
+                        self.stats["enqueue_latency_max"] = lat
+                if self.verbose:
+                    print(f"Spooled {len(batch)} webhook payload(s)")
+            finally:
+                for _ in batch:
+                    self._pending.task_done()
+
+    @staticmethod
+    async def _read_chunked(reader: asyncio.StreamReader, limit: int) -> bytes:
+        parts: List[bytes] = []
+        total = 0
+        while True:
+            size = int((await reader.readline()).split(b";", 1)[0].strip() or b"0", 16)
+            if size == 0:
+                # Skip trailers up to the blank line.
+                while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    pass
+                return b"".join(parts)
+            total += size
+            if total > limit:
+                raise ValueError("body too large")
+            parts.append(await reader.readexactly(size))
+            await reader.readline()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        assert self._pending is not None
         try:
-            existing = sorted(self.inbox_dir.glob("*.json"))
-            if len(existing) >= self.max_files:
-                for old in existing[: max(0, len(existing) - self.max_files + 1)]:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    return
+                parts = request_line.split()
+                if len(parts) != 3:
+                    writer.write(b"HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+                    return
+                method, target, version = parts
+
+                headers: Dict[str, str] = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    k, _, v = line.decode("latin-1").partition(":")
+                    headers[k.strip()] = v.strip()
+                lower = {k.lower(): v for k, v in headers.items()}
+                t_recv = time.monotonic()
+
+                conn_hdr = lower.get("connection", "").lower()
+                keep_alive = conn_hdr != "close" if version == b"HTTP/1.1" else conn_hdr == "keep-alive"
+
+                path = target.split(b"?", 1)[0]
+                if method == b"GET" and path in (b"/stats", b"/metrics"):
+                    if path == b"/stats":
+                        out = self.snapshot()
+                        out.update(self.metrics.snapshot({k: v for k, (_, v) in self.gauges().items()}))
+                        body, ctype = json.dumps(out).encode("utf-8"), b"application/json"
+                    else:
+                        body = self.metrics.render(self.gauges()).encode("utf-8")
+                        ctype = b"text/plain; version=0.0.4; charset=utf-8"
+                    writer.write(
+                        b"HTTP/1.1 200 OK\r\nContent-Type: "
+                        + ctype
+                        + b"\r\nContent-Length: "
+                        + str(len(body)).encode()
+                        + b"\r\n\r\n"
+                        + body
+                    )
+                    self.metrics.observe_request("GET", 200)
+                elif method == b"GET":
+                    # Same answer as the threaded server's do_GET.
+                    writer.write(self._NOT_FOUND)
+                    self.metrics.observe_request("GET", 404)
+                elif method != b"POST":
+                    writer.write(b"HTTP/1.1 405 Method Not Allowed\r\nAllow: POST\r\nContent-Length: 0\r\n\r\n")
+                    self.metrics.observe_request(method.decode("latin-1"), 405)
+                else:
+                    self.stats["requests"] += 1
+                    # Clients that sent "Expect: 100-continue" hold the body back until told to go on.
+                    expect_continue = version == b"HTTP/1.1" and lower.get("expect", "").lower() == "100-continue"
                     try:
-                        old.unlink()
-                        side = old.with_suffix(".headers.json")
-                        if side.exists():
-                            side.unlink()
-                    except Exception:
-                        pass
-        except Exception:
-            pass
+                        if "chunked" in lower.get("transfer-encoding", "").lower():
+                            if expect_continue:
+                                writer.write(self._CONTINUE)
+                            raw_body = await self._read_chunked(reader, self.MAX_BODY)
+                        else:
+                            length = int(lower.get("content-length") or "0")
+                            if length > self.MAX_BODY:
+                                raise ValueError("body too large")
+                            if expect_continue and length > 0:
+                                writer.write(self._CONTINUE)
+                            raw_body = await reader.readexactly(length) if length > 0 else b""
+                    except ValueError:
+                        writer.write(b"HTTP/1.1 413 Payload Too Large\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+                        self.metrics.observe_request("POST", 413)
+                        return
 
-        fpath.write_bytes(raw_body)
-        (self.inbox_dir / f"{fpath.stem}.headers.json").write_text(json.dumps(headers), "utf-8")
+                    try:
+                        self._pending.put_nowait((t_recv, raw_body, headers))
+                    except asyncio.QueueFull:
+                        self.stats["dropped"] += 1
+                        writer.write(self._BUSY)
+                        code = 503
+                    else:
+                        self.stats["accepted"] += 1
+                        depth = self._pending.qsize()
+                        if depth > self.stats["max_depth"]:
+                            self.stats["max_depth"] = depth
+                        writer.write(self._OK)
+                        code = 200
+                    self.metrics.observe_request("POST", code, time.monotonic() - t_recv, len(raw_body))
+
+                await writer.drain()
+                if not keep_alive:
+                    return
+        except (asyncio.IncompleteReadError, ConnectionError, asyncio.LimitOverrunError):
+            return
+        finally:
+            writer.close()
+
+    async def serve(self, host: str, port: int, *, ready: Optional[Any] = None) -> None:
+        """Serve until cancelled, then flush whatever is still queued.
+
+        `ready` (optional callable) is invoked with the listening asyncio.Server.
+        """
 
-        if self.verbose:
-            print(f"Spooled webhook payload to {fpath}")
+        self._pending = asyncio.Queue(maxsize=self.max_pending)
+        writer_task = asyncio.create_task(self._writer())
+        server = await asyncio.start_server(self._handle, host, port)
+        if ready is not None:
+            ready(server)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            server.close()
+            await self._pending.join()
+            writer_task.cancel()
+            self._executor.shutdown(wait=True)
 
 
 def cmd_webhook_server(args: argparse.Namespace) -> int:
@@ -1463,10 +5110,42 @@ def cmd_webhook_server(args: argparse.Namespace) -> int:
     bind = args.bind
     port = int(args.port)
 
-    httpd = WebhookServer((bind, port), _WebhookHandler, inbox_dir=p["inbox"], verbose=args.verbose)
+    queue = SpoolQueue(p["queue"], max_items=args.max_queue) if _spool_backend(args) == "sqlite" else None
+    secret = args.secret or os.environ.get("TRACK17_WEBHOOK_SECRET")
 
-    print(f"Webhook server listening on http://{bind}:{port}/")
-    print(f"Spooling JSON payloads into: {p['inbox']}")
+    if args.use_async:
+        aserver = AsyncWebhookServer(
+            inbox_dir=p["inbox"],
+            queue=queue,
+            max_files=args.max_queue,
+            max_pending=args.max_pending,
+            verbose=args.verbose,
+            secret=secret,
+        )
+        print(f"Webhook server (asyncio) listening on http://{bind}:{port}/ (GET /metrics, GET /stats)")
+        print(f"Spooling JSON payloads into: {queue.path if queue else p['inbox']}")
+        print("Press Ctrl+C to stop.")
+        try:
+            asyncio.run(aserver.serve(bind, port))
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if queue is not None:
+                queue.close()
+        return 0
+
+    httpd = WebhookServer(
+        (bind, port),
+        _WebhookHandler,
+        inbox_dir=p["inbox"],
+        verbose=args.verbose,
+        max_files=args.max_queue,
+        queue=queue,
+        secret=secret,
+    )
+
+    print(f"Webhook server listening on http://{bind}:{port}/ (GET /metrics, GET /stats)")
+    print(f"Spooling JSON payloads into: {queue.path if queue else p['inbox']}")
     print("Press Ctrl+C to stop.")
 
     try:
@@ -1475,6 +5154,8 @@ def cmd_webhook_server(args: argparse.Namespace) -> int:
         pass
     finally:
         httpd.server_close()
+        if queue is not None:
+            queue.close()
 
     return 0
 
@@ -1506,6 +5187,7 @@ def build_parser() -> argparse.ArgumentParser:
     s.add_argument("number", help="Tracking number")
     s.add_argument("--label", help="Friendly label")
     s.add_argument("--carrier", type=int, help="Carrier code (optional; 0 means auto-detect)")
+    s.add_argument("--carrier-name", help="Carrier name, resolved offline via the carrier index (see carriers-update)")
     s.add_argument("--param", help="Additional parameter (postcode, phone last4, etc.)")
     s.add_argument("--tag", help="17TRACK tag (defaults to label if provided)")
     s.add_argument("--lang", help="Translation language code (default: TRACK17_LANG or 'en')")
@@ -1518,6 +5200,18 @@ def build_parser() -> argparse.ArgumentParser:
 
     s = sub.add_parser("sync", help="Poll 17TRACK for updates for all packages")
     s.add_argument("--active-only", action="store_true", help="Only packages not marked as Stopped")
+    s.add_argument(
+        "--due-only",
+        action="store_true",
+        help="Only packages whose adaptive next_poll_at has passed (reports the API calls saved)",
+    )
+    s.add_argument(
+        "--parallel",
+        type=int,
+        default=1,
+        help="Max gettrackinfo chunks in flight at once (default: 1; mind the 17TRACK rate limit)",
+    )
+    s.add_argument("--verbose", action="store_true", help="Print per-chunk latency")
     s.set_defaults(fn=cmd_sync)
 
     s = sub.add_parser("status", help="Show status for one package")
@@ -1540,7 +5234,82 @@ def build_parser() -> argparse.ArgumentParser:
     s.add_argument("--delete-remote", action="store_true", help="Also delete the tracking number at 17TRACK")
     s.set_defaults(fn=cmd_remove)
 
-    s = sub.add_parser("quota", help="Show 17TRACK API quota info")
+    s = sub.add_parser("import", help="Bulk-add packages from a CSV or NDJSON file (registers 40 per call)")
+    s.add_argument("file", help="CSV or NDJSON file (.gz ok), or - for stdin")
+    s.add_argument("--format", choices=["csv", "ndjson"], help="Input format (default: from the file extension, else ndjson)")
+    s.add_argument("--no-register", action="store_true", help="Only store the packages locally")
+    s.add_argument("--batch-size", type=int, default=40, help="Numbers per register call and transaction (max/default: 40)")
+    s.set_defaults(fn=cmd_import)
+
+    s = sub.add_parser("export", help="Stream packages and their events as NDJSON")
+    s.add_argument("--output", "-o", help="Output file (.gz compresses; default: stdout)")
+    s.add_argument("--all", action="store_true", help="Include archived packages")
+    s.add_argument("--no-events", action="store_true", help="Packages only")
+    s.add_argument("--raw", action="store_true", help="Include each event's raw JSON")
+    s.set_defaults(fn=cmd_export)
+
+    s = sub.add_parser("search", help="Full-text search over tracking events (description, location, label, tag)")
+    s.add_argument("query", nargs="+", help="Words to match (all must match; word* matches a prefix)")
+    s.add_argument("--match", action="store_true", help="Treat the query as a raw FTS5 MATCH expression (OR, NEAR, column:...)")
+    s.add_argument("--since", help="Only events at/after this UTC date/time, or an age like 7d / 12h")
+    s.add_argument("--until", help="Only events before this UTC date/time, or an age like 1d")
+    s.add_argument("--by-package", action="store_true", help="One line per package (best match + hit count)")
+    s.add_argument("--sort", choices=["rank", "time"], default="rank", help="Order by relevance (default) or event time")
+    s.add_argument("--all", action="store_true", help="Include archived packages")
+    s.add_argument("--limit", type=int, default=20, help="Max results (default: 20)")
+    s.add_argument("--json", action="store_true", help="Output JSON")
+    s.add_argument("--rebuild", action="store_true", help="Rebuild the search index from the events table")
+    s.set_defaults(fn=cmd_search)
+
+    s = sub.add_parser("compact", help="Move raw event/payload JSON into compressed, deduplicated blobs")
+    s.add_argument("--batch-size", type=int, default=1000, help="Rows per transaction (default: 1000)")
+    s.add_argument("--vacuum", action="store_true", help="VACUUM afterwards to shrink the DB file")
+    s.set_defaults(fn=cmd_compact)
+
+    s = sub.add_parser("changes", help="Stream the change feed (updates applied by sync/webhooks) after a cursor")
+    s.add_argument("--since", type=int, help="Only changes with a higher sequence number (default: cursor file or 0)")
+    s.add_argument("--cursor-file", help="Read the cursor from this file and store the last change number back")
+    s.add_argument("--limit", type=int, help="Max changes to print")
+    s.add_argument("--json", action="store_true", help="NDJSON, one change per line (with its new events)")
+    s.set_defaults(fn=cmd_changes)
+
+    s = sub.add_parser("gc", help="Apply the payload retention policy (bounded work per run)")
+    s.add_argument(
+        "--keep",
+        type=int,
+        default=None,
+        help="Payloads kept per package (default: TRACK17_GC_KEEP or 20)",
+    )
+    s.add_argument(
+        "--max-age-days",
+        type=float,
+        default=None,
+        help="Drop payloads older than this for delivered/archived packages (default: TRACK17_GC_MAX_AGE_DAYS or 30)",
+    )
+    s.add_argument(
+        "--changes-days",
+        type=float,
+        default=None,
+        help="Drop `changes` feed rows older than this (default: TRACK17_GC_CHANGES_DAYS or 90)",
+    )
+    s.add_argument("--max-rows", type=int, default=5000, help="Max payloads deleted per run (default: 5000)")
+    s.add_argument("--batch-size", type=int, default=500, help="Rows deleted per transaction (default: 500)")
+    s.add_argument("--archive", action="store_true", help="Append deleted payloads to monthly .ndjson.gz files first")
+    s.add_argument("--archive-dir", help="Archive directory (default: <data dir>/archive)")
+    s.add_argument("--vacuum-pages", type=int, default=1000, help="Pages released by incremental_vacuum (default: 1000)")
+    s.add_argument(
+        "--enable-incremental-vacuum",
+        action="store_true",
+        help="Switch an existing DB to auto_vacuum=INCREMENTAL (runs a full VACUUM once)",
+    )
+    s.set_defaults(fn=cmd_gc)
+
+    s = sub.add_parser("db-check", help="Apply schema migrations and verify hot queries use indexes")
+    s.add_argument("--verbose", action="store_true", help="Print the query plan for every query")
+    s.set_defaults(fn=cmd_db_check)
+
+    s = sub.add_parser("quota", help="Show 17TRACK API quota info and the local quota budget")
+    s.add_argument("--local", action="store_true", help="Only show the local budget (no API call, no reseed)")
     s.set_defaults(fn=cmd_quota)
 
     s = sub.add_parser("carriers-update", help="Download carrier list cache (for looking up carrier codes)")
@@ -1548,6 +5317,9 @@ def build_parser() -> argparse.ArgumentParser:
 
     s = sub.add_parser("carriers-search", help="Search carrier list cache")
     s.add_argument("query", help="Search query (name/code)")
+    s.add_argument("--limit", type=int, default=20, help="Max matches (default: 20)")
+    s.add_argument("--json", action="store_true", help="Output JSON")
+    s.add_argument("--verbose", action="store_true", help="Show scores and lookup timings")
     s.set_defaults(fn=cmd_carriers_search)
 
     s = sub.add_parser("ingest-webhook", help="Ingest a single webhook payload (stdin or --file)")
@@ -1557,22 +5329,54 @@ def build_parser() -> argparse.ArgumentParser:
 
     s = sub.add_parser("process-inbox", help="Process all spooled payloads in the inbox directory")
     s.add_argument("--secret", help="Webhook secret (or set TRACK17_WEBHOOK_SECRET)")
+    s.add_argument("--spool", choices=["sqlite", "dir"], help="Spool backend (default: TRACK17_SPOOL or sqlite)")
+    s.add_argument("--batch-size", type=int, default=200, help="Queued payloads read per batch (default: 200)")
     s.set_defaults(fn=cmd_process_inbox)
 
+    s = sub.add_parser("worker", help="Long-running consumer: ingest spooled webhook payloads as they arrive")
+    s.add_argument("--secret", help="Webhook secret (or set TRACK17_WEBHOOK_SECRET)")
+    s.add_argument("--spool", choices=["sqlite", "dir"], help="Spool backend (default: TRACK17_SPOOL or sqlite)")
+    s.add_argument("--batch-size", type=int, default=200, help="Max payloads per micro-batch (default: 200)")
+    s.add_argument("--poll", action="store_true", help="Poll instead of using inotify")
+    s.add_argument("--poll-interval", type=float, default=1.0, help="Polling interval in seconds (default: 1)")
+    s.add_argument("--once", action="store_true", help="Drain once and exit")
+    s.set_defaults(fn=cmd_worker)
+
     s = sub.add_parser("webhook-server", help="Run a simple HTTP server to receive 17TRACK webhooks")
     s.add_argument("--bind", default="127.0.0.1", help="Bind address (default: 127.0.0.1)")
     s.add_argument("--port", default=8789, type=int, help="Port (default: 8789)")
     s.add_argument("--verbose", action="store_true", help="Verbose request logging")
+    s.add_argument("--secret", help="Webhook secret for /metrics signature counts (or set TRACK17_WEBHOOK_SECRET)")
+    s.add_argument("--spool", choices=["sqlite", "dir"], help="Spool backend (default: TRACK17_SPOOL or sqlite)")
+    s.add_argument("--max-queue", type=int, default=5000, help="Max spooled payloads kept; oldest are evicted (default: 5000)")
+    s.add_argument("--async", dest="use_async", action="store_true", help="Use the asyncio receiver instead of threads")
+    s.add_argument(
+        "--max-pending",
+        type=int,
+        default=1000,
+        help="--async: in-memory queue size before answering 503 (default: 1000)",
+    )
     s.set_defaults(fn=cmd_webhook_server)
 
     return p
 
 
+def _check_shard_support(args: argparse.Namespace) -> None:
+    """Commands that work on one DB file need TRACK17_SHARD once the data dir is sharded."""
+
+    n = shard_count()
+    if n == 1:
+        return
+    if args.fn in (cmd_export, cmd_changes, cmd_gc, cmd_compact, cmd_db_check) and not os.environ.get("TRACK17_SHARD"):
+        raise Track17Error(f"`{args.cmd}` works on one DB file; run it per shard with TRACK17_SHARD=0..{n - 1}")
+
+
 def main(argv: Optional[Sequence[str]] = None) -> int:
     parser = build_parser()
     args = parser.parse_args(argv)
 
     try:
+        _check_shard_support(args)
         return int(args.fn(args))
     except Track17Error as e:
         print(f"Error: {e}", file=sys.stderr)